@@ -1,44 +1,139 @@
 #!/usr/bin/env python3
-from scapy.all import *
 from Crypto.Cipher import ARC4
-import os, random
+import argparse, os, random, struct, time
+import numpy as np
 
 KEY        = b"nasa2025xxxxx"        #find the password by youself
 IV_LEN     = 3
 N_REAL     = 100
 N_FAKE     = 100
 PLAINTEXT  = b"GET /index.html HTTP/1.1\r\nHost: example.com\r\n\r\n"
-assert len(PLAINTEXT) == 47 
+assert len(PLAINTEXT) == 47
 REAL_SRC   = "de:ad:be:ef:00:01"
 FAKE_SRC   = "ba:dd:fa:ce:00:01"
 DST        = "ff:ff:ff:ff:ff:ff"
 
+# bulk mode: pcap records written straight into a preallocated file
+IV_SPACE   = 1 << (8 * IV_LEN)
+PCAP_HEADER = struct.pack('<IHHiIII', 0xA1B2C3D4, 2, 4, 0, 0, 0xFFFF, 1) # Ethernet
+ETHER_TYPE = b'\x90\x00'                                                # what scapy writes for Ether() / Raw()
+FRAME_LEN  = 14 + IV_LEN + len(PLAINTEXT)
+RECORD_LEN = 16 + FRAME_LEN
+BATCH      = 4096                    # frames RC4-encrypted per NumPy batch (state stays in L2, as in rc4search)
+
 
 def rc4(iv: bytes, plain: bytes, key: bytes) -> bytes:
     return ARC4.new(iv + key).encrypt(plain)
 
-pkts, ivs = [], set()
+def generate(path: str = "lab.pcap"):
+    from scapy.all import Ether, Raw, wrpcap
+    pkts, ivs = [], set()
 
-for _ in range(N_REAL):
-    iv = os.urandom(IV_LEN)
-    while iv in ivs:                       
+    for _ in range(N_REAL):
         iv = os.urandom(IV_LEN)
-    ivs.add(iv)
+        while iv in ivs:
+            iv = os.urandom(IV_LEN)
+        ivs.add(iv)
+
+        cipher = rc4(iv, PLAINTEXT, KEY)
+        load   = iv + cipher
+        pkts.append(Ether(src=REAL_SRC, dst=DST) / Raw(load))
+
+    for _ in range(N_FAKE):
+        iv     = os.urandom(IV_LEN)
+        noise  = os.urandom(len(PLAINTEXT))
+        load   = iv + noise
+        pkts.append(Ether(src=FAKE_SRC, dst=DST) / Raw(load))
+
+    random.shuffle(pkts)
+    wrpcap(path, pkts)
+
+def generate_bulk(path: str, frames: int, real_ratio: float = 0.5, reuse: float = 0.0, seed: int | None = None) -> dict[str, int]:
+    """
+    Write `frames` frames like generate() without scapy: a `real_ratio`
+    share from REAL_SRC encrypted under KEY, the rest noise from FAKE_SRC.
+    Real IVs are drawn without replacement from the IV space, except a
+    `reuse` share (0 <= reuse < 1) of real frames that repeat an earlier IV.
+    """
+    from rc4search import ksa, prga
+
+    if not 0 <= real_ratio <= 1:
+        raise ValueError(f"real_ratio must be between 0 and 1, got {real_ratio}")
+    if not 0 <= reuse < 1:
+        raise ValueError(f"reuse must be at least 0 and below 1 (some IV has to be used first), got {reuse}")
+    rng = np.random.default_rng(seed)
+    n_real: int = round(frames * real_ratio)
+    n_reused: int = round(n_real * reuse) if n_real > 1 else 0
+    n_unique: int = n_real - n_reused
+    if n_real and not n_unique: # a tiny capture with reuse close to 1
+        n_unique, n_reused = 1, n_real - 1
+    if n_unique > IV_SPACE:
+        raise ValueError(f"{n_unique} unique IVs requested, only {IV_SPACE} exist; raise --reuse")
+
+    unique = rng.choice(IV_SPACE, n_unique, replace=False) # no 2^24 permutation for a small capture
+    real_ivs = np.concatenate([unique, unique[rng.integers(0, max(n_unique, 1), n_reused)]])
+    rng.shuffle(real_ivs)
+    is_real = np.zeros(frames, dtype=bool)
+    is_real[rng.choice(frames, n_real, replace=False)] = True
+
+    mac = lambda text: np.frombuffer(bytes.fromhex(text.replace(':', '')), dtype=np.uint8)
+    key = np.frombuffer(KEY, dtype=np.uint8)
+    plain = np.frombuffer(PLAINTEXT, dtype=np.uint8)
+
+    with open(path, 'wb') as f:
+        f.write(PCAP_HEADER)
+        f.truncate(len(PCAP_HEADER) + frames * RECORD_LEN)
+    out = np.memmap(path, dtype=np.uint8, mode='r+', offset=len(PCAP_HEADER), shape=(frames, RECORD_LEN))
+
+    header = np.zeros(4, dtype='<u4')
+    header[2:] = FRAME_LEN                               # caplen, len
+    out[:, 0:16] = header.view(np.uint8)
+    out[:, 16:22] = mac(DST)
+    out[:, 28:30] = np.frombuffer(ETHER_TYPE, dtype=np.uint8)
+    out[:, 0:4] = np.arange(frames, dtype='<u4').view(np.uint8).reshape(-1, 4) # ts_sec: frame number
+    iv_at, data_at = 30, 30 + IV_LEN
+
+    real_rows = np.flatnonzero(is_real)
+    for low in range(0, n_real, BATCH):
+        rows = real_rows[low:low + BATCH]
+        ivs = real_ivs[low:low + BATCH]
+        keys = np.empty((len(rows), IV_LEN + len(KEY)), dtype=np.uint8)
+        for k in range(IV_LEN):
+            keys[:, k] = ivs >> (8 * (IV_LEN - 1 - k))
+        keys[:, IV_LEN:] = key
+        out[rows, 22:28] = mac(REAL_SRC)
+        out[rows, iv_at:data_at] = keys[:, :IV_LEN]
+        out[rows, data_at:] = prga(ksa(keys), len(PLAINTEXT)) ^ plain
+
+    fake_rows = np.flatnonzero(~is_real)
+    for low in range(0, len(fake_rows), BATCH):
+        rows = fake_rows[low:low + BATCH]
+        out[rows, 22:28] = mac(FAKE_SRC)
+        out[rows, iv_at:] = rng.integers(0, 256, (len(rows), RECORD_LEN - iv_at), dtype=np.uint8)
+
+    out.flush()
+    return {'frames': frames, 'real': n_real, 'unique_ivs': n_unique, 'reused': n_reused}
 
-    cipher = rc4(iv, PLAINTEXT, KEY)       
-    load   = iv + cipher
-    pkts.append(Ether(src=REAL_SRC, dst=DST) / Raw(load))
 
-for _ in range(N_FAKE):
-    iv     = os.urandom(IV_LEN)
-    noise  = os.urandom(len(PLAINTEXT))
-    load   = iv + noise
-    pkts.append(Ether(src=FAKE_SRC, dst=DST) / Raw(load))
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="generate a WEP capture (+ plain.txt)")
+    parser.add_argument("--out", default="lab.pcap")
+    parser.add_argument("--bulk", type=int, metavar="FRAMES", help="write FRAMES frames without scapy, for benchmarks")
+    parser.add_argument("--real-ratio", type=float, default=N_REAL / (N_REAL + N_FAKE), help="share of real frames (--bulk)")
+    parser.add_argument("--reuse", type=float, default=0.0, help="share of real frames reusing an earlier IV (--bulk)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for --bulk")
+    args = parser.parse_args()
 
-random.shuffle(pkts)
-wrpcap("lab.pcap", pkts)
+    if args.bulk is None:
+        generate(args.out)
+    else:
+        start = time.perf_counter()
+        counts = generate_bulk(args.out, args.bulk, args.real_ratio, args.reuse, args.seed)
+        elapsed = time.perf_counter() - start
+        print(f"{counts['frames']:,} frames ({counts['real']:,} real, {counts['unique_ivs']:,} unique IVs, "
+              f"{counts['reused']:,} reused) in {elapsed:.2f}s, {counts['frames'] / elapsed:,.0f} frames/s")
 
-with open("plain.txt", "wb") as f:
-    f.write(PLAINTEXT)
+    with open("plain.txt", "wb") as f:
+        f.write(PLAINTEXT)
 
-print("✅  generated  lab.pcap  (+  plain.txt)")
+    print(f"✅  generated  {args.out}  (+  plain.txt)")
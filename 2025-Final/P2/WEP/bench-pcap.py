@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import random
+import struct
+import time
+from pcapstream import iter_frames, mac_bytes
+
+# ---------------------------
+# rdpcap loop (p2_1.py before pcapstream) vs streaming mmap reader
+# ---------------------------
+REAL_SRC = "de:ad:be:ef:00:01"
+FAKE_SRC = "ba:dd:fa:ce:00:01"
+DST      = "ff:ff:ff:ff:ff:ff"
+LOAD_LEN = 3 + 47 # IV + ciphertext of the 47-byte plaintext, as in WEP_gen.py
+
+def generate(path: str, frames: int, pcapng: bool, seed: int = 0) -> list[bytes]:
+    """
+    Write a WEP_gen.py-like capture (half real, half fake sources, random
+    loads) without scapy; returns the IVs of the real frames in order.
+    """
+    rng = random.Random(seed)
+    real, fake = mac_bytes(REAL_SRC), mac_bytes(FAKE_SRC)
+    dst: bytes = mac_bytes(DST)
+    ivs: list[bytes] = []
+    with open(path, 'wb') as f:
+        if pcapng:
+            f.write(struct.pack('<IIIHHqI', 0x0A0D0D0A, 28, 0x1A2B3C4D, 1, 0, -1, 28)) # SHB
+            f.write(struct.pack('<IIHHII', 1, 20, 1, 0, 0xFFFF, 20))                   # IDB, Ethernet
+        else:
+            f.write(struct.pack('<IHHiIII', 0xA1B2C3D4, 2, 4, 0, 0, 0xFFFF, 1))
+        for i in range(frames):
+            src: bytes = real if rng.random() < 0.5 else fake
+            load: bytes = rng.randbytes(LOAD_LEN)
+            if src == real:
+                ivs.append(load[:3])
+            frame: bytes = dst + src + b'\x90\x00' + load
+            if pcapng:
+                pad: int = -len(frame) % 4
+                block_len: int = 32 + len(frame) + pad
+                f.write(struct.pack('<IIIIIII', 6, block_len, 0, 0, i, len(frame), len(frame))
+                        + frame + b'\x00' * pad + struct.pack('<I', block_len))
+            else:
+                f.write(struct.pack('<IIII', i, 0, len(frame), len(frame)) + frame)
+    return ivs
+
+def rdpcap_loop(path: str, src: str, ivs: set[bytes]) -> list[bytes]:
+    from scapy.all import rdpcap, Raw
+    found: list[bytes] = []
+    for pkt in rdpcap(path):
+        if pkt.haslayer(Raw) and pkt.src == src:
+            raw = bytes(pkt[Raw].load)
+            if raw[:3] in ivs:
+                found.append(raw[:3])
+    return found
+
+def stream_loop(path: str, src: str, ivs: set[bytes]) -> list[bytes]:
+    return [frame.iv for frame in iter_frames(path, src=src, ivs=ivs)]
+
+def main():
+    parser = argparse.ArgumentParser(description="rdpcap vs pcapstream on a generated WEP capture")
+    parser.add_argument('--frames', type=int, default=100000)
+    parser.add_argument('--dir', default='.', help='where to write the generated captures')
+    parser.add_argument('--keep', action='store_true', help='keep the generated captures')
+    args = parser.parse_args()
+
+    for pcapng in (False, True):
+        path: str = os.path.join(args.dir, f'bench.{"pcapng" if pcapng else "pcap"}')
+        real_ivs: list[bytes] = generate(path, args.frames, pcapng)
+        wanted: set[bytes] = set(real_ivs[::10]) # a filter that keeps ~5% of the frames
+        print(f"[{os.path.basename(path)}] {args.frames} frames, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        start: float = time.perf_counter()
+        streamed: list[bytes] = stream_loop(path, REAL_SRC, wanted)
+        stream_time: float = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded: list[bytes] = rdpcap_loop(path, REAL_SRC, wanted)
+        rdpcap_time: float = time.perf_counter() - start
+
+        assert streamed == loaded and set(streamed) == wanted, "readers disagree"
+        print(f"  {'rdpcap loop':<12} {rdpcap_time:8.3f} s  {args.frames / rdpcap_time:>12,.0f} frames/s")
+        print(f"  {'pcapstream':<12} {stream_time:8.3f} s  {args.frames / stream_time:>12,.0f} frames/s"
+              f"  x{rdpcap_time / stream_time:.0f}, {len(streamed)} matches")
+        if not args.keep:
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
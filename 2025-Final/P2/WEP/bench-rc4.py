@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+import argparse
+import itertools
+import multiprocessing as mp
+import time
+from Crypto.Cipher import ARC4
+from keyspace import Keyspace
+from rc4search import KeySearch, search
+
+# ---------------------------
+# keys/s: ARC4.new per candidate (p2_2.py before rc4search) vs batched NumPy RC4
+# ---------------------------
+IV = b"\x8e\x44\xb2"
+PREFIX = b"nasa2025"
+CHARS = b"abcdefghijklmnopqrstuvwxyz0123456789"
+SECRET_INDEX = 3_000_017 # planted key, so every engine has something to find
+TARGET = b""             # its keystream, set in main() before the pool forks
+
+def per_candidate(suffix: tuple[int, ...], target: bytes) -> bool:
+    return ARC4.new(IV + PREFIX + bytes(suffix)).encrypt(b"\x00" * len(target)) == target
+
+def _check(suffix: tuple[int, ...]) -> bool:
+    return per_candidate(suffix, TARGET)
+
+def rate(label: str, keys: int, seconds: float, total: int):
+    print(f"  {label:<32} {keys / seconds:>12,.0f} keys/s  (full keyspace {total / (keys / seconds) / 60:7.1f} min)")
+
+def main():
+    global TARGET
+    parser = argparse.ArgumentParser(description="RC4 key search throughput")
+    parser.add_argument('--keys', type=int, default=200000, help='keys per single-process measurement')
+    parser.add_argument('--workers', type=int, default=mp.cpu_count())
+    args = parser.parse_args()
+
+    keyspace = Keyspace(CHARS, 5, prefix=PREFIX)
+    secret: bytes = keyspace[SECRET_INDEX]
+    TARGET = ARC4.new(IV + secret).encrypt(b"\x00" * 47)
+    engine = KeySearch(IV, keyspace, TARGET)
+    print(f"keyspace {engine.size:,} suffixes, planted key at index {SECRET_INDEX:,} ({secret.decode()})")
+
+    start: float = time.perf_counter()
+    for suffix in itertools.islice(itertools.product(CHARS, repeat=5), args.keys):
+        per_candidate(suffix, TARGET)
+    rate('ARC4.new loop, 1 process', args.keys, time.perf_counter() - start, engine.size)
+
+    start = time.perf_counter()
+    with mp.Pool(args.workers) as pool:
+        for _ in pool.imap_unordered(_check, itertools.islice(itertools.product(CHARS, repeat=5), args.keys), chunksize=1000):
+            pass
+    rate(f'ARC4.new imap_unordered, {args.workers} proc', args.keys, time.perf_counter() - start, engine.size)
+
+    start = time.perf_counter()
+    engine.search_range(0, args.keys)
+    rate('batched RC4, 1 process', args.keys, time.perf_counter() - start, engine.size)
+
+    start = time.perf_counter()
+    found = search(engine, args.workers, stop=SECRET_INDEX + 1, progress=False)
+    rate(f'batched RC4 search, {args.workers} proc', SECRET_INDEX + 1, time.perf_counter() - start, engine.size)
+    assert found == secret, found
+    print(f"  found planted key {found.decode()}")
+
+if __name__ == "__main__":
+    main()
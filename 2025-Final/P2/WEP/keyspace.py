@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+import json
+import multiprocessing as mp
+import os
+import time
+from bisect import bisect_right
+from typing import Any, Callable, Iterator, Optional, Union
+import numpy as np
+
+# ---------------------------
+# Keyspace enumeration with index-range sharding and checkpoints
+# ---------------------------
+# A Keyspace numbers every candidate, so a search is just a set of integer
+# ranges: any index maps to its candidate in O(length), workers receive
+# (start, stop) pairs, and a checkpoint only has to remember which ranges
+# are done. Candidates of one length follow itertools.product order (last
+# position changes fastest); shorter lengths come first.
+
+SHARD = 1 << 20 # indexes per worker task
+
+# hashcat-style mask charsets
+MASK_CHARSETS: dict[str, bytes] = {
+    'l': b'abcdefghijklmnopqrstuvwxyz',
+    'u': b'ABCDEFGHIJKLMNOPQRSTUVWXYZ',
+    'd': b'0123456789',
+    'h': b'0123456789abcdef',
+    'H': b'0123456789ABCDEF',
+    's': b' !"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~',
+}
+MASK_CHARSETS['a'] = MASK_CHARSETS['l'] + MASK_CHARSETS['u'] + MASK_CHARSETS['d'] + MASK_CHARSETS['s']
+
+Text = Union[str, bytes]
+
+def _bytes(text: Text) -> bytes:
+    return text.encode() if isinstance(text, str) else text
+
+class Keyspace:
+    """
+    Candidates prefix + <length chars of charset> + suffix for every length
+    in `lengths`, or any hashcat-style mask via Keyspace.from_mask().
+      - len(ks), ks[index]    : size and index -> candidate (bytes)
+      - ks.index(candidate)   : the inverse
+      - ks.iter_range(lo, hi) : candidates lo..hi-1, odometer-style
+      - ks.array(lo, hi)      : the same as a uint8 [n, width] array (one length)
+      - ks.split(lo, hi)      : cut a range at length boundaries
+    """
+
+    def __init__(self, charset: Text, lengths: Union[int, range], prefix: Text = b'', suffix: Text = b''):
+        if isinstance(lengths, int):
+            lengths = range(lengths, lengths + 1)
+        charset, prefix, suffix = _bytes(charset), _bytes(prefix), _bytes(suffix)
+        fixed: Callable[[bytes], list[bytes]] = lambda text: [bytes([c]) for c in text]
+        self._setup(
+            [fixed(prefix) + [charset] * n + fixed(suffix) for n in lengths],
+            f"{prefix!r}+{charset!r}{{{lengths.start},{lengths.stop - 1}}}+{suffix!r}"
+        )
+
+    @classmethod
+    def from_mask(cls, mask: str, custom: Optional[dict[str, Text]] = None) -> 'Keyspace':
+        """
+        ?l ?u ?d ?h ?H ?s ?a as in hashcat, ?1..?9 from `custom`, ?? for a
+        literal '?', any other character stands for itself.
+        e.g. Keyspace.from_mask('nasa2025?l?l?l?d?d').
+        """
+        charsets: dict[str, bytes] = {**MASK_CHARSETS, **{k: _bytes(v) for k, v in (custom or {}).items()}}
+        layout: list[bytes] = []
+        pos: int = 0
+        while pos < len(mask):
+            if mask[pos] == '?' and pos + 1 < len(mask):
+                name: str = mask[pos + 1]
+                layout.append(b'?' if name == '?' else charsets[name])
+                pos += 2
+            else:
+                layout.append(mask[pos].encode())
+                pos += 1
+        keyspace: Keyspace = cls.__new__(cls)
+        keyspace._setup([layout], f"mask {mask!r} {custom!r}")
+        return keyspace
+
+    def _setup(self, layouts: list[list[bytes]], description: str):
+        self.layouts: list[list[bytes]] = layouts
+        self.description: str = description
+        self.offsets: list[int] = [] # index of the first candidate of each layout
+        total: int = 0
+        for layout in layouts:
+            self.offsets.append(total)
+            size: int = 1
+            for chars in layout:
+                size *= len(chars)
+            total += size
+        self.size: int = total
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        if not 0 <= index < self.size:
+            raise IndexError("keyspace index out of range")
+        bucket: int = bisect_right(self.offsets, index) - 1
+        return bucket, index - self.offsets[bucket]
+
+    def __getitem__(self, index: int) -> bytes:
+        bucket, index = self._locate(index)
+        layout: list[bytes] = self.layouts[bucket]
+        out = bytearray(len(layout))
+        for pos in range(len(layout) - 1, -1, -1):
+            index, digit = divmod(index, len(layout[pos]))
+            out[pos] = layout[pos][digit]
+        return bytes(out)
+
+    def index(self, candidate: Text) -> int:
+        candidate = _bytes(candidate)
+        for bucket, layout in enumerate(self.layouts):
+            if len(layout) != len(candidate):
+                continue
+            index: int = 0
+            for chars, c in zip(layout, candidate):
+                digit: int = chars.find(c)
+                if digit < 0:
+                    break
+                index = index * len(chars) + digit
+            else:
+                return self.offsets[bucket] + index
+        raise ValueError(f"{candidate!r} is not in the keyspace")
+
+    def split(self, start: int, stop: int) -> list[tuple[int, int]]:
+        """
+        [start, stop) cut into sub-ranges that each hold a single length.
+        """
+        bounds: list[int] = self.offsets[1:] + [self.size]
+        ranges: list[tuple[int, int]] = []
+        for first, end in zip(self.offsets, bounds):
+            low, high = max(start, first), min(stop, end)
+            if low < high:
+                ranges.append((low, high))
+        return ranges
+
+    def iter_range(self, start: int, stop: int) -> Iterator[bytes]:
+        """
+        Candidates start..stop-1; after the first one each step only bumps
+        the last digits like an odometer.
+        """
+        for low, high in self.split(start, stop):
+            bucket, index = self._locate(low)
+            layout: list[bytes] = self.layouts[bucket]
+            digits: list[int] = [0] * len(layout)
+            for pos in range(len(layout) - 1, -1, -1):
+                index, digits[pos] = divmod(index, len(layout[pos]))
+            out = bytearray(layout[pos][d] for pos, d in enumerate(digits))
+            last: int = len(layout) - 1
+            for _ in range(high - low):
+                yield bytes(out)
+                pos = last
+                while pos >= 0:
+                    digits[pos] += 1
+                    if digits[pos] < len(layout[pos]):
+                        out[pos] = layout[pos][digits[pos]]
+                        break
+                    digits[pos] = 0
+                    out[pos] = layout[pos][0]
+                    pos -= 1
+
+    def array(self, start: int, stop: int) -> np.ndarray:
+        """
+        Candidates start..stop-1 (all of one length) as uint8 [stop - start, length].
+        """
+        bucket, index = self._locate(start)
+        if stop > (self.offsets[bucket + 1] if bucket + 1 < len(self.offsets) else self.size):
+            raise ValueError("array() range spans several lengths; use split() first")
+        layout: list[bytes] = self.layouts[bucket]
+        out = np.empty((stop - start, len(layout)), dtype=np.uint8)
+        indexes = np.arange(index, index + stop - start, dtype=np.int64)
+        for pos in range(len(layout) - 1, -1, -1):
+            chars = np.frombuffer(layout[pos], dtype=np.uint8)
+            out[:, pos] = chars[indexes % len(chars)]
+            indexes //= len(chars)
+        return out
+
+    def shards(self, start: int = 0, stop: Optional[int] = None, shard: int = SHARD) -> Iterator[tuple[int, int]]:
+        stop = self.size if stop is None else stop
+        for low in range(start, stop, shard):
+            yield low, min(low + shard, stop)
+
+# ---------------------------
+# Checkpoints
+# ---------------------------
+class Checkpoint:
+    """
+    Completed index ranges of one keyspace, saved as JSON to `path`
+    (atomically, at most every `interval` seconds) so a search can resume.
+    """
+
+    def __init__(self, path: str, keyspace: Keyspace, interval: float = 30.0):
+        self.path: str = path
+        self.description: str = keyspace.description
+        self.interval: float = interval
+        self.done: list[list[int]] = [] # sorted, merged [start, stop) ranges
+        self.saved: float = time.time()
+        if os.path.exists(path):
+            with open(path) as f:
+                state: dict[str, Any] = json.load(f)
+            if state['keyspace'] != self.description:
+                raise ValueError(f"{path} belongs to another keyspace: {state['keyspace']}")
+            self.done = state['done']
+
+    def covered(self) -> int:
+        return sum(stop - start for start, stop in self.done)
+
+    def mark(self, start: int, stop: int):
+        merged: list[list[int]] = []
+        for low, high in sorted(self.done + [[start, stop]]):
+            if merged and low <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], high)
+            else:
+                merged.append([low, high])
+        self.done = merged
+        if time.time() - self.saved >= self.interval:
+            self.save()
+
+    def pending(self, start: int, stop: int, shard: int) -> Iterator[tuple[int, int]]:
+        """
+        Shards of [start, stop) that are not done yet.
+        """
+        position: int = start
+        for low, high in self.done + [[stop, stop]]:
+            for shard_low in range(position, min(low, stop), shard):
+                yield shard_low, min(shard_low + shard, low, stop)
+            position = max(position, high)
+            if position >= stop:
+                return
+
+    def save(self):
+        tmp: str = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'keyspace': self.description, 'done': self.done}, f)
+        os.replace(tmp, self.path)
+        self.saved = time.time()
+
+# ---------------------------
+# Multi-process driver
+# ---------------------------
+_task: Optional[Callable[[int, int], Any]] = None
+
+def _init_worker(task: Callable[[int, int], Any]):
+    global _task
+    _task = task
+
+def _run_shard(bounds: tuple[int, int]) -> tuple[Any, int, int]:
+    start, stop = bounds
+    return _task(start, stop), start, stop # type: ignore[misc]
+
+def run(
+    task: Callable[[int, int], Any],
+    keyspace: Keyspace,
+    workers: int = mp.cpu_count(),
+    start: int = 0,
+    stop: Optional[int] = None,
+    shard: int = SHARD,
+    checkpoint: Optional[str] = None,
+    interval: float = 30.0,
+    progress: bool = True,
+) -> Any:
+    """
+    Call task(lo, hi) on every shard of [start, stop) of the keyspace in a
+    pool of workers (the task is sent once per worker, then only integers)
+    and return the first non-None result, stopping all workers.
+    With `checkpoint`, finished shards are recorded in that file and skipped
+    when the same search runs again; Ctrl-C saves it before exiting.
+    """
+    stop = keyspace.size if stop is None else stop
+    state: Optional[Checkpoint] = Checkpoint(checkpoint, keyspace, interval) if checkpoint else None
+    shards: Iterator[tuple[int, int]] = state.pending(start, stop, shard) if state else keyspace.shards(start, stop, shard)
+    skipped: int = state.covered() if state else 0
+    if progress and skipped:
+        print(f"resuming from {checkpoint}: {skipped:,} keys already searched")
+
+    tried: int = 0
+    found: Any = None
+    began: float = time.time()
+    try:
+        with mp.Pool(workers, initializer=_init_worker, initargs=(task,)) as pool:
+            for result, low, high in pool.imap_unordered(_run_shard, shards):
+                tried += high - low
+                if state and result is None: # a shard with a hit stays pending so a rerun finds it again
+                    state.mark(low, high)
+                if progress:
+                    rate: float = tried / max(time.time() - began, 1e-9)
+                    print(f"\r{skipped + tried:,}/{stop - start:,} keys, {rate:,.0f} keys/s", end='', flush=True)
+                if result is not None:
+                    found = result
+                    pool.terminate()
+                    break
+    finally:
+        if progress:
+            print()
+        if state:
+            state.save()
+    return found
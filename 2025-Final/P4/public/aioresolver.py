@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+import asyncio
+import random
+import time
+from typing import Any, Callable, Optional
+from dnscache import DNSCache, CacheStore
+from utils import (
+    RecordType,
+    ResponseCode,
+    build_query_packet,
+    parse_response_packet
+)
+
+# ---------------------------
+# asyncio mode of the FATCAT DNS (server-a.py / server-b.py --async)
+# ---------------------------
+# Same cache and response validation as process_query, but upstream queries
+# go through a pool of long-lived UDP sockets and many TCP clients are served
+# concurrently instead of one query at a time from input().
+
+PendingKey = tuple[int, int, str, RecordType] # (tid, source port, domain, qtype)
+Output = Callable[[str], None]
+
+class _UpstreamProtocol(asyncio.DatagramProtocol):
+    """
+    One long-lived upstream UDP socket; every datagram is matched against the
+    outstanding queries sent from this socket's port.
+    """
+
+    def __init__(self, resolver: 'AsyncResolver'):
+        self.resolver = resolver
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.port: int = 0
+        self.received_at: float = 0.0 # loop time of the last datagram that answered no query
+
+    def connection_made(self, transport: asyncio.BaseTransport):
+        self.transport = transport # type: ignore[assignment]
+        self.port = transport.get_extra_info('sockname')[1]
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]):
+        if not self.resolver.deliver(self.port, data):
+            self.received_at = asyncio.get_running_loop().time()
+
+    def error_received(self, exc: Exception):
+        pass # ICMP errors for earlier queries; the query itself times out
+
+
+class AsyncResolver:
+    """
+    Resolve queries against `cache` (the server's DNSCache) exactly like
+    process_query, with outstanding queries tracked in
+    self.pending[(tid, port, domain, qtype)] -> Future of the parsed response.
+    Concurrent misses for the same (domain, qtype) are coalesced into one
+    upstream query (see self.inflight / self.coalesced).
+    """
+
+    def __init__(
+        self,
+        cache: DNSCache,
+        max_tid: int,
+        flag: str,
+        default_resolver: str,
+        timeout: float,
+        pool_size: int = 16,
+        log_tid: bool = False,
+    ):
+        self.cache = cache
+        self.max_tid: int = max_tid
+        self.flag: str = flag
+        self.default_resolver: str = default_resolver
+        self.timeout: float = timeout
+        self.pool_size: int = pool_size
+        self.log_tid: bool = log_tid # print each query's transaction id (for rng-audit.py)
+        self.upstreams: list[_UpstreamProtocol] = []
+        self.pending: dict[PendingKey, asyncio.Future] = {}
+        self.listeners: dict[int, list[Output]] = {} # port -> outputs of queries waiting on it
+
+        # cache misses for the same (domain, qtype) share one upstream query:
+        # followers wait on the leader's future and replay its output lines
+        self.inflight: dict[tuple[str, RecordType], asyncio.Future] = {}
+        self.upstream_queries: int = 0
+        self.coalesced: int = 0
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        for _ in range(self.pool_size):
+            _, protocol = await loop.create_datagram_endpoint(
+                lambda: _UpstreamProtocol(self), local_addr=("0.0.0.0", 0))
+            self.upstreams.append(protocol)
+
+    def close(self):
+        for upstream in self.upstreams:
+            if upstream.transport is not None:
+                upstream.transport.close()
+        self.upstreams.clear()
+
+    # --- upstream responses ---
+    def deliver(self, port: int, packet: bytes) -> bool:
+        """
+        Hand a datagram to the query waiting for it; False if it matches none.
+        """
+        # in practice dns servers verify the source ip and port of the response to detect spoofed responses
+        # but for simplicity, we do not check these information here
+        try:
+            response: dict[str, Any] = parse_response_packet(packet)
+        except Exception:
+            self._warn(port)
+            return False
+
+        future = self.pending.get((response['tid'], port, response['domain'], response['qtype']))
+        if future is None or future.done():
+            self._warn(port)
+            return False
+        future.set_result(response)
+        return True
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'upstream_queries': self.upstream_queries,
+            'coalesced': self.coalesced,
+            'inflight': len(self.inflight),
+            **self.cache.stats()
+        }
+
+    def _warn(self, port: int):
+        for out in self.listeners.get(port, ()):
+            out('WARNING: Received an invalid response packet')
+
+    # --- cache ---
+    def cleanup_cache(self):
+        """
+        Flush expired cache entries.
+        """
+        self.cache.expire()
+
+    # --- queries ---
+    async def process_query(self, domain: str, qtype: RecordType, out: Output):
+        """
+        Process a DNS query:
+         - If the domain is cached (and TTL valid), return the cached result.
+         - Otherwise, send a DNS query through the upstream pool.
+        """
+        cache = self.cache
+
+        # --- check if cache hits ---
+        self.cleanup_cache()
+        entry: Optional[dict[str, Any]] = cache.lookup((domain, qtype))
+        if entry is not None:
+            # --- cache hit ---
+            ttl: int = entry['expiry'] - int(time.time())
+            if entry['data'] is None:
+                out(f"DNS Response: {qtype.name}=NXDOMAIN/NODATA TTL={ttl}")
+            else:
+                out(f"DNS Response: {qtype.name}={entry['data']} TTL={ttl}")
+            return
+
+        # --- cache miss: coalesce with an identical query already in flight ---
+        leader: Optional[asyncio.Future] = self.inflight.get((domain, qtype))
+        if leader is not None:
+            self.coalesced += 1
+            try:
+                lines: list[str] = await asyncio.shield(leader)
+            except asyncio.CancelledError:
+                if not leader.cancelled():
+                    raise # this client went away, not the leader
+                # the leader failed or was cancelled: resolve it ourselves
+                # (the first follower to get here becomes the new leader)
+                await self.process_query(domain, qtype, out)
+                return
+            for line in lines:
+                out(line)
+            return
+
+        leader = asyncio.get_running_loop().create_future()
+        self.inflight[(domain, qtype)] = leader
+        lines = []
+
+        def record(line: str):
+            lines.append(line)
+            out(line)
+
+        try:
+            await self._resolve(domain, qtype, record)
+        except BaseException:
+            leader.cancel()
+            raise
+        else:
+            leader.set_result(lines)
+        finally:
+            del self.inflight[(domain, qtype)]
+
+    async def _resolve(self, domain: str, qtype: RecordType, out: Output):
+        """
+        Send the upstream query for a cache miss and store the answer.
+        """
+        cache = self.cache
+        self.upstream_queries += 1
+
+        # --- determine the apex (parent) domain and the resolver to query ---
+        apex_domain: Optional[str] = domain.split('.', maxsplit=1)[-1]
+        if apex_domain == "" or apex_domain == domain:
+            apex_domain = None
+        # the deepest cached nameserver among the parent domains (longest-suffix match)
+        delegation: Optional[tuple[str, str]] = cache.find_delegation(domain)
+        if delegation is not None:
+            next_resolver: str = delegation[1]
+        else:
+            next_resolver = self.default_resolver # resort to the default resolver
+
+        # --- pick an upstream socket and a transaction id not already in flight on it ---
+        upstream: _UpstreamProtocol = random.choice(self.upstreams)
+        listening_port: int = upstream.port
+        out(f"Querying for the {qtype.name} record for domain {domain} on source port {listening_port} ...")
+
+        transaction_id: int = random.randint(0, self.max_tid)
+        while (transaction_id, listening_port, domain, qtype) in self.pending:
+            transaction_id = random.randint(0, self.max_tid)
+        key: PendingKey = (transaction_id, listening_port, domain, qtype)
+        if self.log_tid:
+            out(f"Transaction ID {transaction_id} on source port {listening_port}")
+
+        query_packet: bytes = build_query_packet(
+            tid=transaction_id,
+            domain=domain,
+            qtype=qtype
+        )
+
+        # --- wait for response ---
+        # as with the blocking socket's timeout in process_query, the query only
+        # times out after `timeout` seconds without a datagram on its port; answers
+        # to other queries sharing the socket never reached the old per-query socket
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self.pending[key] = future
+        self.listeners.setdefault(listening_port, []).append(out)
+        try:
+            upstream.transport.sendto(query_packet, (next_resolver, 53053)) # type: ignore[union-attr]
+            sent_at: float = loop.time()
+            while True:
+                idle_since: float = max(sent_at, upstream.received_at)
+                try:
+                    response: dict[str, Any] = await asyncio.wait_for(
+                        asyncio.shield(future), idle_since + self.timeout - loop.time())
+                    break
+                except asyncio.TimeoutError:
+                    if upstream.received_at <= idle_since: # nothing arrived while waiting
+                        out("DNS query TIMEOUT")
+                        return
+        finally:
+            del self.pending[key]
+            outputs: list[Output] = self.listeners[listening_port]
+            outputs.remove(out)
+            if not outputs:
+                del self.listeners[listening_port]
+
+        answer: str = response['answer']
+        ttl: int = response['ttl']
+        auth_ip: Optional[str] = response['auth_ip']
+
+        # -- queried domain is non-existent (NXDOMAIN response)
+        #    OR there is no record of the queried type (NODATA) --
+        if response['rcode'] != ResponseCode.NOERROR:
+            cache[(domain, qtype)] = {
+                'data':    None,
+                'expiry':  int(time.time()) + ttl
+            }
+            out(f"DNS Response: {qtype.name}=NXDOMAIN/NODATA TTL={ttl}")
+            return
+
+        # -- return the flag if the A record of TARGET_DOMAIN in cache
+        #    is poisoned with ATTACKER_CONTROLLED_IP ---
+        if domain == 'www.google.com' and qtype == RecordType.A and answer == '11.4.5.14':
+            out(f'Cache polluted successfully! Flag: {self.flag}')
+
+        cache[(domain, qtype)] = {
+            'data':    answer,
+            'expiry':  int(time.time()) + ttl
+        }
+
+        # -- return the response to client --
+        if auth_ip is not None and apex_domain is not None:
+            # might overwrite the existing A record for the authoritative nameserver
+            # but we dont care as we assume auth_ip to be legit
+            cache[(apex_domain, RecordType.A)] = {
+                'data':    auth_ip,
+                'expiry':  int(time.time()) + ttl
+            }
+            out(f"DNS Response: {qtype.name}={answer} Authoritative={auth_ip} TTL={ttl}")
+        else:
+            out(f"DNS Response: {qtype.name}={answer} TTL={ttl}")
+
+    # --- TCP clients ---
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Same dialogue as main(): one "<domain> <record_type>" per line, an
+        empty line ends the session.
+        """
+        def out(line: str):
+            writer.write(line.encode() + b'\n')
+
+        out("------------------------------------------------------")
+        out("| Welcome to the FATCAT DNS                          |")
+        out("| We have the most secure DNS service of the world!  |")
+        out("------------------------------------------------------")
+        try:
+            while True:
+                writer.write(b'Provide a query in the form "<domain> <record_type>": ')
+                await writer.drain()
+                query: str = (await reader.readline()).decode(errors='replace').strip()
+                if not query:
+                    break
+
+                parts: list[str] = query.split()
+                if len(parts) != 2:
+                    out('Invalid input!')
+                    continue
+
+                domain: str = parts[0].rstrip('.')
+                try:
+                    qtype = RecordType[parts[1].upper()]
+                except KeyError:
+                    out('Unknown record type')
+                    continue
+
+                await self.process_query(domain, qtype, out)
+
+            out('No input. Goodbye!')
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def _snapshot_periodically(resolver: AsyncResolver, store: CacheStore):
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(store.interval)
+        if not store.needs_compaction():
+            continue
+        # copy + log rotation on the loop, file write and fsync off it
+        items = store.rotate(resolver.cache)
+        await loop.run_in_executor(None, store.write_snapshot, items)
+
+async def serve(resolver: AsyncResolver, host: str, port: int, store: Optional[CacheStore] = None):
+    """
+    Serve TCP clients on host:port until cancelled. With a CacheStore, every
+    store.interval seconds the log is compacted into a new snapshot once it
+    has grown enough (CacheStore.needs_compaction).
+    """
+    await resolver.open()
+    server = await asyncio.start_server(resolver.handle_client, host, port)
+    print(f"FATCAT DNS (asyncio) listening on {host}:{port} "
+          f"with {resolver.pool_size} upstream sockets")
+    snapshots: Optional[asyncio.Task] = None
+    if store is not None:
+        snapshots = asyncio.create_task(_snapshot_periodically(resolver, store))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if snapshots is not None:
+            snapshots.cancel()
+        resolver.close()
+        print(f"FATCAT DNS (asyncio) stopped: {resolver.stats()}")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import random
+import time
+from typing import Any
+from dnscache import DNSCache
+from utils import RecordType
+
+# ---------------------------
+# Per-query cache cost: old dict + full-scan cleanup_cache vs DNSCache
+# ---------------------------
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUERIES = 20_000    # DNSCache queries per size
+OLD_QUERIES = 20    # the full scan is slow, a few queries are enough
+
+def fill(cache: Any, size: int, now: int):
+    for i in range(size):
+        cache[(f'host{i}.fatcat.net', RecordType.A)] = {
+            'data': '4.8.7.63',
+            'expiry': now + random.randint(60, 86400)
+        }
+
+def old_query(cache: dict, key: Any):
+    # cleanup_cache() + cache lookup as in the original server-a.py
+    now = int(time.time())
+    expired: list[Any] = [k for k, entry in cache.items() if entry["expiry"] <= now]
+    for k in expired:
+        del cache[k]
+    if key in cache:
+        return cache[key]
+    return None
+
+def new_query(cache: DNSCache, key: Any):
+    cache.expire()
+    return cache.lookup(key)
+
+def per_query(func, cache: Any, size: int, count: int) -> float:
+    keys = [(f'host{random.randrange(size * 2)}.fatcat.net', RecordType.A) for _ in range(count)]
+    start: float = time.perf_counter()
+    for key in keys:
+        func(cache, key)
+    return (time.perf_counter() - start) / count
+
+def main():
+    now: int = int(time.time())
+    print(f"{'entries':>10} {'dict+scan':>14} {'DNSCache':>14} {'speedup':>10}")
+    for size in SIZES:
+        old: dict = {}
+        fill(old, size, now)
+        old_cost: float = per_query(old_query, old, size, OLD_QUERIES)
+        del old
+
+        new = DNSCache(max_size=size)
+        fill(new, size, now)
+        new_cost: float = per_query(new_query, new, size, QUERIES)
+        print(f"{size:>10} {old_cost * 1e6:>11.1f} us {new_cost * 1e6:>11.2f} us {old_cost / new_cost:>9.0f}x")
+
+    # eviction and expiry under churn at 1M entries
+    cache = DNSCache(max_size=SIZES[-1])
+    fill(cache, SIZES[-1], now)
+    start: float = time.perf_counter()
+    for i in range(QUERIES):
+        cache[(f'new{i}.fatcat.net', RecordType.TXT)] = {'data': 'x', 'expiry': int(time.time()) + 3600}
+        new_query(cache, (f'host{i}.fatcat.net', RecordType.A))
+    print(f"insert+query at {SIZES[-1]} entries: "
+          f"{(time.perf_counter() - start) / QUERIES * 1e6:.2f} us/op, stats {cache.stats()}")
+
+if __name__ == "__main__":
+    main()
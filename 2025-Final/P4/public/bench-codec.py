@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+import timeit
+import random
+import time
+from typing import Any
+from utils import (
+    RecordType,
+    ResponseCode,
+    build_response_packet,
+    parse_response_packet,
+    pack_response,
+    pack_response_into,
+    parse_response_batch,
+    response_packet_size,
+    unpack_response
+)
+
+# ---------------------------
+# Benchmark cases: (tid, domain, qtype, rcode, answer, ttl, auth_ip)
+# ---------------------------
+CASES: dict[str, tuple[Any, ...]] = {
+    'A+auth':   (4242, 'www.google.com', RecordType.A, ResponseCode.NOERROR, '11.4.5.14', 600, '19.19.8.10'),
+    'A':        (17, 'fatcat.net', RecordType.A, ResponseCode.NOERROR, '4.8.7.63', 86400, None),
+    'TXT':      (65535, 'nasa.csie.org', RecordType.TXT, ResponseCode.NOERROR, 'x' * 200, 3600, None),
+    'NXDOMAIN': (0, 'nope.fatcat.net', RecordType.A, ResponseCode.NXDOMAIN, '', 60, '19.19.8.10'),
+}
+NUMBER = 100000
+BATCH = 200000  # packets in the batch-parser benchmark
+
+def check_compatible():
+    """Every case must build byte-for-byte the same packet and parse to the same dict."""
+    for name, args in CASES.items():
+        reference: bytes = build_response_packet(*args)
+        assert pack_response(*args) == reference, name
+
+        buf = bytearray(3 + response_packet_size(*args[1:5], args[6]))
+        size: int = pack_response_into(buf, 3, *args)
+        assert bytes(buf[3:3 + size]) == reference, name
+
+        assert unpack_response(reference).as_dict() == parse_response_packet(reference), name
+        assert unpack_response(buf, 3, size).as_dict() == parse_response_packet(reference), name
+        assert unpack_response(memoryview(buf), 3, size).as_dict() == parse_response_packet(reference), name
+
+def capture(count: int) -> list[bytes]:
+    """
+    A capture-like mix of the cases with random TIDs, plus ~1% malformed packets
+    (truncated, query bit set, unknown type / rcode, no domain terminator, or a
+    domain that is not UTF-8).
+    """
+    rng = random.Random(0)
+    cases: list[tuple[Any, ...]] = list(CASES.values())
+    packets: list[bytes] = []
+    for _ in range(count):
+        args = rng.choice(cases)
+        packet: bytes = build_response_packet(rng.randrange(65536), *args[1:])
+        if rng.random() < 0.01:
+            broken: int = rng.randrange(5)
+            if broken == 0:
+                packet = packet[:rng.randrange(len(packet))]
+            elif broken == 1:
+                packet = packet[:2] + bytes([packet[2] & 0x7F]) + packet[3:]
+            elif broken == 2:
+                packet = packet[:2] + bytes([packet[2] | 0x7F]) + packet[3:]
+            elif broken == 3:
+                packet = packet[:3] + b'\xff' * (len(packet) - 3)
+            else:
+                packet = packet[:3] + b'\xff' + packet[4:]
+        packets.append(packet)
+    return packets
+
+def check_batch(packets: list[bytes]):
+    """The batch parser must flag exactly the packets parse_response_packet rejects."""
+    batch = parse_response_batch(packets)
+    for i, packet in enumerate(packets):
+        try:
+            expected = parse_response_packet(packet)
+        except ValueError:
+            assert not batch.valid[i], (i, packet)
+            continue
+        assert batch.valid[i] and batch.as_dict(i) == expected, (i, packet)
+
+def bench_batch():
+    packets: list[bytes] = capture(BATCH)
+    check_batch(packets)
+    data: bytes = b''.join(packets)
+    offsets: list[int] = []
+    pos: int = 0
+    for packet in packets:
+        offsets.append(pos)
+        pos += len(packet)
+
+    def per_packet():
+        for packet in packets:
+            try:
+                parse_response_packet(packet)
+            except ValueError:
+                pass
+
+    def best(func) -> float:
+        times: list[float] = []
+        for _ in range(3):
+            start: float = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    old: float = best(per_packet)
+    from_list: float = best(lambda: parse_response_batch(packets))
+    from_buffer: float = best(lambda: parse_response_batch(data, offsets))
+    batch = parse_response_batch(packets)
+
+    print(f"[batch] {BATCH} packets, {BATCH - int(batch.valid.sum())} malformed, results identical")
+    print(f"  {'parse_response_packet loop':<28} {old / BATCH * 1e9:8.0f} ns/packet")
+    print(f"  {'parse_response_batch(list)':<28} {from_list / BATCH * 1e9:8.0f} ns/packet  x{old / from_list:.1f}")
+    print(f"  {'parse_response_batch(buf)':<28} {from_buffer / BATCH * 1e9:8.0f} ns/packet  x{old / from_buffer:.1f}")
+
+def bench(label: str, func) -> float:
+    seconds: float = min(timeit.repeat(func, number=NUMBER, repeat=3))
+    print(f"  {label:<28} {seconds / NUMBER * 1e9:8.0f} ns/op")
+    return seconds
+
+def main():
+    check_compatible()
+    print(f"All {len(CASES)} cases byte-for-byte compatible, {NUMBER} iterations each\n")
+
+    for name, args in CASES.items():
+        packet: bytes = build_response_packet(*args)
+        buf = bytearray(len(packet))
+        print(f"[{name}] {len(packet)} bytes")
+
+        old_build = bench('build_response_packet', lambda: build_response_packet(*args))
+        new_build = bench('pack_response_into', lambda: pack_response_into(buf, 0, *args))
+        old_parse = bench('parse_response_packet', lambda: parse_response_packet(packet))
+        new_parse = bench('unpack_response', lambda: unpack_response(packet))
+        print(f"  speedup: build x{old_build / new_build:.2f}, parse x{old_parse / new_parse:.2f}\n")
+
+    bench_batch()
+
+if __name__ == "__main__":
+    main()
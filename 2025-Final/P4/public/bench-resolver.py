@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import json
+import random
+import time
+import zlib
+from itertools import accumulate
+from typing import Any, Optional
+from aioresolver import AsyncResolver
+from dnscache import DNSCache
+from utils import RecordType, ResponseCode, pack_response, parse_query_packet
+
+# ---------------------------
+# Load generator and latency benchmark for the FATCAT DNS
+# ---------------------------
+# A stand-in authoritative server answers on 127.0.0.1:53053 (the port the
+# resolver always queries) and many TCP clients send a Zipf-distributed
+# workload. By default the resolver runs in-process (AsyncResolver, as in
+# server-a.py --async); with --server the clients drive an external one
+# started as e.g.  python3 server-a.py --async --resolver 127.0.0.1
+AUTH_PORT = 53053
+NX_PREFIX = 'nx'  # the stand-in answers NXDOMAIN for names starting with this
+
+# ---------------------------
+# Stand-in authoritative server
+# ---------------------------
+class AuthServer(asyncio.DatagramProtocol):
+    """
+    Answer every query: A -> an address derived from the name, TXT -> the
+    name itself, NXDOMAIN for NX_PREFIX names. Each answer is delayed by
+    delay (+ uniform jitter) seconds and dropped with probability loss.
+    """
+
+    def __init__(self, ttl: int, delay: float, jitter: float, loss: float, auth_ip: Optional[str]):
+        self.ttl: int = ttl
+        self.delay: float = delay
+        self.jitter: float = jitter
+        self.loss: float = loss
+        self.auth_ip: Optional[str] = auth_ip
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.received: int = 0
+        self.dropped: int = 0
+
+    def connection_made(self, transport: asyncio.BaseTransport):
+        self.transport = transport # type: ignore[assignment]
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]):
+        self.received += 1
+        try:
+            query: dict[str, Any] = parse_query_packet(data)
+        except ValueError:
+            return
+        if random.random() < self.loss:
+            self.dropped += 1
+            return
+
+        domain: str = query['domain']
+        qtype: RecordType = query['qtype']
+        if domain.startswith(NX_PREFIX):
+            rcode, answer = ResponseCode.NXDOMAIN, ''
+        elif qtype == RecordType.A:
+            h: int = zlib.crc32(domain.encode()) & 0xFFFFFF # stable across runs, unlike hash()
+            rcode, answer = ResponseCode.NOERROR, f'10.{h >> 16}.{(h >> 8) & 0xFF}.{h & 0xFF}'
+        else:
+            rcode, answer = ResponseCode.NOERROR, domain[:255]
+        packet: bytes = pack_response(query['tid'], domain, qtype, rcode, answer, self.ttl, self.auth_ip)
+
+        delay: float = self.delay + random.uniform(0, self.jitter)
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self.transport.sendto, packet, addr) # type: ignore[union-attr]
+        else:
+            self.transport.sendto(packet, addr) # type: ignore[union-attr]
+
+# ---------------------------
+# Workload
+# ---------------------------
+def zipf_workload(domains: int, skew: float, nx: float, txt: float, count: int, seed: int) -> list[str]:
+    """
+    `count` query lines over `domains` names where the name of rank i is
+    drawn with probability proportional to 1 / i^skew; a fraction nx of the
+    names do not exist and a fraction txt of the queries ask for TXT.
+    """
+    rng = random.Random(seed)
+    names: list[str] = [f"{NX_PREFIX if rng.random() < nx else 'h'}{i}.bench.fatcat" for i in range(domains)]
+    weights: list[float] = list(accumulate(1 / (i + 1) ** skew for i in range(domains)))
+    picks: list[str] = rng.choices(names, cum_weights=weights, k=count)
+    return [f"{name} {'TXT' if rng.random() < txt else 'A'}" for name in picks]
+
+# ---------------------------
+# Clients
+# ---------------------------
+class Results:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.hits: int = 0
+        self.timeouts: int = 0
+        self.errors: int = 0
+
+async def client(host: str, port: int, queries: list[str], results: Results):
+    """
+    One TCP session: send each query and wait for its final line. A query
+    whose output has no "Querying ..." line was answered from the cache
+    (with --server only: a query coalesced with one already in flight
+    replays its "Querying ..." line, so it looks like a miss here).
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for query in queries:
+            start: float = time.perf_counter()
+            writer.write(query.encode() + b'\n')
+            upstream: bool = False
+            while True:
+                line: str = (await reader.readline()).decode(errors='replace')
+                if not line:
+                    results.errors += 1
+                    return
+                if 'Querying' in line:
+                    upstream = True
+                elif 'TIMEOUT' in line:
+                    results.timeouts += 1
+                    break
+                elif 'DNS Response' in line:
+                    break
+                elif 'Invalid input' in line or 'Unknown record type' in line:
+                    results.errors += 1
+                    break
+            results.latencies.append(time.perf_counter() - start)
+            if not upstream:
+                results.hits += 1
+        writer.write(b'\n')
+        await writer.drain()
+    finally:
+        writer.close()
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    q-th percentile of sorted values (nearest rank).
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    _, auth = await loop.create_datagram_endpoint(
+        lambda: AuthServer(args.ttl, args.delay, args.jitter, args.loss, args.auth_ip),
+        local_addr=('127.0.0.1', AUTH_PORT))
+
+    resolver: Optional[AsyncResolver] = None
+    server: Optional[asyncio.AbstractServer] = None
+    if args.server:
+        host, _, port = args.server.rpartition(':')
+        target: tuple[str, int] = (host, int(port))
+    else:
+        resolver = AsyncResolver(
+            cache=DNSCache(args.cache_size),
+            max_tid=args.max_tid,
+            flag='FLAG{bench}',
+            default_resolver='127.0.0.1',
+            timeout=args.timeout,
+            pool_size=args.pool_size
+        )
+        await resolver.open()
+        server = await asyncio.start_server(resolver.handle_client, '127.0.0.1', 0)
+        target = server.sockets[0].getsockname()[:2]
+
+    workload: list[str] = zipf_workload(args.domains, args.skew, args.nx, args.txt, args.queries, args.seed)
+    results = Results()
+    start: float = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            client(target[0], target[1], workload[i::args.clients], results)
+            for i in range(args.clients)
+        ))
+    finally:
+        elapsed: float = time.perf_counter() - start
+        auth.transport.close() # type: ignore[union-attr]
+        if server is not None:
+            server.close()
+        if resolver is not None:
+            resolver.close()
+
+    latencies: list[float] = sorted(results.latencies)
+    done: int = len(latencies)
+    report: dict[str, Any] = {
+        'timestamp': int(time.time()),
+        'target': 'in-process' if resolver is not None else args.server,
+        'config': {k: v for k, v in vars(args).items() if k not in ('json', 'server')},
+        'queries': done,
+        'seconds': round(elapsed, 3),
+        'qps': round(done / elapsed, 1) if elapsed > 0 else 0.0,
+        'latency_ms': {
+            'mean': round(sum(latencies) / done * 1e3, 3) if done else 0.0,
+            'p50': round(percentile(latencies, 50) * 1e3, 3),
+            'p90': round(percentile(latencies, 90) * 1e3, 3),
+            'p99': round(percentile(latencies, 99) * 1e3, 3),
+            'max': round(latencies[-1] * 1e3, 3) if done else 0.0
+        },
+        'hit_rate': round(results.hits / done, 4) if done else 0.0,
+        'coalesced_rate': None,
+        'timeouts': results.timeouts,
+        'errors': results.errors,
+        'upstream_packets': auth.received,
+        'upstream_dropped': auth.dropped,
+        'upstream_per_query': round(auth.received / done, 4) if done else 0.0
+    }
+    if resolver is not None:
+        # exact in-process counts: the output lines cannot tell coalesced queries from misses
+        stats: dict[str, int] = resolver.stats()
+        lookups: int = stats['hits'] + stats['misses']
+        report['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        report['coalesced_rate'] = round(stats['coalesced'] / lookups, 4) if lookups else 0.0
+        report['resolver'] = stats
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator and latency benchmark for the FATCAT DNS")
+    parser.add_argument('--server', default=None,
+                        help='host:port of a running server (--async --resolver 127.0.0.1); default: in-process')
+    parser.add_argument('--clients', type=int, default=64, help='concurrent TCP sessions')
+    parser.add_argument('--queries', type=int, default=20000, help='total queries across all clients')
+    parser.add_argument('--domains', type=int, default=10000, help='distinct names in the workload')
+    parser.add_argument('--skew', type=float, default=1.0, help='Zipf exponent (0 = uniform)')
+    parser.add_argument('--nx', type=float, default=0.05, help='fraction of names that do not exist')
+    parser.add_argument('--txt', type=float, default=0.1, help='fraction of TXT queries')
+    parser.add_argument('--ttl', type=int, default=300, help='TTL of the stand-in answers')
+    parser.add_argument('--delay', type=float, default=0.002, help='upstream answer delay in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra uniform upstream delay in seconds')
+    parser.add_argument('--loss', type=float, default=0.0, help='probability the upstream drops a query')
+    parser.add_argument('--auth-ip', default=None, help='authoritative IP to include in answers')
+    parser.add_argument('--timeout', type=float, default=4, help='in-process resolver query timeout')
+    parser.add_argument('--pool-size', type=int, default=16, help='in-process resolver upstream sockets')
+    parser.add_argument('--max-tid', type=int, default=65535, help='in-process resolver TID range')
+    parser.add_argument('--cache-size', type=int, default=1 << 20, help='in-process resolver cache entries')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help="write the report to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    report: dict[str, Any] = asyncio.run(run(args))
+    if args.json == '-':
+        print(json.dumps(report, indent=2))
+        return
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    latency: dict[str, float] = report['latency_ms']
+    print(f"{report['queries']} queries from {args.clients} clients in {report['seconds']:.2f}s "
+          f"({report['target']})")
+    print(f"  QPS            {report['qps']:,.0f}")
+    print(f"  latency (ms)   p50 {latency['p50']:.3f}  p90 {latency['p90']:.3f}  "
+          f"p99 {latency['p99']:.3f}  max {latency['max']:.3f}")
+    print(f"  cache hit rate {report['hit_rate']:.1%}" + (
+        f"  (+{report['coalesced_rate']:.1%} coalesced with a query in flight)"
+        if report['coalesced_rate'] is not None else ''))
+    print(f"  upstream       {report['upstream_packets']} packets "
+          f"({report['upstream_per_query']:.3f}/query, {report['upstream_dropped']} dropped), "
+          f"{report['timeouts']} timeouts, {report['errors']} errors")
+
+if __name__ == "__main__":
+    main()
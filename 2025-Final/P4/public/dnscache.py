@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+import heapq
+import mmap
+import os
+import struct
+import time
+from collections import OrderedDict
+from typing import Any, BinaryIO, Callable, Iterator, Optional
+from utils import RecordType, ResponseCode, pack_response, unpack_response
+
+CacheKey = tuple[str, RecordType]
+CacheEntry = dict[str, Any] # { 'data': <A or TXT record> or None, 'expiry': <timestamp> }
+
+class _TrieNode:
+    __slots__ = ('children', 'name', 'resolver')
+
+    def __init__(self):
+        self.children: dict[str, '_TrieNode'] = {}
+        self.name: Optional[str] = None     # the nameserver's domain, if this node holds one
+        self.resolver: Optional[str] = None # its cached A record
+
+class DelegationIndex:
+    """
+    Reversed-label trie of cached nameserver A records, e.g. the record for
+    "google.com" lives at root -> "com" -> "google".
+    longest_match() walks a query's labels from the TLD down once and returns
+    the deepest cached proper suffix, in O(labels).
+    """
+
+    def __init__(self):
+        self.root: _TrieNode = _TrieNode()
+        self.size: int = 0
+        self.lookups: int = 0
+        self.matches: int = 0
+
+    def insert(self, name: str, resolver: str):
+        node: _TrieNode = self.root
+        for label in reversed(name.split('.')):
+            node = node.children.setdefault(label, _TrieNode())
+        if node.name is None:
+            self.size += 1
+        node.name, node.resolver = name, resolver
+
+    def remove(self, name: str):
+        path: list[tuple[_TrieNode, str]] = []
+        node: Optional[_TrieNode] = self.root
+        for label in reversed(name.split('.')):
+            path.append((node, label)) # type: ignore[arg-type]
+            node = node.children.get(label) # type: ignore[union-attr]
+            if node is None:
+                return
+        if node.name is None:
+            return
+        node.name = node.resolver = None
+        self.size -= 1
+        # prune nodes that no longer lead anywhere
+        for parent, label in reversed(path):
+            child: _TrieNode = parent.children[label]
+            if child.children or child.name is not None:
+                break
+            del parent.children[label]
+
+    def matches_for(self, labels: list[str]) -> list[tuple[str, str]]:
+        """
+        All cached proper suffixes of the domain with these labels, deepest first.
+        """
+        found: list[tuple[str, str]] = []
+        node: _TrieNode = self.root
+        for label in reversed(labels[1:]): # the domain itself is never its own delegation
+            child: Optional[_TrieNode] = node.children.get(label)
+            if child is None:
+                break
+            node = child
+            if node.name is not None:
+                found.append((node.name, node.resolver)) # type: ignore[arg-type]
+        found.reverse()
+        return found
+
+    def longest_match(self, labels: list[str]) -> Optional[tuple[str, str]]:
+        found: list[tuple[str, str]] = self.matches_for(labels)
+        return found[0] if found else None
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        """
+        (nameserver domain, resolver ip) for every indexed record.
+        """
+        stack: list[_TrieNode] = [self.root]
+        while stack:
+            node: _TrieNode = stack.pop()
+            if node.name is not None:
+                yield node.name, node.resolver # type: ignore[misc]
+            stack.extend(node.children.values())
+
+    def stats(self) -> dict[str, int]:
+        return {'delegations': self.size, 'delegation_lookups': self.lookups, 'delegation_matches': self.matches}
+
+class DNSCache:
+    """
+    Resolver cache keyed by (domain, RecordType), replacing the module-level
+    dict of server-a.py / server-b.py.
+      - expiry is lazy: a min-heap of (expiry, seq, key) is popped only as far
+        as entries have actually expired, so a query costs O(log n) amortized
+        instead of a scan of the whole cache
+      - at most max_size entries are kept; the least recently used is evicted
+      - hits / misses / evictions / expirations are counted
+      - `journal` (see CacheStore.attach) sees every store, and every removal
+        (eviction, expiry, delete) as an entry of None
+      - positive A records are mirrored in a DelegationIndex so the next
+        resolver for a query is a longest-suffix match (find_delegation)
+    Entries keep the same shape as before: {'data': ..., 'expiry': ...}.
+    """
+
+    def __init__(self, max_size: int = 1 << 20):
+        self.max_size: int = max_size
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        self._heap: list[tuple[int, int, CacheKey]] = []
+        self._seq: dict[CacheKey, int] = {} # heap item currently valid for each key
+        self._counter: int = 0
+        self.journal: Optional[Callable[[CacheKey, Optional[CacheEntry]], None]] = None # called on every change
+        self.delegations: DelegationIndex = DelegationIndex()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+
+    # --- expiry ---
+    def expire(self, now: Optional[int] = None) -> int:
+        """
+        Flush entries whose expiry <= now; returns how many were removed.
+        """
+        if now is None:
+            now = int(time.time())
+        heap = self._heap
+        removed: int = 0
+        while heap and heap[0][0] <= now:
+            _, seq, key = heapq.heappop(heap)
+            if self._seq.get(key) == seq:
+                self._remove(key)
+                self.expirations += 1
+                removed += 1
+        return removed
+
+    # --- lookups ---
+    def lookup(self, key: CacheKey) -> Optional[CacheEntry]:
+        """
+        Cache lookup for a client query: counts a hit or a miss and marks the
+        entry as recently used.
+        """
+        entry: Optional[CacheEntry] = self.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key: CacheKey, default: Optional[CacheEntry] = None) -> Optional[CacheEntry]:
+        """
+        Return the live entry for key (no statistics, no LRU update).
+        """
+        entry: Optional[CacheEntry] = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry['expiry'] <= int(time.time()):
+            self._remove(key)
+            self.expirations += 1
+            return default
+        return entry
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key) is not None # type: ignore[arg-type]
+
+    def __getitem__(self, key: CacheKey) -> CacheEntry:
+        entry: Optional[CacheEntry] = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def find_delegation(self, domain: str) -> Optional[tuple[str, str]]:
+        """
+        (nameserver domain, resolver ip) of the longest proper suffix of domain
+        with a live A record in the cache, or None to use the default resolver.
+        """
+        index: DelegationIndex = self.delegations
+        index.lookups += 1
+        for name, resolver in index.matches_for(domain.split('.')):
+            if self.get((name, RecordType.A)) is not None: # drops it from the index if expired
+                index.matches += 1
+                return name, resolver
+        return None
+
+    # --- updates ---
+    def __setitem__(self, key: CacheKey, entry: CacheEntry):
+        if self.journal is not None:
+            self.journal(key, entry)
+        self._counter += 1
+        self._seq[key] = self._counter
+        heapq.heappush(self._heap, (entry['expiry'], self._counter, key))
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if key[1] == RecordType.A:
+            if entry['data'] is not None:
+                self.delegations.insert(key[0], entry['data'])
+            else:
+                self.delegations.remove(key[0])
+
+        while len(self._entries) > self.max_size:
+            oldest, _ = self._entries.popitem(last=False)
+            del self._seq[oldest]
+            if oldest[1] == RecordType.A:
+                self.delegations.remove(oldest[0])
+            if self.journal is not None:
+                self.journal(oldest, None)
+            self.evictions += 1
+
+        # drop stale heap items left behind by overwrites and evictions
+        if len(self._heap) > 2 * len(self._entries) + 1024:
+            self._heap = [(expiry, seq, k) for expiry, seq, k in self._heap if self._seq.get(k) == seq]
+            heapq.heapify(self._heap)
+
+    def __delitem__(self, key: CacheKey):
+        if key not in self._entries:
+            raise KeyError(key)
+        self._remove(key)
+
+    def _remove(self, key: CacheKey):
+        del self._entries[key]
+        del self._seq[key]
+        if key[1] == RecordType.A:
+            self.delegations.remove(key[0])
+        if self.journal is not None:
+            self.journal(key, None)
+
+    # --- introspection ---
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[CacheKey]:
+        return iter(self._entries)
+
+    def items(self) -> Iterator[tuple[CacheKey, CacheEntry]]:
+        return iter(self._entries.items())
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            **self.delegations.stats()
+        }
+
+
+# ---------------------------
+# On-disk snapshot + append log
+# ---------------------------
+# Both files are a 16-byte header followed by records laid out back to back:
+#   - 8 bytes: absolute expiry (unsigned 64-bit network order)
+#   - 2 bytes: length of the packet below
+#   - a RESPONSE packet in the utils.py encoding (TID 0, TTL 0):
+#     NOERROR + answer for cached data, NXDOMAIN for a cached None
+# Records are read in place from an mmap; a later record for the same key wins.
+# A removed entry is logged as a record with expiry 0, which never loads.
+
+SNAPSHOT_MAGIC = b'FCDC'
+SNAPSHOT_VERSION = 1
+FILE_HEADER = struct.Struct('!4sB3xQ') # magic, version, creation time
+RECORD_HEADER = struct.Struct('!QH')   # expiry, packet length
+COMPACT_RATIO = 0.5     # rewrite the snapshot once the log is this large relative to it...
+COMPACT_MIN = 64 << 10  # ...and at least this many bytes
+
+REMOVED: CacheEntry = {'data': None, 'expiry': 0}
+
+def encode_record(key: CacheKey, entry: Optional[CacheEntry]) -> bytes:
+    domain, qtype = key
+    if entry is None:
+        entry = REMOVED
+    if entry['data'] is None:
+        packet: bytes = pack_response(0, domain, qtype, ResponseCode.NXDOMAIN, '', 0)
+    else:
+        packet = pack_response(0, domain, qtype, ResponseCode.NOERROR, entry['data'], 0)
+    return RECORD_HEADER.pack(entry['expiry'], len(packet)) + packet
+
+def decode_record(buf: Any, offset: int, length: int, expiry: int) -> Optional[tuple[CacheKey, CacheEntry]]:
+    """
+    The entry stored in the packet at buf[offset:offset+length], or None if
+    it does not decode. Only str copies are returned: no memoryview into buf
+    outlives the call, so an mmap'ed buf can still be closed.
+    """
+    try:
+        record = unpack_response(buf, offset, length)
+        key: CacheKey = (record.domain, record.qtype)
+        data: Optional[str] = record.answer if record.rcode == ResponseCode.NOERROR else None
+    except ValueError: # malformed packet or bad UTF-8
+        return None
+    return key, {'data': data, 'expiry': expiry}
+
+def iter_records(buf: Any, offset: int = FILE_HEADER.size, problems: Optional[list[str]] = None) -> Iterator[tuple[CacheKey, CacheEntry]]:
+    """
+    Decode records from buf[offset:]. A record that does not decode is
+    skipped; a truncated trailing record (e.g. an append cut short by a
+    crash) ends the file. Both are described in `problems` if given.
+    """
+    end: int = len(buf)
+    while offset + RECORD_HEADER.size <= end:
+        start: int = offset
+        expiry, length = RECORD_HEADER.unpack_from(buf, offset)
+        offset += RECORD_HEADER.size
+        if offset + length > end:
+            if problems is not None:
+                problems.append(f"truncated record at offset {start}")
+            break
+        item = decode_record(buf, offset, length, expiry)
+        offset += length
+        if item is None:
+            if problems is not None:
+                problems.append(f"corrupt record at offset {start}")
+            continue
+        yield item
+
+class CacheStore:
+    """
+    Persist a DNSCache to `path` (full snapshot) and `path + '.log'`
+    (incremental append log of every change since the last snapshot).
+      - load(cache)      : warm start from snapshot + log, dropping expired and
+                           removed entries; unreadable records are skipped and
+                           listed in `skipped` ("<file>: <problem>")
+      - attach(cache)    : append every future cache store and removal to the log
+      - snapshot(cache)  : rewrite the snapshot atomically and truncate the log;
+                           rotate() + write_snapshot() split it so the write
+                           can run off the event loop
+      - maybe_snapshot() : every `interval` seconds, snapshot if the log has
+                           grown enough to need compaction (needs_compaction)
+    """
+
+    def __init__(self, path: str, interval: float = 60):
+        self.path: str = path
+        self.log_path: str = path + '.log'
+        self.old_log_path: str = path + '.log.old' # log being folded into the snapshot, see rotate()
+        self.interval: float = interval
+        self.last_snapshot: float = time.time()
+        self._log: Optional[BinaryIO] = None
+        self.skipped: list[str] = []
+
+    # --- reading ---
+    def load(self, cache: DNSCache) -> int:
+        """
+        Load live entries into cache; returns how many were restored.
+        """
+        now: int = int(time.time())
+        restored: dict[CacheKey, CacheEntry] = {}
+        for path in (self.path, self.old_log_path, self.log_path):
+            problems: list[str] = []
+            for key, entry in self._read(path, problems):
+                restored[key] = entry
+            self.skipped += [f"{path}: {problem}" for problem in problems]
+        count: int = 0
+        for key, entry in restored.items():
+            if entry['expiry'] > now:
+                cache[key] = entry
+                count += 1
+        return count
+
+    @staticmethod
+    def _read(path: str, problems: Optional[list[str]] = None) -> Iterator[tuple[CacheKey, CacheEntry]]:
+        if not os.path.exists(path) or os.path.getsize(path) < FILE_HEADER.size:
+            return
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            magic, version, _ = FILE_HEADER.unpack_from(buf, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"{path} is not a cache snapshot")
+            yield from iter_records(buf, problems=problems)
+
+    # --- writing ---
+    def attach(self, cache: DNSCache):
+        self._open_log()
+        cache.journal = self.append
+
+    def append(self, key: CacheKey, entry: Optional[CacheEntry]):
+        if self._log is None:
+            self._open_log()
+        self._log.write(encode_record(key, entry)) # type: ignore[union-attr]
+        self._log.flush() # type: ignore[union-attr]
+
+    def snapshot(self, cache: DNSCache):
+        self.write_snapshot(self.rotate(cache))
+
+    def rotate(self, cache: DNSCache) -> list[tuple[CacheKey, CacheEntry]]:
+        """
+        First half of a snapshot, cheap enough for an event loop: copy the live
+        entries and move the log aside, so changes made while write_snapshot()
+        runs (e.g. in an executor) land in a fresh log and replay on top.
+        """
+        now: int = int(time.time())
+        items: list[tuple[CacheKey, CacheEntry]] = [(key, entry) for key, entry in cache.items() if entry['expiry'] > now]
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if os.path.exists(self.log_path):
+            os.replace(self.log_path, self.old_log_path)
+        return items
+
+    def write_snapshot(self, items: list[tuple[CacheKey, CacheEntry]]):
+        """
+        Second half: write `items` from rotate() as the new snapshot, then drop
+        the log it covers. Touches no cache state, so it may run in a thread.
+        """
+        tmp_path: str = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(FILE_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, int(time.time())))
+            for key, entry in items:
+                f.write(encode_record(key, entry))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        # everything in the old log is now part of the snapshot
+        if os.path.exists(self.old_log_path):
+            os.remove(self.old_log_path)
+        self.last_snapshot = time.time()
+
+    def needs_compaction(self) -> bool:
+        """
+        True once the log has grown past COMPACT_RATIO of the snapshot (and
+        COMPACT_MIN bytes): below that, replaying it on load costs less than
+        rewriting the whole snapshot.
+        """
+        if self._log is not None:
+            log_size: int = self._log.tell()
+        elif os.path.exists(self.log_path):
+            log_size = os.path.getsize(self.log_path)
+        else:
+            return False
+        snapshot_size: int = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return log_size > max(COMPACT_MIN, COMPACT_RATIO * snapshot_size)
+
+    def maybe_snapshot(self, cache: DNSCache) -> bool:
+        if time.time() - self.last_snapshot < self.interval:
+            return False
+        if not self.needs_compaction():
+            self.last_snapshot = time.time()
+            return False
+        self.snapshot(cache)
+        return True
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _open_log(self):
+        fresh: bool = not os.path.exists(self.log_path) or os.path.getsize(self.log_path) < FILE_HEADER.size
+        self._log = open(self.log_path, 'wb' if fresh else 'ab')
+        if fresh:
+            self._log.write(FILE_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, int(time.time())))
+            self._log.flush()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+import socket
+import struct
+from typing import Sequence, Union
+from utils import PacketBatch, ResponseTemplate
+from sender import Address, BatchSender
+
+# ---------------------------
+# IPv4 + UDP headers, laid out exactly like scapy's IP()/UDP() defaults
+# ---------------------------
+IP_HEADER  = struct.Struct('!BBHHHBBH4s4s') # ver/ihl, tos, len, id, frag, ttl, proto, chksum, src, dst
+UDP_HEADER = struct.Struct('!HHHH')         # sport, dport, len, chksum
+HEADERS_LEN = IP_HEADER.size + UDP_HEADER.size
+
+IP_ID  = 1  # scapy's default identification
+IP_TTL = 64 # scapy's default TTL
+
+# offsets inside a frame
+UDP_DPORT_OFFSET  = IP_HEADER.size + 2
+UDP_CHKSUM_OFFSET = IP_HEADER.size + 6
+PAYLOAD_OFFSET    = HEADERS_LEN
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+def checksum(data: Buffer, initial: int = 0) -> int:
+    """
+    RFC 1071 internet checksum (ones' complement of the ones' complement sum).
+    """
+    data = bytes(data)
+    if len(data) % 2:
+        data += b'\x00'
+    total: int = initial + sum(struct.unpack(f'!{len(data) // 2}H', data))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+def update_checksum(old_checksum: int, old_word: int, new_word: int) -> int:
+    """
+    RFC 1624 incremental update: HC' = ~(~HC + ~m + m') for one 16-bit word m -> m'.
+    """
+    total: int = (~old_checksum & 0xFFFF) + (~old_word & 0xFFFF) + new_word
+    total = (total & 0xFFFF) + (total >> 16)
+    total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+def _udp_checksum(src: bytes, dst: bytes, udp: Buffer) -> int:
+    pseudo: bytes = src + dst + struct.pack('!BBH', 0, socket.IPPROTO_UDP, len(udp))
+    value: int = checksum(pseudo + bytes(udp))
+    return value or 0xFFFF # an all-zero UDP checksum is transmitted as 0xFFFF
+
+def build_frame(
+    src_ip: str, dst_ip: str,
+    src_port: int, dst_port: int,
+    payload: Buffer,
+) -> bytes:
+    """
+    Build an IPv4+UDP frame byte-for-byte equal to
+    raw(IP(src=src_ip, dst=dst_ip) / UDP(sport=src_port, dport=dst_port) / Raw(load=payload)).
+    """
+    src: bytes = socket.inet_aton(src_ip)
+    dst: bytes = socket.inet_aton(dst_ip)
+    udp_len: int = UDP_HEADER.size + len(payload)
+    total_len: int = IP_HEADER.size + udp_len
+
+    ip_header: bytes = IP_HEADER.pack(0x45, 0, total_len, IP_ID, 0, IP_TTL, socket.IPPROTO_UDP, 0, src, dst)
+    ip_header = ip_header[:10] + struct.pack('!H', checksum(ip_header)) + ip_header[12:]
+
+    udp: bytes = UDP_HEADER.pack(src_port, dst_port, udp_len, 0) + bytes(payload)
+    udp = udp[:6] + struct.pack('!H', _udp_checksum(src, dst, udp)) + udp[8:]
+    return ip_header + udp
+
+# ---------------------------
+# Frame batches for TID sweeps
+# ---------------------------
+class FrameBatch(PacketBatch):
+    """
+    A PacketBatch of full IPv4+UDP frames carrying one ResponseTemplate.
+    Changing the TID (or the destination port) only patches those 2 bytes and
+    the UDP checksum, which is updated incrementally instead of recomputed.
+    """
+    __slots__ = ('base_checksum', 'base_tid', 'dst_port', 'tids')
+
+    def __init__(self, frame: bytes, tids: Sequence[int]):
+        self.base_checksum: int = struct.unpack_from('!H', frame, UDP_CHKSUM_OFFSET)[0]
+        self.base_tid: int = struct.unpack_from('!H', frame, PAYLOAD_OFFSET)[0]
+        self.dst_port: int = struct.unpack_from('!H', frame, UDP_DPORT_OFFSET)[0]
+        self.tids: Sequence[int] = ()
+        super().__init__(frame, tids)
+
+    def set_tids(self, tids: Sequence[int]):
+        if len(tids) != self.count:
+            raise ValueError(f"Expected {self.count} TIDs, got {len(tids)}")
+        if self.count and not (0 <= min(tids) and max(tids) <= 65535):
+            raise ValueError("TID must be 0–65535")
+        self.tids = tids
+        self._patch(PAYLOAD_OFFSET, tids)
+        self._patch_checksums()
+
+    def set_dst_port(self, dst_port: int):
+        """
+        Retarget every frame in place to another destination port.
+        """
+        self._patch(UDP_DPORT_OFFSET, [dst_port] * self.count)
+        self.base_checksum = update_checksum(self.base_checksum, self.dst_port, dst_port)
+        self.dst_port = dst_port
+        self._patch_checksums()
+
+    def _patch(self, offset: int, words: Sequence[int]):
+        self.buffer[offset::self.size] = bytes(word >> 8 for word in words)
+        self.buffer[offset + 1::self.size] = bytes(word & 0xFF for word in words)
+
+    def _patch_checksums(self):
+        base, old = self.base_checksum, self.base_tid
+        sums: list[int] = [update_checksum(base, old, tid) or 0xFFFF for tid in self.tids]
+        self._patch(UDP_CHKSUM_OFFSET, sums)
+
+
+class FrameTemplate:
+    """
+    Prebuilt IPv4+UDP frame around a ResponseTemplate; frames for different
+    TIDs share everything except the TID and the UDP checksum.
+    """
+    __slots__ = ('frame', 'size', 'dst_ip')
+
+    def __init__(
+        self,
+        src_ip: str, dst_ip: str,
+        src_port: int, dst_port: int,
+        response: ResponseTemplate,
+    ):
+        self.frame: bytes = build_frame(src_ip, dst_ip, src_port, dst_port, response.packet)
+        self.size: int = len(self.frame)
+        self.dst_ip: str = dst_ip
+
+    def build(self, tid: int) -> bytes:
+        return bytes(self.batch([tid])[0])
+
+    def batch(self, tids: Sequence[int] = range(65536)) -> FrameBatch:
+        return FrameBatch(self.frame, tids)
+
+# ---------------------------
+# Sending frames
+# ---------------------------
+def open_raw_socket() -> socket.socket:
+    """
+    Raw IPv4 socket that sends our own IP headers (requires root / CAP_NET_RAW).
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_RAW)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_HDRINCL, 1)
+    return sock
+
+class FrameSender:
+    """
+    Write crafted frames through a single SOCK_RAW/IP_HDRINCL socket.
+    With loopback=True no privileges are needed: each frame's checksums are
+    verified and its UDP payload is delivered to 127.0.0.1:<dport> through a
+    plain UDP socket, which is enough to test against a local server.
+    """
+
+    def __init__(self, loopback: bool = False, batch_size: int = 1024):
+        self.loopback: bool = loopback
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) if loopback else open_raw_socket()
+        self.sender: BatchSender = BatchSender(sock, batch_size=batch_size)
+
+    def send_frame(self, frame: Buffer) -> int:
+        return self.send_frames([frame])
+
+    def send_frames(self, frames: Sequence[Buffer]) -> int:
+        if self.loopback:
+            payloads: list[memoryview] = []
+            dests: list[Address] = []
+            for frame in frames:
+                payload, dest = unwrap_frame(frame)
+                payloads.append(payload)
+                dests.append(('127.0.0.1', dest[1]))
+            return self.sender.send(payloads, dests)
+        dests = [(socket.inet_ntoa(bytes(frame[16:20])), 0) for frame in frames]
+        return self.sender.send(frames, dests)
+
+    def send_batch(self, batch: FrameBatch, dst_ip: str) -> int:
+        if self.loopback:
+            return self.send_frames(batch)
+        return self.sender.send_batch(batch, (dst_ip, 0))
+
+    def report(self) -> str:
+        return self.sender.report()
+
+    def close(self):
+        self.sender.close()
+
+def unwrap_frame(frame: Buffer) -> tuple[memoryview, Address]:
+    """
+    Verify the IPv4 and UDP checksums of a frame and return its UDP payload
+    and (dst_ip, dst_port); raises ValueError on a corrupt frame.
+    """
+    view: memoryview = memoryview(frame)
+    if checksum(view[:IP_HEADER.size]) != 0:
+        raise ValueError("Bad IPv4 header checksum")
+    src, dst = bytes(view[12:16]), bytes(view[16:20])
+    if _udp_checksum(src, dst, view[IP_HEADER.size:]) != 0xFFFF:
+        raise ValueError("Bad UDP checksum")
+    dst_port: int = struct.unpack_from('!H', view, UDP_DPORT_OFFSET)[0]
+    return view[PAYLOAD_OFFSET:], (socket.inet_ntoa(dst), dst_port)
+
+
+if __name__ == '__main__':
+    # Compare our frames with what scapy produces for the same packets
+    from scapy.all import IP, UDP, Raw, raw
+    from utils import RecordType, ResponseCode
+
+    template = ResponseTemplate(
+        domain='www.google.com',
+        qtype=RecordType.A,
+        rcode=ResponseCode.NOERROR,
+        answer='11.4.5.14',
+        ttl=600,
+        auth_ip='19.19.8.10'
+    )
+    frames = FrameTemplate('140.112.30.191', '127.0.0.1', 53053, 40000, template)
+    batch: FrameBatch = frames.batch()
+
+    for dst_port in (40000, 54321):
+        batch.set_dst_port(dst_port)
+        for tid in range(0, 65536, 97):
+            expected: bytes = raw(IP(src='140.112.30.191', dst='127.0.0.1')
+                                  / UDP(sport=53053, dport=dst_port)
+                                  / Raw(load=template.build(tid)))
+            assert bytes(batch[tid]) == expected, (dst_port, tid)
+            assert build_frame('140.112.30.191', '127.0.0.1', 53053, dst_port, template.build(tid)) == expected
+    print(f'{2 * len(range(0, 65536, 97))} frames identical to scapy.raw()')
+
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(('127.0.0.1', 54321))
+    sender = FrameSender(loopback=True)
+    sender.send_frames([batch[4242]])
+    assert sink.recv(512) == template.build(4242)
+    print('loopback delivery OK')
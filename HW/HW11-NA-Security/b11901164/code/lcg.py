@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import argparse
+from functools import reduce
+from math import gcd
+import numpy as np
+
+# ---------------------------
+# LCG state recovery: s[n + 1] = (a * s[n] + c) % m
+# ---------------------------
+# - Unknown m: with t[n] = s[n + 1] - s[n] = a * t[n - 1] (mod m), every
+#   t[n + 2] * t[n] - t[n + 1]^2 is a multiple of m, so the gcd of a few of
+#   them is m (6+ outputs usually suffice).
+# - a and c: a = (s2 - s1) / (s1 - s0) mod m, c = s1 - a * s0 (each of the
+#   gcd(s1 - s0, m) solutions when the difference is not invertible).
+# - Truncated outputs s[n] % k: every state consistent with the first
+#   output is o0 + k * h, so when m / k is small enough the high part h is
+#   brute-forced (NumPy for m < 2^32) and filtered by the later outputs.
+
+TRUNCATED_LIMIT = 1 << 28 # candidate high parts tried before giving up
+
+def recover_modulus(outputs):
+    """
+    m from consecutive full outputs, or None if they do not pin it down.
+    Small factors left over by the gcd are stripped while the outputs still
+    fit below the modulus and still follow one (a, c).
+    """
+    if len(outputs) < 4:
+        raise ValueError("need at least 4 consecutive outputs to recover the modulus")
+    t = [b - a for a, b in zip(outputs, outputs[1:])]
+    zeros = [abs(t2 * t0 - t1 * t1) for t0, t1, t2 in zip(t, t[1:], t[2:])]
+    m = reduce(gcd, zeros, 0)
+    if m <= max(outputs):
+        return None
+    for p in range(2, 1 << 12):
+        while m % p == 0 and m // p > max(outputs) and recover_params(outputs, m // p)[0] is not None:
+            m //= p
+    return m
+
+def recover_params(outputs, m, limit=1 << 16):
+    """
+    (a, c) from consecutive full outputs and the modulus, or (None, None).
+    When s1 - s0 is not invertible mod m (e.g. even, with m a power of
+    two), a is one of g = gcd(s1 - s0, m) solutions; up to `limit` are tried.
+    """
+    for s0, s1, s2 in zip(outputs, outputs[1:], outputs[2:]):
+        d, n = (s1 - s0) % m, (s2 - s1) % m
+        g = gcd(d, m)
+        if n % g or g > limit:
+            continue
+        step = m // g
+        base = (n // g) * pow(d // g, -1, step) % step if step > 1 else 0
+        for a in range(base, m, step):
+            c = (s1 - a * s0) % m
+            if all((a * x + c) % m == y for x, y in zip(outputs, outputs[1:])):
+                return a, c
+    return None, None
+
+def recover_truncated(outputs, a, c, m, k, limit=TRUNCATED_LIMIT):
+    """
+    States consistent with outputs[i] = s[i] % k (a, c, m known); returns
+    the candidates for the state that produced the last output.
+    """
+    o0 = outputs[0]
+    count = (m - o0 + k - 1) // k
+    if count > limit:
+        raise ValueError(f"{count} candidate states for m / k = {m // k}; too many to brute-force")
+    if m <= 1 << 32: # a * s + c stays below 2^64
+        states = np.arange(count, dtype=np.uint64) * np.uint64(k) + np.uint64(o0)
+        for out in outputs[1:]:
+            states = (np.uint64(a) * states + np.uint64(c)) % np.uint64(m)
+            states = states[states % np.uint64(k) == out]
+        return [int(s) for s in states]
+    found = []
+    for state in range(o0, m, k):
+        s = state
+        for out in outputs[1:]:
+            s = (a * s + c) % m
+            if s % k != out:
+                break
+        else:
+            found.append(s)
+    return found
+
+class LCG:
+    """
+    A cracked generator positioned at `state` (the last output seen).
+      - LCG.recover(outputs, m=None) : from consecutive full outputs
+      - lcg.next()                   : the next state (advances)
+      - lcg.predict(n, k=None)       : the next n states (or states % k), without advancing
+    """
+
+    def __init__(self, a, c, m, state):
+        self.a = a
+        self.c = c
+        self.m = m
+        self.state = state
+
+    @classmethod
+    def recover(cls, outputs, m=None):
+        if m is None:
+            m = recover_modulus(outputs)
+            if m is None:
+                return None
+        a, c = recover_params(outputs, m)
+        if a is None:
+            return None
+        return cls(a, c, m, outputs[-1])
+
+    def next(self):
+        self.state = (self.a * self.state + self.c) % self.m
+        return self.state
+
+    def predict(self, n, k=None):
+        a, c, m = self.a, self.c, self.m
+        s = self.state
+        out = []
+        for _ in range(n):
+            s = (a * s + c) % m
+            out.append(s if k is None else s % k)
+        return out
+
+    def advance(self, n):
+        for _ in range(n):
+            self.next()
+        return self.state
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='recover an LCG from consecutive outputs and predict the next ones')
+    parser.add_argument('outputs', nargs='+', type=int)
+    parser.add_argument('-m', '--modulus', type=int, default=None, help='known modulus (default: recover it)')
+    parser.add_argument('-n', '--predict', type=int, default=10)
+    parser.add_argument('-k', '--mod', type=int, default=None, help='print predictions %% k (e.g. 500)')
+    args = parser.parse_args()
+
+    lcg = LCG.recover(args.outputs, args.modulus)
+    if lcg is None:
+        print("not enough outputs to recover the generator")
+    else:
+        print(f"m = {lcg.m}\na = {lcg.a}\nc = {lcg.c}")
+        print(' '.join(map(str, lcg.predict(args.predict, args.mod))))
@@ -4,100 +4,34 @@ from pwn import *
 from pwnlib.tubes.remote import remote
 from binascii import unhexlify
 import re
-import hashlib
+from powtable import PowTable
+from powsolver import PowSolver
+from xorcrack import crack as xorcrack, key_lengths
+from lcg import LCG
+from session import Session
+import numpy as np
 
 PATTERN = r'NASA_HW11\{[0-9A-Za-z_\':/@]+\}'
 
-def crack_lcg(s0, s1, s2, m):
-    """Crack LCG parameters a and c"""
-    numerator = (s2 - s1) % m
-    denominator = (s1 - s0) % m
-    
-    if denominator == 0:
-        return None, None
-        
-    try:
-        a = (numerator * pow(denominator, -1, m)) % m
-        c = (s1 - a * s0) % m
-        return a, c
-    except:
-        return None, None
-
 def find_valid_flag_in_text(text):
     """Extract valid flag from decrypted text"""
     matches = re.findall(PATTERN, text)
     return matches[0] if matches else None
 
-def test_key_and_decrypt(encrypted, key):
-    """Test key and decrypt, return flag if successful, None otherwise"""
-    try:
-        # Decrypt using the key
-        decrypted = bytes(encrypted[i] ^ key[i % 10] for i in range(len(encrypted)))
-        decoded = decrypted.decode("ascii", errors="replace")
-        
-        # Check decryption quality
-        printable_ratio = sum(1 for c in decoded if c.isprintable()) / len(decoded)
-        
-        # Look for flag
-        if printable_ratio == 1 and "NASA_HW11{" in decoded:
-            flag_match = re.search(PATTERN, decoded)
-            if flag_match:
-                return flag_match.group(0), decoded, printable_ratio
-        
-        return None
-    except:
-        return None
-
 def bruteforce_repeating_key_xor_flag(encrypted_hex):
-    """Complete brute force approach for OTP attack"""
+    """Known-plaintext attack on repeating-key XOR with unknown key length (see xorcrack.py)"""
     
     encrypted = unhexlify(encrypted_hex)
     print(f"Encrypted data length: {len(encrypted)} bytes")
     
-    # Known plaintext attack: try every possible starting position
-    known_plaintext = b"NASA_HW11{"
-    candidates = []
-
-    for start_pos in range(len(encrypted) - len(known_plaintext) + 1):
-        print(f"Trying position {start_pos}")
-        
-        # Derive key fragment from known plaintext
-        partial_key = {}
-        consistent = True
-        
-        for i in range(len(known_plaintext)):
-            cipher_pos = start_pos + i
-            key_pos = cipher_pos % 10  # 10-byte cycle
-            
-            # Calculate key byte at this position
-            key_byte = encrypted[cipher_pos] ^ known_plaintext[i]
-            
-            # Check consistency with previously derived values
-            if key_pos in partial_key:
-                if partial_key[key_pos] != key_byte:
-                    consistent = False
-                    break
-            else:
-                partial_key[key_pos] = key_byte
-        
-        if not consistent:
-            continue
-        
-        print(f"Position {start_pos} passed consistency check")
-        print(f"Recovered key positions: {partial_key}")
-        
-        # Key fully recovered
-        key = [partial_key[i] for i in range(10)]
-        result = test_key_and_decrypt(encrypted, key)
-        if result:
-            flag, full_text, ratio = result
-            candidates.append({
-                'position': start_pos,
-                'key': bytes(key),
-                'flag': flag,
-                'full_text': full_text,
-                'printable_ratio': ratio
-            })
+    data = np.frombuffer(encrypted, dtype=np.uint8)
+    for key_len, ioc, distance in key_lengths(data):
+        print(f"Key length {key_len}: coincidence {ioc:.4f}, hamming {distance:.2f}")
+    
+    # every offset of b"NASA_HW11{" is tried at once; candidates are scored without decrypting
+    candidates = xorcrack(encrypted)
+    for candidate in candidates:
+        print(f"Position {candidate['position']}: key {candidate['key'].hex()}")
     
     return candidates
 
@@ -108,54 +42,45 @@ def solve_part_a(conn: remote):
     # LCG modulus from source code
     m = 0xa34d80e56c2cd0d35209cb13e5665fc58176fac6b1fee26af23388deebee59da1a884cbba6111ea819f7a2059f0accd8b1e7e23dbe4d90896b2cd482c0b934d97e3bbdbfd26b968e9bfeb2f8df037cab44557d2cf6eb57385a191c3db536c62f781e598405bdd818ae98dfd7df48c4da55d9d5b49d75aa46c91a27a186b9bf77
     
-    # Collect 3 LCG states
+    # Menu commands are pipelined through one Session: each guess is sent with the
+    # prompts it expects, and replies are matched as they arrive (see session.py)
+    session = Session(conn)
+    guess = lambda number: (b"1\n%d\n" % number, (b"Your choice: ", b"Guess a number: ", b"\n"))
+    
+    # Collect 3 LCG states in one burst
     states = []
-    for _ in range(3):
-        conn.recvuntil(b"Your choice: ")
-        conn.sendline(b'1')
-        conn.recvuntil(b"Guess a number: ")
-        conn.sendline(b'999999')
-        
-        result = conn.recvline().decode()
+    for reply in session.pipeline([guess(999999)] * 3):
+        result = reply.text
         if "the number I picked is" in result:
             start = result.find("the number I picked is ") + len("the number I picked is ")
             end = result.find(",", start)
             actual_number = int(result[start:end])
             states.append(actual_number)
     
-    # Crack LCG parameters
-    a, c = crack_lcg(states[0], states[1], states[2], m)
-    if a is None or c is None:
+    # Crack LCG parameters (lcg.py also recovers an unknown modulus from more outputs)
+    lcg = LCG.recover(states, m)
+    if lcg is None:
         return False
     
-    # Build trust quickly
+    # Build trust quickly: the next answers are known in advance, so all guesses go out
+    # ahead and cost about one round trip; top up if any of them missed
     trust = 0
-    current_state = states[-1]
-    
     while trust < 100:
-        next_state = (a * current_state + c) % m
-        target_guess = next_state % 500
-        
-        conn.recvuntil(b"Your choice: ")
-        conn.sendline(b'1')
-        conn.recvuntil(b"Guess a number: ")
-        conn.sendline(str(target_guess).encode())
-        
-        result = conn.recvline().decode()
-        
-        if "Congratulations" in result:
-            trust += 1
-            current_state = next_state
-        else:
-            trust -= 1
-            if "the number I picked is" in result:
-                start = result.find("the number I picked is ") + len("the number I picked is ")
-                end = result.find(",", start)
-                actual = int(result[start:end])
-                current_state = actual
-    
-    conn.recvuntil(b"Your choice: ")
-    conn.sendline(b"2")
+        for reply in session.pipeline([guess(g) for g in lcg.predict(100 - trust, 500)]):
+            result = reply.text
+            lcg.next()
+            
+            if "Congratulations" in result:
+                trust += 1
+            else:
+                trust -= 1
+                if "the number I picked is" in result:
+                    start = result.find("the number I picked is ") + len("the number I picked is ")
+                    end = result.find(",", start)
+                    lcg.state = int(result[start:end])
+    
+    session.exchange(b"2\n", b"Your choice: ")
+    session.release()
     flag1_response = conn.recvline().decode()
     print(f"Response: {flag1_response.strip()}")
     flag_start = flag1_response.find("NASA_HW11{")
@@ -202,50 +127,19 @@ def solve_part_c(conn: remote):
     """Proof of Work Challenge"""
     print("\n=== Part (c): Proof of Work for FLAG3 ===")
 
-    # Build comprehensive rainbow table before starting
-    print("Building comprehensive rainbow table...")
-    rainbow_table = {}
-    for i in range(2**24):
-        hash_val = hashlib.md5(str(i).encode()).hexdigest()[:8]
-        rainbow_table[hash_val] = i
-    
-    print(f"Rainbow table built with {len(rainbow_table)} entries")
+    # Memory-mapped md5(i)[0:8] table for i < 2^24, built once on the first run (see powtable.py);
+    # misses fall back to a parallel search above 2^24 bounded by the server timeout (see powsolver.py)
+    rainbow_table = PowTable.load()
+    print(f"Rainbow table loaded with {len(rainbow_table)} entries")
     
-    conn.recvuntil(b"Your choice: ")
-    conn.sendline(b"4")
-    
-    # Process 10 PoW challenges with instant lookup
-    for pow_num in range(10):
-        try:
-            # Receive the challenge prompt
-            line = conn.recvuntil(b": ").decode()
-            print(f"PoW {pow_num + 1}: {line.strip()}")
-            
-            # Extract target hash from the challenge
-            if 'md5(i)[0:8] == "' in line:
-                start_idx = line.find('md5(i)[0:8] == "') + len('md5(i)[0:8] == "')
-                end_idx = line.find('"', start_idx)
-                target_hash = line[start_idx:end_idx]
-                
-                print(f"Target hash: {target_hash}")
-                
-                # Instant lookup from rainbow table
-                solution = rainbow_table.get(target_hash)
-                
-                if solution is not None:
-                    print(f"Found solution: {solution}")
-                    conn.sendline(str(solution).encode())
-                else:
-                    print("Hash not found in rainbow table")
-                    return False
-            else:
-                print("Could not parse PoW challenge")
-                print(f"Line was: {line}")
-                return False
-                
-        except Exception as e:
-            print(f"Error on PoW {pow_num + 1}: {e}")
+    with PowSolver(rainbow_table) as solver:
+        conn.recvuntil(b"Your choice: ")
+        conn.sendline(b"4")
+        
+        # Process 10 PoW challenges: prompts are received and parsed while the previous one is solved
+        if not solver.solve_challenges(conn, 10):
             return False
+        print(f"PoW answers: {solver.stats}")
     
     # Check for FLAG3 in response
     try:
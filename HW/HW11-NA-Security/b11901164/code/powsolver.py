@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+import argparse
+import multiprocessing as mp
+import queue
+import re
+import threading
+import time
+import numpy as np
+from powtable import TABLE_BITS, TABLE_PATH, PowTable, prefixes
+
+# ---------------------------
+# Proof of work solver: table lookup, then a bounded parallel search
+# ---------------------------
+# Targets from i < 2^24 are answered by the memory-mapped table. A miss
+# starts a search from 2^24 upward: the pool gets CHUNK-sized ranges, at
+# most WINDOW of them in flight, until one hits or the deadline passes.
+# Cancellation is a shared generation counter; bumping it makes every
+# queued or running range of the previous search return at its next block.
+
+POW_TIMEOUT = 30.0   # seconds the server waits for an answer (keep below its timeout)
+CHUNK = 1 << 22      # values of i per search task
+BLOCK = 1 << 16      # values hashed between cancellation checks
+CHALLENGE = re.compile(rb'md5\(i\)\[0:8\] == "([0-9a-fA-F]{8})"')
+
+_generation = None
+
+def _init_worker(generation):
+    global _generation
+    _generation = generation
+
+def _search(start, stop, target, generation):
+    """
+    Smallest i in [start, stop) with md5(str(i))[0:8] == target (uint32), or None
+    once the search is cancelled.
+    """
+    for low in range(start, stop, BLOCK):
+        if _generation.value != generation:
+            return None
+        hits = np.flatnonzero(prefixes(low, min(low + BLOCK, stop)) == target)
+        if len(hits):
+            return low + int(hits[0])
+    return None
+
+class PowSolver:
+    """
+    solver.solve('1a2b3c4d') -> i with md5(str(i)).hexdigest()[0:8] == '1a2b3c4d',
+    or None if the search missed its deadline. The worker pool is started
+    once and reused for every challenge.
+    """
+
+    def __init__(self, table=None, workers=mp.cpu_count(), timeout=POW_TIMEOUT, start=1 << TABLE_BITS):
+        self.table = table
+        self.timeout = timeout
+        self.start = start
+        self.window = 2 * workers
+        self.generation = mp.Value('i', 0, lock=False)
+        self.pool = mp.Pool(workers, initializer=_init_worker, initargs=(self.generation,))
+        self.stats = {'table': 0, 'search': 0, 'timeout': 0}
+
+    def close(self):
+        self.generation.value += 1
+        self.pool.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def solve(self, target_hash, deadline=None):
+        if self.table is not None:
+            solution = self.table.get(target_hash)
+            if solution is not None:
+                self.stats['table'] += 1
+                return solution
+        solution = self.search(target_hash, deadline or time.monotonic() + self.timeout)
+        self.stats['search' if solution is not None else 'timeout'] += 1
+        return solution
+
+    def search(self, target_hash, deadline):
+        target = np.uint32(int(target_hash, 16))
+        self.generation.value += 1
+        generation = self.generation.value
+        results = queue.Queue()
+        low = self.start
+        found = None
+        try:
+            for _ in range(self.window):
+                self.pool.apply_async(_search, (low, low + CHUNK, target, generation), callback=results.put)
+                low += CHUNK
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                try:
+                    found = results.get(timeout=remaining)
+                except queue.Empty:
+                    return None
+                if found is not None:
+                    # any hit is a valid answer, even if an unfinished chunk holds a smaller i
+                    return found
+                self.pool.apply_async(_search, (low, low + CHUNK, target, generation), callback=results.put)
+                low += CHUNK
+        finally:
+            self.generation.value += 1 # cancel whatever is still queued or running
+
+    def solve_challenges(self, conn, count=10, verbose=True):
+        """
+        Answer `count` PoW prompts on a pwntools tube. A reader thread keeps
+        receiving and parsing prompts while the main thread solves and
+        answers, so network waits and searches overlap. Returns True if all
+        were answered.
+        """
+        challenges = queue.Queue()
+
+        def reader():
+            for _ in range(count):
+                try:
+                    line = conn.recvuntil(b": ", timeout=self.timeout)
+                except EOFError:
+                    line = b''
+                challenges.put((line, time.monotonic() + self.timeout))
+                if not line:
+                    return
+
+        thread = threading.Thread(target=reader, daemon=True)
+        thread.start()
+        for pow_num in range(count):
+            line, deadline = challenges.get()
+            if verbose:
+                print(f"PoW {pow_num + 1}: {line.decode(errors='replace').strip()}")
+            match = CHALLENGE.search(line)
+            if match is None:
+                print("Could not parse PoW challenge")
+                print(f"Line was: {line}")
+                return False
+            target_hash = match.group(1).decode()
+            solution = self.solve(target_hash, deadline)
+            if solution is None:
+                print(f"No solution for {target_hash} before the deadline")
+                return False
+            if verbose:
+                print(f"Target hash: {target_hash}, found solution: {solution}")
+            conn.sendline(str(solution).encode())
+        thread.join()
+        return True
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='solve md5(i)[0:8] proofs of work')
+    parser.add_argument('targets', nargs='+', help='8 hex digit prefixes')
+    parser.add_argument('--path', default=TABLE_PATH)
+    parser.add_argument('--no-table', action='store_true', help='search only, starting from 0')
+    parser.add_argument('--timeout', type=float, default=POW_TIMEOUT)
+    parser.add_argument('-j', '--workers', type=int, default=mp.cpu_count())
+    args = parser.parse_args()
+
+    table = None if args.no_table else PowTable.load(args.path, args.workers)
+    with PowSolver(table, args.workers, args.timeout, start=0 if args.no_table else 1 << TABLE_BITS) as solver:
+        for target in args.targets:
+            began = time.perf_counter()
+            solution = solver.solve(target)
+            print(f"{target}: {solution} ({time.perf_counter() - began:.3f}s)")
+        print(solver.stats)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+
+# ---------------------------
+# Persistent md5(i)[0:8] lookup table for the proof of work
+# ---------------------------
+# The first 8 hex digits of md5(str(i)) are a big-endian uint32, so the
+# table is two uint32 rows saved as one .npy file: the sorted prefixes and
+# the i each one came from. It is built once (in parallel) and afterwards
+# memory-mapped, so opening it is instant and a lookup is one binary search
+# that touches a handful of pages. The 128 MB file lives in the user's cache
+# directory ($XDG_CACHE_HOME or ~/.cache), not next to the sources.
+
+TABLE_BITS = 24
+TABLE_PATH = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'nasa-hw11', 'md5-prefix.npy')
+CHUNK = 1 << 20 # values of i hashed per worker task
+
+def prefixes(start, stop):
+    """
+    md5(str(i))[0:8] for i in [start, stop) as uint32.
+    """
+    md5 = hashlib.md5
+    digests = b''.join([md5(b'%d' % i).digest()[:4] for i in range(start, stop)])
+    return np.frombuffer(digests, dtype='>u4').astype(np.uint32)
+
+def _prefixes(bounds):
+    return prefixes(*bounds)
+
+def build(path=TABLE_PATH, bits=TABLE_BITS, workers=mp.cpu_count()):
+    """
+    Hash i = 0 .. 2^bits - 1 with a pool of workers and save the sorted table to `path`.
+    """
+    size = 1 << bits
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    table = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=np.uint32, shape=(2, size))
+    with mp.Pool(workers) as pool:
+        bounds = [(low, min(low + CHUNK, size)) for low in range(0, size, CHUNK)]
+        for (low, high), chunk in zip(bounds, pool.imap(_prefixes, bounds)):
+            table[0, low:high] = chunk
+    order = np.argsort(table[0], kind='stable') # equal prefixes keep the smallest i first
+    table[1] = order
+    table[0] = table[0][order]
+    table.flush()
+    del table
+    os.replace(path + '.tmp', path)
+
+class PowTable:
+    """
+    Memory-mapped md5 prefix table; table.get('1a2b3c4d') returns an i with
+    md5(str(i)).hexdigest()[0:8] == '1a2b3c4d', or None.
+    """
+
+    def __init__(self, path=TABLE_PATH):
+        table = np.load(path, mmap_mode='r')
+        self.prefix = table[0]
+        self.index = table[1]
+
+    @classmethod
+    def load(cls, path=TABLE_PATH, workers=mp.cpu_count()):
+        """
+        Open the table at `path`, building it first if it does not exist yet.
+        """
+        if not os.path.exists(path):
+            print(f"Building md5 prefix table at {path} (one-time)...")
+            start = time.time()
+            build(path, workers=workers)
+            print(f"Table built in {time.time() - start:.1f}s")
+        return cls(path)
+
+    def __len__(self):
+        return len(self.prefix)
+
+    def get(self, target_hash):
+        key = np.uint32(int(target_hash, 16))
+        pos = int(np.searchsorted(self.prefix, key))
+        if pos < len(self.prefix) and self.prefix[pos] == key:
+            return int(self.index[pos])
+        return None
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='md5(i)[0:8] lookup table for the HW11 proof of work')
+    parser.add_argument('targets', nargs='*', help='8 hex digit prefixes to look up')
+    parser.add_argument('--path', default=TABLE_PATH)
+    parser.add_argument('--build', action='store_true', help='(re)build the table')
+    parser.add_argument('-j', '--workers', type=int, default=mp.cpu_count())
+    args = parser.parse_args()
+
+    if args.build:
+        start = time.time()
+        build(args.path, workers=args.workers)
+        print(f"{1 << TABLE_BITS} entries in {time.time() - start:.1f}s, "
+              f"{os.path.getsize(args.path) / 1e6:.0f} MB at {args.path}")
+    start = time.perf_counter()
+    table = PowTable.load(args.path, args.workers)
+    print(f"opened {len(table)} entries in {(time.perf_counter() - start) * 1e3:.2f} ms")
+    for target in args.targets:
+        print(f"{target}: {table.get(target)}")
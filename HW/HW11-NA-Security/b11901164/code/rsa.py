@@ -5,6 +5,7 @@ from Crypto.Util.number import *
 import gmpy2
 import time
 from functools import reduce
+from session import Session
 
 def chinese_remainder_theorem(remainders, moduli):
     # 中國剩餘定理
@@ -104,14 +105,16 @@ def main():
         
         anon = remote("140.112.91.4", 11451)
         
-        # 身份驗證
-        anon.recvuntil(b'ID: ')
-        anon.sendline(b'name=soyo')
-        anon.recvuntil(b'Signature: ')
-        anon.sendline(str(fake_sig).encode())
+        # 身份驗證、取得公鑰和密文: 全部一次送出, 回覆依序解析 (session.py)
+        session = Session(anon)
+        auth, public_key, cipher = session.pipeline([
+            (b'name=soyo\n' + str(fake_sig).encode() + b'\n', (b'ID: ', b'Signature: ', b'> ')),
+            (b'1\n', (b'(e, n): (', b'\n')),
+            (b'2\n', (b'> ', b'c: ', b'\n')),
+        ])
 
         # 取得 FLAG1 (只在第一次)
-        response = anon.recvuntil(b'> ')
+        response = auth.last
         if i == 0:
             if b"Here is the flag just for you" in response:
                 print("[+] Authentication successful!")
@@ -120,17 +123,10 @@ def main():
                         flag1 = line.strip()
                         print(f"[+] FLAG1: {flag1}")
 
-        # 取得公鑰和密文
-        anon.sendline(b'1')
-        anon.recvuntil(b'(e, n): (')
-        e_n = anon.recvline().strip().decode().split(', ')
+        e_n = public_key.text.strip().split(', ')
         e = int(e_n[0])
         n = int(e_n[1][:-1])
-
-        anon.recvuntil(b'> ')
-        anon.sendline(b'2')
-        anon.recvuntil(b'c: ')
-        c = int(anon.recvline().strip())
+        c = int(cipher.text.strip())
         
         ciphertexts.append((n, c))
         print(f"    e = {e}, n = {n.bit_length()} bits, c = {c.bit_length()} bits")
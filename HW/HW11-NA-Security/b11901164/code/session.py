@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+import socket
+import time
+from collections import deque
+
+# ---------------------------
+# Pipelined request/response driver for line-based menu services
+# ---------------------------
+# The services read one line per prompt, so the answers to many prompts
+# can be written before any reply arrives. Every queued request records the
+# prompts it expects; replies land in one buffer and a small state machine
+# walks the head request through its prompts as the bytes come in, never
+# rescanning what it has already searched. N requests then cost about one
+# round trip instead of N (or 2N, with a prompt before every answer).
+
+WINDOW = 256     # requests in flight before submit() waits for replies
+RECV_SIZE = 1 << 16
+
+class Reply:
+    """
+    One queued request: `chunks[i]` ends up holding everything received up
+    to and including `expect[i]`; `last` is the final chunk (the answer line).
+    """
+    __slots__ = ('send', 'expect', 'chunks', 'done')
+
+    def __init__(self, send, expect):
+        self.send = send
+        self.expect = expect
+        self.chunks = []
+        self.done = False
+
+    @property
+    def last(self):
+        return self.chunks[-1] if self.chunks else b''
+
+    @property
+    def text(self):
+        return self.last.decode(errors='replace')
+
+class Session:
+    """
+    Drive a socket or a pwntools tube:
+      - session.submit(data, *prompts) : queue data to send, returns a Reply
+      - session.wait(reply)            : read until that reply (and all before it) is complete
+      - session.exchange(...)          : submit + wait, i.e. one lockstep round trip
+      - session.pipeline(requests)     : [(data, prompts)] -> [Reply], all sent ahead
+      - session.release()              : hand unparsed bytes back to a pwntools tube
+    """
+
+    def __init__(self, conn, window=WINDOW, timeout=10.0):
+        self.conn = conn
+        self.window = window
+        self.timeout = timeout
+        if isinstance(conn, socket.socket):
+            self._send = conn.sendall
+            self._recv = self._recv_socket
+        else: # pwntools tube
+            self._send = conn.send
+            self._recv = lambda t: conn.recv(RECV_SIZE, timeout=t)
+        self.buf = bytearray()
+        self.start = 0          # first unparsed byte of buf
+        self.scan = 0           # bytes before this were already searched for the head's prompt
+        self.inflight = deque() # sent, waiting for replies (in order)
+        self.backlog = deque()  # submitted beyond the window, not sent yet
+        self.out = []           # sends coalesced into the next write
+        self.stats = {'requests': 0, 'writes': 0, 'reads': 0}
+
+    @classmethod
+    def connect(cls, host, port, **kwargs):
+        return cls(socket.create_connection((host, port)), **kwargs)
+
+    def _recv_socket(self, timeout):
+        self.conn.settimeout(timeout)
+        try:
+            data = self.conn.recv(RECV_SIZE)
+        except socket.timeout:
+            return b''
+        if not data:
+            raise EOFError("connection closed")
+        return data
+
+    # --- sending ---
+    def submit(self, data, *expect):
+        reply = Reply(data, expect)
+        self.stats['requests'] += 1
+        if len(self.inflight) < self.window and not self.backlog:
+            self._queue(reply)
+        else:
+            self.backlog.append(reply)
+        return reply
+
+    def _queue(self, reply):
+        if reply.send:
+            self.out.append(reply.send)
+        if reply.expect:
+            self.inflight.append(reply)
+        else:
+            reply.done = True
+
+    def flush(self):
+        if self.out:
+            self._send(b''.join(self.out))
+            self.out = []
+            self.stats['writes'] += 1
+
+    # --- receiving ---
+    def _parse(self):
+        """
+        Advance the head request over its prompts as far as the buffer allows.
+        """
+        buf = self.buf
+        while self.inflight:
+            head = self.inflight[0]
+            marker = head.expect[len(head.chunks)]
+            index = buf.find(marker, max(self.start, self.scan - len(marker) + 1))
+            if index < 0:
+                self.scan = len(buf)
+                break
+            end = index + len(marker)
+            head.chunks.append(bytes(buf[self.start:end]))
+            self.start = self.scan = end
+            if len(head.chunks) == len(head.expect):
+                head.done = True
+                self.inflight.popleft()
+                if self.backlog:
+                    self._queue(self.backlog.popleft())
+        if self.start > RECV_SIZE: # compact once the parsed prefix grows
+            del buf[:self.start]
+            self.scan -= self.start
+            self.start = 0
+
+    def wait(self, reply, timeout=None):
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        self._parse()
+        while not reply.done:
+            self.flush()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"no reply to {reply.send!r} (expecting {reply.expect[len(reply.chunks)]!r})")
+            data = self._recv(remaining)
+            if data:
+                self.stats['reads'] += 1
+                self.buf += data
+                self._parse()
+        return reply
+
+    def exchange(self, data, *expect, timeout=None):
+        return self.wait(self.submit(data, *expect), timeout)
+
+    def pipeline(self, requests, timeout=None):
+        replies = [self.submit(data, *expect) for data, expect in requests]
+        if replies:
+            self.wait(replies[-1], timeout)
+        return replies
+
+    def release(self):
+        """
+        Stop using the session: unparsed bytes go back to a pwntools tube
+        (or are returned) so lockstep code can carry on with the connection.
+        """
+        self.flush()
+        rest = bytes(self.buf[self.start:])
+        self.buf = bytearray()
+        self.start = self.scan = 0
+        if rest and hasattr(self.conn, 'unrecv'):
+            self.conn.unrecv(rest)
+        return rest
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+import argparse
+import re
+import time
+from binascii import unhexlify
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# ---------------------------
+# Repeating-key XOR cracker with a known-plaintext crib
+# ---------------------------
+# 1. Key length: the index of coincidence of every column (and the
+#    normalized Hamming distance of adjacent blocks) is computed from byte
+#    histograms; the right length and its multiples stand out.
+# 2. Candidates: a sliding window over the ciphertext XORed with the crib
+#    gives the key fragment for every offset at once; fragments longer than
+#    the key must repeat themselves, which rules out most offsets.
+# 3. Scoring: per column, a histogram of ciphertext bytes times a byte
+#    weight table gives the score of all 256 key bytes, so a full key is
+#    scored by summing L table entries, never by decrypting the text.
+
+CRIB = b"NASA_HW11{"
+PATTERN = rb'NASA_HW11\{[0-9A-Za-z_\':/@]+\}'
+MAX_KEY_LEN = 40
+WINDOW = 1 << 20 # crib offsets handled per batch
+SAMPLE = 1 << 20 # ciphertext bytes used for key length detection
+DETECT_MIN = 256 # bytes per column below which detection is not trusted
+
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+PRINTABLE = np.zeros(256, dtype=np.int64)
+PRINTABLE[32:127] = 1
+PRINTABLE[[9, 10, 13]] = 1
+WEIGHTS = PRINTABLE.copy() # printable 1, letters / digits / space 2, anything else 0
+WEIGHTS[np.frombuffer(b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 ', dtype=np.uint8)] = 2
+XOR = np.bitwise_xor.outer(np.arange(256), np.arange(256)) # XOR[b, k] = b ^ k
+
+def columns(data, key_len):
+    """
+    Byte histograms of every key position: int64 [key_len, 256].
+    """
+    bins = np.resize(np.arange(0, key_len * 256, 256), len(data)) + data
+    return np.bincount(bins, minlength=key_len * 256).reshape(key_len, 256)
+
+def coincidence(data, key_len):
+    """
+    Mean index of coincidence over the key_len columns (about 1/256 for a
+    wrong length on random-looking ciphertext, much higher for the right one).
+    """
+    counts = columns(data, key_len)
+    sizes = counts.sum(axis=1)
+    return float(np.mean((counts * (counts - 1)).sum(axis=1) / np.maximum(sizes * (sizes - 1), 1)))
+
+def hamming(data, key_len, blocks=4096):
+    """
+    Normalized Hamming distance (bits per byte) between adjacent key_len blocks.
+    """
+    count = min(len(data) // key_len, blocks + 1)
+    if count < 2:
+        return 8.0
+    rows = data[:count * key_len].reshape(count, key_len)
+    return float(POPCOUNT[rows[1:] ^ rows[:-1]].mean())
+
+def key_lengths(data, max_len=MAX_KEY_LEN, top=3, sample=SAMPLE):
+    """
+    Most likely key lengths, best first: lengths whose coincidence is close
+    to the best one, smallest first (multiples of the key score just as
+    well), then the rest by coincidence. Returns [(length, ioc, hamming)].
+    """
+    data = data[:sample]
+    scores = [(k, coincidence(data, k), hamming(data, k)) for k in range(1, min(max_len, len(data)) + 1)]
+    best = max(ioc for _, ioc, _ in scores)
+    close = [s for s in scores if s[1] >= 0.9 * best]
+    rest = sorted((s for s in scores if s[1] < 0.9 * best), key=lambda s: -s[1])
+    return (close + rest)[:top]
+
+def key_scores(data, key_len, weights=WEIGHTS):
+    """
+    score[c, k]: total weight of column c decrypted with key byte k.
+    """
+    return columns(data, key_len) @ weights[XOR]
+
+def crib_keys(data, key_len, crib=CRIB, window=WINDOW):
+    """
+    Every offset where the crib fits consistently, with the key it implies:
+    yields (offsets int64 [n], keys uint8 [n, key_len], known bool [n, key_len]).
+    Key bytes the crib does not cover are left for the caller to fill.
+    """
+    crib = np.frombuffer(crib, dtype=np.uint8)
+    width = len(crib)
+    if len(data) < width:
+        return
+    windows = sliding_window_view(data, width)
+    covered = min(width, key_len)
+    for low in range(0, len(windows), window):
+        fragments = windows[low:low + window] ^ crib
+        offsets = np.arange(low, low + len(fragments))
+        if width > key_len: # the fragment repeats with the key period
+            ok = np.all(fragments[:, key_len:] == fragments[:, :width - key_len], axis=1)
+            fragments, offsets = fragments[ok], offsets[ok]
+        cols = (offsets[:, None] + np.arange(covered)) % key_len
+        keys = np.zeros((len(offsets), key_len), dtype=np.uint8)
+        known = np.zeros((len(offsets), key_len), dtype=bool)
+        rows = np.arange(len(offsets))[:, None]
+        keys[rows, cols] = fragments[:, :covered]
+        known[rows, cols] = True
+        yield offsets, keys, known
+
+def decrypt(data, key):
+    key = np.frombuffer(bytes(key), dtype=np.uint8)
+    return (data ^ np.resize(key, len(data))).tobytes()
+
+def crack(ciphertext, crib=CRIB, lengths=None, max_len=MAX_KEY_LEN, top=8, pattern=PATTERN):
+    """
+    Recover repeating-key XOR keys from `ciphertext` (bytes) with a known
+    plaintext `crib` somewhere in it. Tries the given key `lengths`, or the
+    detected ones and then every other length up to `max_len` (shortest
+    first on ciphertexts too short to detect reliably); returns the best candidates whose plaintext matches
+    `pattern`, as dicts like main.bruteforce_repeating_key_xor_flag's.
+    """
+    data = np.frombuffer(ciphertext, dtype=np.uint8)
+    if lengths is None and len(data) < DETECT_MIN * max_len:
+        # too few bytes per column: multiples of the key look as good as the key and
+        # overfit, while short lengths are pinned down by the crib repeating itself
+        lengths = list(range(1, max_len + 1))
+    elif lengths is None:
+        lengths = [k for k, _, _ in key_lengths(data, max_len)]
+        lengths += [k for k in range(1, max_len + 1) if k not in lengths]
+    regex = re.compile(pattern)
+    candidates = []
+    for key_len in lengths:
+        scores = key_scores(data, key_len)
+        printable = key_scores(data, key_len, PRINTABLE)
+        fill = scores.argmax(axis=1).astype(np.uint8) # best key byte for columns the crib misses
+        best = []
+        for offsets, keys, known in crib_keys(data, key_len, crib):
+            keys = np.where(known, keys, fill)
+            total = scores[np.arange(key_len), keys].sum(axis=1)
+            pick = np.argpartition(total, -top)[-top:] if len(total) > top else np.arange(len(total))
+            best += [(int(total[i]), int(offsets[i]), keys[i].tobytes()) for i in pick]
+        seen = set()
+        for _, position, key in sorted(best, reverse=True)[:top]:
+            if key in seen:
+                continue
+            seen.add(key)
+            text = decrypt(data, key)
+            match = regex.search(text)
+            if match is None:
+                continue
+            ratio = int(printable[np.arange(key_len), np.frombuffer(key, dtype=np.uint8)].sum()) / len(data)
+            candidates.append({
+                'position': position,
+                'key': key,
+                'flag': match.group(0).decode(),
+                'full_text': text.decode('ascii', errors='replace'),
+                'printable_ratio': ratio
+            })
+        if candidates:
+            break
+    return candidates
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='repeating-key XOR cracker with a known-plaintext crib')
+    parser.add_argument('file', help='ciphertext file (raw bytes, or hex with --hex)')
+    parser.add_argument('--hex', action='store_true')
+    parser.add_argument('--crib', default=CRIB.decode())
+    parser.add_argument('--length', type=int, action='append', help='key length to try (repeatable); default: detect')
+    parser.add_argument('--max-len', type=int, default=MAX_KEY_LEN)
+    args = parser.parse_args()
+
+    with open(args.file, 'rb') as f:
+        ciphertext = f.read()
+    if args.hex:
+        ciphertext = unhexlify(ciphertext.strip())
+    start = time.time()
+    data = np.frombuffer(ciphertext, dtype=np.uint8)
+    if args.length is None:
+        for k, ioc, dist in key_lengths(data, args.max_len):
+            print(f"key length {k:3d}: coincidence {ioc:.4f}, hamming {dist:.2f} bits/byte")
+    results = crack(ciphertext, args.crib.encode(), args.length, args.max_len)
+    for result in results:
+        print(f"offset {result['position']}: key {result['key'].hex()} -> {result['flag']} "
+              f"(printable {result['printable_ratio']:.3f})")
+    if not results:
+        print("no key found")
+    print(f"{len(ciphertext):,} bytes in {time.time() - start:.2f}s")
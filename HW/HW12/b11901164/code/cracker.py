@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import mmap
+import multiprocessing as mp
+import os
+import time
+
+# ---------------------------
+# Parallel dictionary cracker
+# ---------------------------
+# The wordlist is memory-mapped and cut into CHUNK-sized pieces that end on
+# a newline, so a worker only receives two offsets and reads its lines
+# straight from the shared page cache. Every word is hashed once and its raw
+# digest looked up in a set, so any number of target hashes costs the same.
+
+ALGORITHMS = ('sha256', 'md5', 'sha1')
+CHUNK = 1 << 22 # bytes of wordlist per worker task
+
+def chunks(mm, size=CHUNK):
+    """
+    (start, end) offsets covering the mapped file, each ending after a newline.
+    """
+    start = 0
+    while start < len(mm):
+        end = mm.find(b'\n', min(start + size, len(mm)) - 1)
+        end = len(mm) if end < 0 else end + 1
+        yield start, end
+        start = end
+
+_mm = None
+_targets = None
+_hash = None
+
+def _init_worker(path, targets, algorithm):
+    global _mm, _targets, _hash
+    with open(path, 'rb') as f:
+        _mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _targets = targets
+    _hash = getattr(hashlib, algorithm)
+
+def _crack_chunk(bounds):
+    """
+    Hash every line of one chunk; returns (hits as (digest, word, line in chunk), lines).
+    """
+    start, end = bounds
+    new = _hash
+    lines = _mm[start:end].split(b'\n')
+    if lines[-1] == b'':
+        lines.pop()
+    words = list(map(bytes.strip, lines))
+    digests = [new(word).digest() for word in words]
+    if _targets.isdisjoint(digests): # the common case: one set pass in C, no per-word branch
+        return [], len(lines)
+    hits = [(digest, words[number], number) for number, digest in enumerate(digests) if digest in _targets]
+    return hits, len(lines)
+
+def crack(path, hashes, algorithm='sha256', workers=mp.cpu_count(), chunk=CHUNK, progress=True):
+    """
+    Look up every word of the wordlist at `path` against the hex `hashes`;
+    returns {hex hash: (word, line number)} for the ones found, stopping
+    early once all of them are.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f'unsupported algorithm {algorithm}, expected one of {ALGORITHMS}')
+    targets = {bytes.fromhex(h) for h in hashes}
+    found = {}
+    checked = 0
+    began = time.time()
+    if os.path.getsize(path) == 0: # nothing to check, and mmap cannot map an empty file
+        return found
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        bounds = list(chunks(mm, chunk))
+    with mp.Pool(workers, initializer=_init_worker, initargs=(path, targets, algorithm)) as pool:
+        # imap keeps chunk order, so `checked` is the line number of each chunk's first line
+        for hits, lines in pool.imap(_crack_chunk, bounds):
+            for digest, word, number in hits:
+                found.setdefault(digest.hex(), (word.decode('utf-8', errors='replace'), checked + number + 1))
+            checked += lines
+            if progress:
+                rate = checked / max(time.time() - began, 1e-9)
+                print(f'\rChecked {checked:,} passwords, {rate:,.0f} hashes/s, {len(found)}/{len(targets)} found',
+                      end='', flush=True)
+            if len(found) == len(targets):
+                pool.terminate()
+                break
+    if progress:
+        print()
+    return found
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='parallel dictionary cracker for unsalted hashes')
+    parser.add_argument('wordlist')
+    parser.add_argument('hashes', nargs='+', help='hex digests, or @file with one per line')
+    parser.add_argument('-a', '--algorithm', default='sha256', choices=ALGORITHMS)
+    parser.add_argument('-j', '--workers', type=int, default=mp.cpu_count())
+    args = parser.parse_args()
+
+    hashes = []
+    for h in args.hashes:
+        if h.startswith('@'):
+            with open(h[1:]) as f:
+                hashes += [line.strip() for line in f if line.strip()]
+        else:
+            hashes.append(h)
+    start = time.time()
+    found = crack(args.wordlist, hashes, args.algorithm, args.workers)
+    for h in hashes:
+        if h.lower() in found:
+            word, line_num = found[h.lower()]
+            print(f'{h}: {word} (line {line_num})')
+        else:
+            print(f'{h}: not found')
+    print(f'{len(found)}/{len(set(h.lower() for h in hashes))} found in {time.time() - start:.2f}s')
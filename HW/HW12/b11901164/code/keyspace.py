@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+import json
+import multiprocessing as mp
+import os
+import time
+from bisect import bisect_right
+from typing import Any, Callable, Iterator, Optional
+
+# ---------------------------
+# Keyspace enumeration with index-range sharding and checkpoints
+# ---------------------------
+# A Keyspace numbers every candidate, so a search is just a set of integer
+# ranges: any index maps to its candidate in O(length), workers receive
+# (start, stop) pairs, and a checkpoint only has to remember which ranges
+# are done. Candidates of one length follow itertools.product order (last
+# position changes fastest); shorter lengths come first.
+# This is the part of 2025-Final/P2/WEP/keyspace.py that p3_a.py's mask
+# search uses; that module adds charset/length keyspaces, random access
+# (ks[i], ks.index) and numpy batches.
+
+SHARD = 1 << 20 # indexes per worker task
+
+# hashcat-style mask charsets
+MASK_CHARSETS: dict[str, bytes] = {
+    'l': b'abcdefghijklmnopqrstuvwxyz',
+    'u': b'ABCDEFGHIJKLMNOPQRSTUVWXYZ',
+    'd': b'0123456789',
+    'h': b'0123456789abcdef',
+    'H': b'0123456789ABCDEF',
+    's': b' !"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~',
+}
+MASK_CHARSETS['a'] = MASK_CHARSETS['l'] + MASK_CHARSETS['u'] + MASK_CHARSETS['d'] + MASK_CHARSETS['s']
+
+class Keyspace:
+    """
+    Candidates of a hashcat-style mask, via Keyspace.from_mask().
+      - len(ks)               : size
+      - ks.iter_range(lo, hi) : candidates lo..hi-1 (bytes), odometer-style
+      - ks.split(lo, hi)      : cut a range at length boundaries
+    """
+
+    @classmethod
+    def from_mask(cls, mask: str) -> 'Keyspace':
+        """
+        ?l ?u ?d ?h ?H ?s ?a as in hashcat, ?? for a literal '?', any other
+        character stands for itself, e.g. Keyspace.from_mask('?l?l?l?l?d?d').
+        """
+        layout: list[bytes] = []
+        pos: int = 0
+        while pos < len(mask):
+            if mask[pos] == '?' and pos + 1 < len(mask):
+                name: str = mask[pos + 1]
+                layout.append(b'?' if name == '?' else MASK_CHARSETS[name])
+                pos += 2
+            else:
+                layout.append(mask[pos].encode())
+                pos += 1
+        keyspace: Keyspace = cls.__new__(cls)
+        keyspace._setup([layout], f"mask {mask!r}")
+        return keyspace
+
+    def _setup(self, layouts: list[list[bytes]], description: str):
+        self.layouts: list[list[bytes]] = layouts
+        self.description: str = description
+        self.offsets: list[int] = [] # index of the first candidate of each layout
+        total: int = 0
+        for layout in layouts:
+            self.offsets.append(total)
+            size: int = 1
+            for chars in layout:
+                size *= len(chars)
+            total += size
+        self.size: int = total
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        if not 0 <= index < self.size:
+            raise IndexError("keyspace index out of range")
+        bucket: int = bisect_right(self.offsets, index) - 1
+        return bucket, index - self.offsets[bucket]
+
+    def split(self, start: int, stop: int) -> list[tuple[int, int]]:
+        """
+        [start, stop) cut into sub-ranges that each hold a single length.
+        """
+        bounds: list[int] = self.offsets[1:] + [self.size]
+        ranges: list[tuple[int, int]] = []
+        for first, end in zip(self.offsets, bounds):
+            low, high = max(start, first), min(stop, end)
+            if low < high:
+                ranges.append((low, high))
+        return ranges
+
+    def iter_range(self, start: int, stop: int) -> Iterator[bytes]:
+        """
+        Candidates start..stop-1; after the first one each step only bumps
+        the last digits like an odometer.
+        """
+        for low, high in self.split(start, stop):
+            bucket, index = self._locate(low)
+            layout: list[bytes] = self.layouts[bucket]
+            digits: list[int] = [0] * len(layout)
+            for pos in range(len(layout) - 1, -1, -1):
+                index, digits[pos] = divmod(index, len(layout[pos]))
+            out = bytearray(layout[pos][d] for pos, d in enumerate(digits))
+            last: int = len(layout) - 1
+            for _ in range(high - low):
+                yield bytes(out)
+                pos = last
+                while pos >= 0:
+                    digits[pos] += 1
+                    if digits[pos] < len(layout[pos]):
+                        out[pos] = layout[pos][digits[pos]]
+                        break
+                    digits[pos] = 0
+                    out[pos] = layout[pos][0]
+                    pos -= 1
+
+    def shards(self, start: int = 0, stop: Optional[int] = None, shard: int = SHARD) -> Iterator[tuple[int, int]]:
+        stop = self.size if stop is None else stop
+        for low in range(start, stop, shard):
+            yield low, min(low + shard, stop)
+
+# ---------------------------
+# Checkpoints
+# ---------------------------
+class Checkpoint:
+    """
+    Completed index ranges of one keyspace, saved as JSON to `path`
+    (atomically, at most every `interval` seconds) so a search can resume.
+    """
+
+    def __init__(self, path: str, keyspace: Keyspace, interval: float = 30.0):
+        self.path: str = path
+        self.description: str = keyspace.description
+        self.interval: float = interval
+        self.done: list[list[int]] = [] # sorted, merged [start, stop) ranges
+        self.saved: float = time.time()
+        if os.path.exists(path):
+            with open(path) as f:
+                state: dict[str, Any] = json.load(f)
+            if state['keyspace'] != self.description:
+                raise ValueError(f"{path} belongs to another keyspace: {state['keyspace']}")
+            self.done = state['done']
+
+    def covered(self) -> int:
+        return sum(stop - start for start, stop in self.done)
+
+    def mark(self, start: int, stop: int):
+        merged: list[list[int]] = []
+        for low, high in sorted(self.done + [[start, stop]]):
+            if merged and low <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], high)
+            else:
+                merged.append([low, high])
+        self.done = merged
+        if time.time() - self.saved >= self.interval:
+            self.save()
+
+    def pending(self, start: int, stop: int, shard: int) -> Iterator[tuple[int, int]]:
+        """
+        Shards of [start, stop) that are not done yet.
+        """
+        position: int = start
+        for low, high in self.done + [[stop, stop]]:
+            for shard_low in range(position, min(low, stop), shard):
+                yield shard_low, min(shard_low + shard, low, stop)
+            position = max(position, high)
+            if position >= stop:
+                return
+
+    def save(self):
+        tmp: str = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'keyspace': self.description, 'done': self.done}, f)
+        os.replace(tmp, self.path)
+        self.saved = time.time()
+
+# ---------------------------
+# Multi-process driver
+# ---------------------------
+_task: Optional[Callable[[int, int], Any]] = None
+
+def _init_worker(task: Callable[[int, int], Any]):
+    global _task
+    _task = task
+
+def _run_shard(bounds: tuple[int, int]) -> tuple[Any, int, int]:
+    start, stop = bounds
+    return _task(start, stop), start, stop # type: ignore[misc]
+
+def run(
+    task: Callable[[int, int], Any],
+    keyspace: Keyspace,
+    workers: int = mp.cpu_count(),
+    start: int = 0,
+    stop: Optional[int] = None,
+    shard: int = SHARD,
+    checkpoint: Optional[str] = None,
+    interval: float = 30.0,
+    progress: bool = True,
+) -> Any:
+    """
+    Call task(lo, hi) on every shard of [start, stop) of the keyspace in a
+    pool of workers (the task is sent once per worker, then only integers)
+    and return the first non-None result, stopping all workers.
+    With `checkpoint`, finished shards are recorded in that file and skipped
+    when the same search runs again; Ctrl-C saves it before exiting.
+    """
+    stop = keyspace.size if stop is None else stop
+    state: Optional[Checkpoint] = Checkpoint(checkpoint, keyspace, interval) if checkpoint else None
+    shards: Iterator[tuple[int, int]] = state.pending(start, stop, shard) if state else keyspace.shards(start, stop, shard)
+    skipped: int = state.covered() if state else 0
+    if progress and skipped:
+        print(f"resuming from {checkpoint}: {skipped:,} keys already searched")
+
+    tried: int = 0
+    found: Any = None
+    began: float = time.time()
+    try:
+        with mp.Pool(workers, initializer=_init_worker, initargs=(task,)) as pool:
+            for result, low, high in pool.imap_unordered(_run_shard, shards):
+                tried += high - low
+                if state and result is None: # a shard with a hit stays pending so a rerun finds it again
+                    state.mark(low, high)
+                if progress:
+                    rate: float = tried / max(time.time() - began, 1e-9)
+                    print(f"\r{skipped + tried:,}/{stop - start:,} keys, {rate:,.0f} keys/s", end='', flush=True)
+                if result is not None:
+                    found = result
+                    pool.terminate()
+                    break
+    finally:
+        if progress:
+            print()
+        if state:
+            state.save()
+    return found
@@ -1,20 +1,50 @@
 #!/usr/bin/env python3
 
 import hashlib
+import sys
+from keyspace import Keyspace, run # mask subset of 2025-Final/P2/WEP/keyspace.py
+from cracker import crack
 
 target_hash = '40c3d69c8a012e181bd63d215d61a1df44e8fe7c182da6d24f26b0fae5348010'
-found = False
-
-with open('xato-net-10-million-passwords-1000000.txt', 'r', encoding='utf-8', errors='ignore') as f:
-    for line_num, password in enumerate(f, 1):
-        password = password.strip()
-        if hashlib.sha256(password.encode('utf-8')).hexdigest() == target_hash:
-            print(f'Password found: {password}')
-            print(f'Found at line: {line_num}')
-            found = True
-            break
-        if line_num % 100000 == 0:
-            print(f'Checked {line_num} passwords')
-
-if not found:
-    print('Password not found in dictionary')
+
+def dictionary_search():
+    # mmapped wordlist hashed in newline-aligned chunks by every core; see cracker.py
+    found = crack('xato-net-10-million-passwords-1000000.txt', [target_hash], 'sha256')
+
+    if target_hash in found:
+        password, line_num = found[target_hash]
+        print(f'Password found: {password}')
+        print(f'Found at line: {line_num}')
+    else:
+        print('Password not found in dictionary')
+
+class HashRange:
+    """
+    sha256 every candidate of a keyspace index range; returns the match or None.
+    """
+
+    def __init__(self, keyspace, target):
+        self.keyspace = keyspace
+        self.target = bytes.fromhex(target)
+
+    def __call__(self, start, stop):
+        for candidate in self.keyspace.iter_range(start, stop):
+            if hashlib.sha256(candidate).digest() == self.target:
+                return candidate.decode('utf-8', errors='replace')
+        return None
+
+def mask_search(mask):
+    # e.g. ./p3_a.py '?l?l?l?l?d?d'; rerun the same mask to resume from the checkpoint
+    keyspace = Keyspace.from_mask(mask)
+    print(f'Searching {len(keyspace)} candidates of mask {mask}')
+    password = run(HashRange(keyspace, target_hash), keyspace, checkpoint='p3_a.checkpoint')
+    if password is not None:
+        print(f'Password found: {password}')
+    else:
+        print('Password not found in mask')
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        mask_search(sys.argv[1])
+    else:
+        dictionary_search()